@@ -18,6 +18,9 @@ from .identified import Identified, extract_display_id, is_valid_display_id
 from .toplevel import TopLevel
 from .custom import CustomIdentified, CustomTopLevel
 from .document import Document, copy
+from .shacl import clear_shacl_cache
+from .validation_cache import ValidationCache
+from .compare import DocumentDiff, PropertyDifference, diff
 from .constraint import Constraint
 from .sequence import Sequence
 from .feature import Feature
@@ -0,0 +1,205 @@
+"""Structural comparison of SBOL documents, see diff()."""
+
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Tuple, Union
+
+import rdflib
+
+from .document import Document
+from .identified import Identified
+
+DocumentSource = Union[Document, Path, str, bytes, IO]
+
+
+class PropertyDifference:
+    """The values of one property of one object that differ between
+    two documents. Owned objects are given by their identities.
+    """
+
+    def __init__(self, identity: rdflib.term.Node, property_uri: str,
+                 removed: List[rdflib.term.Node], added: List[rdflib.term.Node]):
+        """
+        :param identity: The identity of the object
+        :param property_uri: The URI of the property
+        :param removed: The values only in the first document
+        :param added: The values only in the second document
+        """
+        self.identity = identity
+        self.property_uri = property_uri
+        self.removed = removed
+        self.added = added
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PropertyDifference):
+            return NotImplemented
+        return ((self.identity, self.property_uri, self.removed, self.added) ==
+                (other.identity, other.property_uri, other.removed, other.added))
+
+    def __repr__(self) -> str:
+        return (f'PropertyDifference({self.identity!r}, {self.property_uri!r},'
+                f' removed={self.removed!r}, added={self.added!r})')
+
+    def __str__(self) -> str:
+        return f'{self.identity} {self.property_uri}: -{self.removed} +{self.added}'
+
+
+class DocumentDiff:
+    """The differences between two documents, see diff().
+
+    `removed` and `added` are the identities of the TopLevel objects
+    and orphans that are only in the first and only in the second
+    document. `changed` maps the identity of each TopLevel object or
+    orphan in both documents whose tree of objects differs to the
+    differences of its objects' properties. `other_rdf` lists the differences between the
+    non-SBOL triples of the documents.
+    """
+
+    def __init__(self):
+        self.removed: List[str] = []
+        self.added: List[str] = []
+        self.changed: Dict[str, List[PropertyDifference]] = {}
+        self.other_rdf: List[PropertyDifference] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.removed or self.added or self.changed or self.other_rdf)
+
+    def __str__(self) -> str:
+        lines = [f'Removed {identity}' for identity in self.removed]
+        lines.extend(f'Added {identity}' for identity in self.added)
+        for identity, differences in self.changed.items():
+            lines.append(f'Changed {identity}')
+            lines.extend(f'    {difference}' for difference in differences)
+        lines.extend(f'Other RDF {difference}' for difference in self.other_rdf)
+        return '\n'.join(lines)
+
+
+def _differences(identity: rdflib.term.Node,
+                 values_a: Dict[str, List[rdflib.term.Node]],
+                 values_b: Dict[str, List[rdflib.term.Node]]) -> List[PropertyDifference]:
+    # The differences between two sets of property values, by property
+    # URI. As in RDF, the order and repetition of values are ignored.
+    result = []
+    for uri in sorted(values_a.keys() | values_b.keys()):
+        a = values_a.get(uri, ())
+        b = values_b.get(uri, ())
+        if a == b:
+            continue
+        set_a = set(a)
+        set_b = set(b)
+        if set_a == set_b:
+            continue
+        removed = list(dict.fromkeys(value for value in a if value not in set_b))
+        added = list(dict.fromkeys(value for value in b if value not in set_a))
+        result.append(PropertyDifference(identity, uri, removed, added))
+    return result
+
+
+def _object_values(obj: Optional[Identified]) -> Dict[str, List[rdflib.term.Node]]:
+    # The property values of an object, including the identities of
+    # the objects it owns
+    if obj is None:
+        return {}
+    values = dict(obj._properties)
+    for uri, children in obj._owned_objects.items():
+        values[uri] = [rdflib.URIRef(child.identity) for child in children]
+    return values
+
+
+def _tree_differences(a: Optional[Identified], b: Optional[Identified],
+                      differences: List[PropertyDifference]) -> None:
+    # Compare two objects with the same identity, and then the objects
+    # they own. Trees with equal content hashes are not compared.
+    if a is not None and b is not None and a.content_hash == b.content_hash:
+        return
+    identity = rdflib.URIRef((a or b).identity)
+    differences.extend(_differences(identity, _object_values(a), _object_values(b)))
+    children_a = _children(a)
+    children_b = _children(b)
+    for child_identity, child_a in children_a.items():
+        _tree_differences(child_a, children_b.get(child_identity), differences)
+    for child_identity, child_b in children_b.items():
+        if child_identity not in children_a:
+            _tree_differences(None, child_b, differences)
+
+
+def _children(obj: Optional[Identified]) -> Dict[str, Identified]:
+    if obj is None:
+        return {}
+    return {child.identity: child
+            for children in obj._owned_objects.values()
+            for child in children}
+
+
+def _other_rdf_differences(graph_a: rdflib.Graph, graph_b: rdflib.Graph) -> List[PropertyDifference]:
+    values_a = _graph_values(graph_a)
+    values_b = _graph_values(graph_b)
+    result = []
+    for subject in sorted(values_a.keys() | values_b.keys()):
+        result.extend(_differences(subject, values_a.get(subject, {}), values_b.get(subject, {})))
+    return result
+
+
+def _graph_values(graph: rdflib.Graph) -> Dict[rdflib.term.Node, Dict[str, List[rdflib.term.Node]]]:
+    values = {}
+    for s, p, o in graph:
+        values.setdefault(s, {}).setdefault(str(p), []).append(o)
+    return values
+
+
+def _roots(document: Document) -> Dict[str, Identified]:
+    # The TopLevel objects and orphans of a document, by identity.
+    # Orphans are compared like TopLevels, except for those owned by
+    # another orphan, which are compared with their owner.
+    owned = {child.identity for orphan in document.orphans for child in _children(orphan).values()}
+    roots = {orphan.identity: orphan for orphan in document.orphans if orphan.identity not in owned}
+    roots.update((top_level.identity, top_level) for top_level in document.objects)
+    return roots
+
+
+def _open(source: DocumentSource, file_format: Optional[str]) -> Document:
+    if isinstance(source, Document):
+        return source
+    return Document.open(source, file_format=file_format)
+
+
+def diff(a: DocumentSource, b: DocumentSource, file_format: Optional[str] = None) -> DocumentDiff:
+    """Compare two documents structurally.
+
+    Objects are matched by identity, so the comparison takes time
+    linear in the size of the documents, unlike comparing RDF graphs
+    for isomorphism. Trees of objects with the same content hash are
+    not compared further, so comparing documents again after small
+    changes is fast.
+
+    Instead of a Document, a file to read can be given in any form
+    that Document.read() accepts. N-Triples files are read with the
+    native streaming reader, without building an RDF graph.
+
+    Blank nodes in the non-SBOL triples are compared by label, so
+    documents with blank nodes that are read separately differ.
+
+    :param a: The first document, or a file to read it from
+    :param b: The second document, or a file to read it from
+    :param file_format: The format of files to read, if it cannot be
+                        guessed
+    :return: The differences from the first document to the second
+    """
+    doc_a = _open(a, file_format)
+    doc_b = _open(b, file_format)
+    result = DocumentDiff()
+    roots_a = _roots(doc_a)
+    roots_b = _roots(doc_b)
+    for identity in sorted(roots_a.keys() | roots_b.keys()):
+        root_a = roots_a.get(identity)
+        root_b = roots_b.get(identity)
+        if root_b is None:
+            result.removed.append(identity)
+        elif root_a is None:
+            result.added.append(identity)
+        else:
+            differences = []
+            _tree_differences(root_a, root_b, differences)
+            if differences:
+                result.changed[identity] = differences
+    result.other_rdf = _other_rdf_differences(doc_a._other_rdf, doc_b._other_rdf)
+    return result
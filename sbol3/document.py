@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import collections
+import io
+import itertools
 import logging
 import os
 import posixpath
@@ -9,12 +11,20 @@ import posixpath
 import typing as pytyping
 import warnings
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
 
-import pyshacl
 import rdflib
 
 from . import *
+from . import parsing, validating, writing
+from .incremental import IncrementalValidator
+from .lazy import LazyTrees
+from .merge import merge
+from .references import ReferenceIndex, check_references, reference_index, resolve_references
+from .schema import ParseSchema
+from .shacl import PYSHACL_ENGINE
+from .type_filter import TypeSpec, make_type_filter
+from .validation_cache import ValidationCache
 from .object import BUILDER_REGISTER
 
 _default_bindings = {
@@ -52,14 +62,20 @@ class Document:
     _uri_type_map: Dict[str, Callable[[str, str], Identified]] = BUILDER_REGISTER
 
     @staticmethod
-    def open(location: Union[Path, str], file_format: str = None) -> Document:
+    def open(location: Union[Path, str, bytes, pytyping.IO], file_format: str = None,
+             lazy: bool = False, include_types: Optional[Iterable[TypeSpec]] = None,
+             exclude_types: Optional[Iterable[TypeSpec]] = None, keep_skipped: bool = False) -> Document:
         doc = Document()
-        doc.read(location, file_format=file_format)
+        doc.read(location, file_format=file_format, lazy=lazy, include_types=include_types,
+                 exclude_types=exclude_types, keep_skipped=keep_skipped)
         return doc
 
     def __init__(self):
         self.logger = logging.getLogger(SBOL_LOGGER_NAME)
-        self.objects: List[TopLevel] = []
+        self._objects: List[TopLevel] = []
+        # The TopLevel object trees that have not been built yet, for
+        # a document that is read lazily
+        self._lazy: Optional[LazyTrees] = None
         # Orphans are non-TopLevel objects that are not otherwise linked
         # into the object hierarchy.
         self.orphans: List[Identified] = []
@@ -67,6 +83,42 @@ class Document:
         # Non-SBOL triples. These are triples that are not recognized as
         # SBOL. They are stored in _other_rdf for round-tripping purposes.
         self._other_rdf = rdflib.Graph()
+        # Indexes over every object in the document tree, used by
+        # find() and for duplicate detection. They are maintained as
+        # objects enter and leave the document. See _index_object().
+        self._identity_index: Dict[str, Identified] = {}
+        self._display_id_index: Dict[str, Dict[Identified, None]] = {}
+        # The (identity, display_id) keys each object was indexed
+        # under, so that it can be unindexed even after its identity
+        # has changed.
+        self._index_keys: Dict[Identified, tuple[Optional[str], Optional[str]]] = {}
+        # Cached validation results for validate(incremental=True),
+        # created on first use
+        self._incremental: Optional[IncrementalValidator] = None
+        # The referrers of each URI, for referrers(), created on first
+        # use
+        self._references: Optional[ReferenceIndex] = None
+        # Incremented whenever an object in this document changes or
+        # an object is added or removed
+        self._generation = 0
+        # The result of resolve_references(), and the generation it
+        # was computed at
+        self._resolved: Optional[pytyping.Tuple[int, Dict[str, Identified]]] = None
+        # Durations in seconds of the phases of the most recent read,
+        # keyed by phase name. Timings are also logged at DEBUG level.
+        self.parse_timings: Dict[str, float] = {}
+        # How to build the objects of each list of rdf:types, for the
+        # most recent read, see ParseSchema
+        self._schemas: Dict[pytyping.Tuple[str, ...], ParseSchema] = {}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # Objects are pickled without their document, see
+        # Identified.__getstate__()
+
+        def restore_document(obj: Identified):
+            obj.__dict__['_document'] = self
+        self.traverse(restore_document)
 
     def __str__(self):
         """
@@ -87,7 +139,9 @@ class Document:
         return self.size()
 
     def __contains__(self, item):
-        return item in self.objects
+        if not isinstance(item, TopLevel):
+            return False
+        return self._identity_index.get(item.identity) is item
 
     def __iter__(self):
         """Iterate over the top level objects in this document.
@@ -100,193 +154,78 @@ class Document:
 
         :return: An iterator over the top level objects
         """
-        tmp_list = list(self.objects)
+        tmp_list = list(self._objects)
+        if self._lazy is not None:
+            # Build the objects that have not been built yet as they
+            # are reached
+            return itertools.chain(tmp_list, self._lazy)
         return iter(tmp_list)
 
-    def _build_extension_object(self, identity: str, sbol_type: str,
-                                types: List[str]) -> Optional[Identified]:
-        custom_types = {
-            SBOL_IDENTIFIED: CustomIdentified,
-            SBOL_TOP_LEVEL: CustomTopLevel
-        }
-        if sbol_type not in custom_types:
-            msg = f'{identity} has SBOL type {sbol_type} which is not one of'
-            msg += f' {custom_types.keys()}. (See Section 6.11)'
-            raise SBOLError(msg)
-        # Look for a builder associated with one of the rdf:types.
-        # If none of the rdf:types have a builder, use the sbol_type's builder
-        builder = None
-        build_type = None
-        for type_uri in types:
-            try:
-                builder = self._uri_type_map[type_uri]
-                build_type = type_uri
-                break
-            except KeyError:
-                logging.warning('No builder for %s', type_uri)
-        if builder is None:
-            builder = custom_types[sbol_type]
-            build_type = types[0]
-        return builder(identity=identity, type_uri=build_type)
-
-    def _build_object(self, identity: str, types: List[str]) -> Optional[Identified]:
-        # Given an identity and a list of RDF types, build an object if possible.
-        # If there is 1 SBOL type and we don't know it, raise an exception
-        # If there are multiple types and 1 is TopLevel or Identified, then
-        #    it is an extension. Use the other types to try to build it. If
-        #    no other type is known, build a generic TopLevel or Identified.
-        sbol_types = [t for t in types if t.startswith(SBOL3_NS)]
-        if len(sbol_types) == 0:
-            # If there are no SBOL types in the list. Ignore this entity.
-            # Its triples will be stored in self._other_rdf later in the
-            # load process.
-            return None
-        if len(sbol_types) > 1:
-            # If there are multiple SBOL types in the list, raise an error.
-            # SBOL 3.0.1 Section 5.4: "an object MUST have no more than one
-            # rdfType property in the 'http://sbols.org/v3#' namespace"
-            msg = f'{identity} has more than one rdfType property in the'
-            msg += f' {SBOL3_NS} namespace.'
-            raise SBOLError(msg)
-        extension_types = {
-            SBOL_IDENTIFIED: CustomIdentified,
-            SBOL_TOP_LEVEL: CustomTopLevel
-        }
-        sbol_type = sbol_types[0]
-        if sbol_type in extension_types:
-            # Build an extension object
-            types.remove(sbol_type)
-            result = self._build_extension_object(identity, sbol_type, types)
-        else:
-            try:
-                builder = self._uri_type_map[sbol_type]
-            except KeyError:
-                logging.warning('No builder found for %s', sbol_type)
-                raise SBOLError(f'Unknown type {sbol_type}')
-            result = builder(identity=identity, type_uri=sbol_type)
-        # Fix https://github.com/SynBioDex/pySBOL3/issues/264
-        if isinstance(result, TopLevel):
-            # Ensure namespace is not set. It should get set later in the
-            # build process. This avoids setting it when the file is invalid
-            # and the object has no namespace in the file.
-            result.clear_property(SBOL_NAMESPACE)
-        # End of fix for https://github.com/SynBioDex/pySBOL3/issues/264
-        return result
-
-    def _parse_objects(self, graph: rdflib.Graph) -> Dict[str, SBOLObject]:
-        # First extract the identities and their types. Each identity
-        # can have either one or two rdf:type properties. If one,
-        # create the entity. If two, it is a custom type (see section
-        # 6.11 of the spec) and we instantiate it specially.
-        #
-        identity_types: Dict[str, List[str]] = collections.defaultdict(list)
-        for s, _, o in graph.triples((None, rdflib.RDF.type, None)):
-            str_o = str(o)
-            str_s = str(s)
-            identity_types[str_s].append(str_o)
-        # Now iterate over the identity->type dict creating the objects.
-        result = {}
-        for identity, types in identity_types.items():
-            obj = self._build_object(identity, types)
-            if obj:
-                obj.document = self
-                result[obj.identity] = obj
-        return result
-
-    @staticmethod
-    def _parse_attributes(objects, graph) -> dict[str, Identified]:
-        # Track the child objects that get assigned to optimize the
-        # search for orphans later in the loading process.
-        child_objects = {}
-        for s, p, o in graph.triples((None, None, None)):
-            str_s = str(s)
-            str_p = str(p)
-            try:
-                obj = objects[str_s]
-            except KeyError:
-                # Object is not an SBOL object, skip it
-                continue
-            if str_p in obj._owned_objects:
-                other_identity = str(o)
-                other = objects[other_identity]
-                obj._owned_objects[str_p].append(other)
-                # Record the assigned object as a child
-                child_objects[other_identity] = other
-            elif str_p == RDF_TYPE:
-                # Handle rdf:type specially because the main type(s)
-                # will already be in the list from the build_object
-                # phase and those entries need to be maintained and
-                # we don't want duplicates
-                if o not in obj._properties[str_p]:
-                    obj._properties[str_p].append(o)
-            else:
-                obj._properties[str_p].append(o)
-        return child_objects
+    @property
+    def objects(self) -> List[TopLevel]:
+        """The TopLevel objects in this document. If the document was
+        read lazily, the objects that have not been built yet are
+        built.
+        """
+        if self._lazy is not None:
+            self._lazy.materialize_all()
+        return self._objects
 
-    @staticmethod
-    def _clean_up_singletons(objects: Dict[str, SBOLObject]):
-        """Clean up singleton properties after reading an SBOL file.
-
-        When an SBOL file is read, values are appended to the property
-        stores without knowledge of which stores are singletons and
-        which stores are lists. This method cleans up singleton properties
-        by ensuring that each has exactly one value.
-        """
-        # This is necessary due to defaulting of properties when using
-        # the builder. Some objects have required properties, which the
-        # builder sets. In the case of singleton values, that can result
-        # in multiple values in a singleton property. Only the first value
-        # is used, so the value read from file is ignored.
-        for _, obj in objects.items():
-            for _, attr in obj.__dict__.items():
-                if isinstance(attr, SingletonProperty):
-                    prop_uri = attr.property_uri
-                    store = attr._storage()
-                    if len(store[prop_uri]) > 1:
-                        store[prop_uri] = store[prop_uri][-1:]
+    @objects.setter
+    def objects(self, objects: List[TopLevel]) -> None:
+        self._lazy = None
+        self._objects = objects
 
     def clear(self) -> None:
-        self.objects.clear()
+        self._lazy = None
+        self._objects.clear()
+        self._clear_index()
         self._namespaces = _default_bindings.copy()
 
-    def _parse_graph(self, graph) -> None:
-        objects = self._parse_objects(graph)
-        child_objects = self._parse_attributes(objects, graph)
-        self._clean_up_singletons(objects)
-        # Validate all the objects
-        # TODO: Where does this belong? Is this automatic?
-        #       Or should a user invoke validate?
-        # for obj in objects.values():
-        #     obj.validate()
-
-        # Extract the top_levels to a dictionary to speed up the search
-        # for orphans below.
-        top_levels = {uri: obj for uri, obj in objects.items()
-                      if isinstance(obj, TopLevel)}
-        # Store the TopLevel objects in the Document
-        self.objects = list(top_levels.values())
-        # Gather Orphans for future writing.
-        # These are expected to be non-TopLevel annotation objects whose owners
-        # have no custom implementation (i.e. no builder registered). These objects
-        # will be written out as part of Document.write_string()
-        self.orphans = []
-        for uri, obj in objects.items():
-            if uri in top_levels or uri in child_objects:
-                continue
-            found = self.find(uri)
-            if found:
-                continue
-            self.orphans.append(obj)
-        # Store the namespaces in the Document for later use
-        for prefix, uri in graph.namespaces():
-            self.bind(prefix, uri)
-        # Remove the triples for every object we have loaded, leaving
-        # the non-RDF triples for round tripping
-        # See https://github.com/SynBioDex/pySBOL3/issues/96
-        for uri in objects:
-            graph.remove((rdflib.URIRef(uri), None, None))
-        # Now tuck away the graph for use in Document.write_string()
-        self._other_rdf = graph
+    def _clear_index(self) -> None:
+        # Forget every object, with its validation results and
+        # references, when the document is cleared or read
+        self._identity_index = {}
+        self._display_id_index = {}
+        self._index_keys = {}
+        self._incremental = None
+        self._references = None
+        self._resolved = None
+
+    def _index_object(self, obj: Identified) -> None:
+        """Add an object to the identity and display_id indexes, or
+        refresh its entries if its identity has changed since it was
+        last indexed.
+        """
+        self._unindex_object(obj)
+        self._object_changed(obj)
+        identity = obj.identity
+        display_id = obj.display_id
+        self._index_keys[obj] = (identity, display_id)
+        if identity is not None:
+            self._identity_index[identity] = obj
+        if display_id:
+            self._display_id_index.setdefault(display_id, {})[obj] = None
+
+    def _unindex_object(self, obj: Identified) -> None:
+        """Remove an object from the identity and display_id indexes.
+        Objects that are not indexed are silently ignored.
+        """
+        try:
+            identity, display_id = self._index_keys.pop(obj)
+        except KeyError:
+            return
+        self._generation += 1
+        if self._references is not None:
+            self._references.object_changed(obj)
+        if identity is not None and self._identity_index.get(identity) is obj:
+            del self._identity_index[identity]
+        if display_id:
+            same_display_id = self._display_id_index.get(display_id)
+            if same_display_id is not None:
+                same_display_id.pop(obj, None)
+                if not same_display_id:
+                    del self._display_id_index[display_id]
 
     def _guess_format(self, fpath: str):
         rdf_format = rdflib.util.guess_format(fpath)
@@ -318,26 +257,59 @@ class Document:
         raise ValueError('Provided file format is not a valid one.')
 
     # Formats: 'n3', 'nt', 'turtle', 'xml'
-    def read(self, location: Union[Path, str], file_format: str = None) -> None:
+    def read(self, location: Union[Path, str, bytes, pytyping.IO], file_format: str = None,
+             lazy: bool = False, include_types: Optional[Iterable[TypeSpec]] = None,
+             exclude_types: Optional[Iterable[TypeSpec]] = None, keep_skipped: bool = False) -> None:
+        """Read a document from a file.
+
+        location may be a path, an open file object in text or binary
+        mode, or the bytes of a serialized document. If file_format is
+        None the format is guessed from the extension of the path or
+        from the name of the file object. The format of bytes cannot
+        be guessed, so it must be given.
+
+        If lazy is true, objects are only built when they are needed:
+        a TopLevel and the objects it owns are built when the
+        TopLevel or one of its objects is looked up with find(), when
+        iteration reaches it, or when all the objects are needed, for
+        example to use `objects`, write or validate the document.
+
+        To read only some of the objects, give the types of the
+        TopLevel objects to build as include_types, or the types of
+        objects to leave out, TopLevel or not, as exclude_types. Types
+        are classes, which match their subclasses, or rdf:type URIs.
+        The objects owned by an object that is left out are left out
+        too. The triples of the objects that are left out are
+        dropped, unless keep_skipped is true, in which case they are
+        kept with the non-SBOL triples and written back when the
+        document is written, although find(), validate() and the
+        reference checks still ignore them.
+        """
+        type_filter = make_type_filter(include_types, exclude_types, keep_skipped)
+        if isinstance(location, (bytes, bytearray)):
+            if file_format is None:
+                raise ValueError('A file format is required to read bytes')
+            return parsing.read_stream(self, io.BytesIO(location), file_format, lazy, type_filter)
+        if hasattr(location, 'read'):
+            if file_format is None:
+                file_format = self._guess_format(str(getattr(location, 'name', '')))
+            if file_format is None:
+                raise ValueError('Unable to determine file format')
+            return parsing.read_stream(self, location, file_format, lazy, type_filter)
         _location = str(location)  # normalize location to a string
         if file_format is None:
             file_format = self._guess_format(_location)
         if file_format is None:
             raise ValueError('Unable to determine file format')
-        if file_format == SORTED_NTRIPLES:
-            file_format = NTRIPLES
-        graph = rdflib.Graph()
-        graph.parse(_location, format=file_format)
-        return self._parse_graph(graph)
+        return parsing.read_location(self, _location, file_format, lazy, type_filter)
 
     # Formats: 'n3', 'nt', 'turtle', 'xml'
-    def read_string(self, data: str, file_format: str) -> None:
+    def read_string(self, data: str, file_format: str, lazy: bool = False,
+                    include_types: Optional[Iterable[TypeSpec]] = None,
+                    exclude_types: Optional[Iterable[TypeSpec]] = None, keep_skipped: bool = False) -> None:
         # TODO: clear the document, this isn't append
-        if file_format == SORTED_NTRIPLES:
-            file_format = NTRIPLES
-        graph = rdflib.Graph()
-        graph.parse(data=data, format=file_format)
-        return self._parse_graph(graph)
+        type_filter = make_type_filter(include_types, exclude_types, keep_skipped)
+        return parsing.read_string(self, data, file_format, lazy, type_filter)
 
     def _add(self, obj: TopLevel) -> TopLevel:
         """Add objects to the document.
@@ -345,38 +317,67 @@ class Document:
         if not isinstance(obj, TopLevel):
             message = f'Expected TopLevel instance, {type(obj).__name__} found'
             raise TypeError(message)
-        found_obj = self.find(obj.identity)
-        if found_obj is not None:
+        if self._lazy is not None:
+            self._lazy.materialize_identity(obj.identity)
+        if obj.identity in self._identity_index:
             message = f'An entity with identity "{obj.identity}"'
             message += ' already exists in document'
             raise ValueError(message)
-        self.objects.append(obj)
-
+        self._take_from_documents([obj])
+        self._objects.append(obj)
         # Assign this document to the object tree rooted
-        # in the TopLevel being added
-        def assign_document(x: Identified):
-            x.document = self
-        obj.traverse(assign_document)
+        # in the TopLevel being added. This also indexes the tree.
+        obj.document = self
         return obj
 
     def _add_all(self, objects: pytyping.Sequence[TopLevel]) -> pytyping.Sequence[TopLevel]:
-        # Perform type check of all objects.
+        # Materialize the objects once so that any iterable, including
+        # a generator, can be checked and then added.
+        top_levels = list(objects)
+        # Perform type and duplicate checks of all objects.
         # We do this to avoid finding out part way through that an
         # object can't be added. That would leave the document in an
         # unknown state.
-        for obj in objects:
+        new_identities = set()
+        for obj in top_levels:
             if not isinstance(obj, TopLevel):
                 if isinstance(obj, Identified):
                     raise TypeError(f'{obj.identity} is not a TopLevel object')
 
                 raise TypeError(f'{repr(obj)} is not a TopLevel object')
-
-        # Dispatch to Document._add to add the individual objects
-        for obj in objects:
-            self._add(obj)
+            if self._lazy is not None:
+                self._lazy.materialize_identity(obj.identity)
+            if obj.identity in self._identity_index or obj.identity in new_identities:
+                message = f'An entity with identity "{obj.identity}"'
+                message += ' already exists in document'
+                raise ValueError(message)
+            new_identities.add(obj.identity)
+
+        # Add all the objects, then assign this document to each
+        # object tree in a single pass. Assigning the document also
+        # indexes the trees.
+        self._take_from_documents(top_levels)
+        self._objects.extend(top_levels)
+        for obj in top_levels:
+            obj.document = self
         # return the passed argument
         return objects
 
+    def _take_from_documents(self, top_levels: Iterable[TopLevel]) -> None:
+        # Remove TopLevels that are being added to this document from
+        # the documents they belong to, so that each TopLevel is in
+        # the objects and the indexes of a single document
+        leaving: Dict[int, pytyping.Tuple[Document, Set[int]]] = {}
+        for obj in top_levels:
+            other = obj.document
+            if other is not None and other is not self:
+                leaving.setdefault(id(other), (other, set()))[1].add(id(obj))
+        for other, object_ids in leaving.values():
+            for obj in other._objects:
+                if id(obj) in object_ids:
+                    obj.traverse(other._unindex_object)
+            other._objects[:] = [obj for obj in other._objects if id(obj) not in object_ids]
+
     def add(self,
             objects: Union[TopLevel, pytyping.Sequence[TopLevel]]) -> Union[TopLevel, pytyping.Sequence[TopLevel]]:
         # objects must be TopLevel or iterable. If neither, raise a TypeError.
@@ -395,29 +396,29 @@ class Document:
             return self._add(objects)
         return self._add_all(objects)
 
-    def _find_in_objects(self, search_string: str) -> Optional[Identified]:
-        # TODO: implement recursive search
-        for obj in self.objects:
-            # TODO: needs an object.find(search_string) method on ... Identified?
-            result = obj.find(search_string)
-            if result is not None:
-                return result
-        return None
-
     def find(self, search_string: str) -> Optional[Identified]:
         """Find an object by identity URI or by display_id.
 
+        TopLevel objects take precedence over the objects they own,
+        and identity matches take precedence over display_id matches.
+
         :param search_string: Either an identity URI or a display_id
         :type search_string: str
         :returns: The named object or ``None`` if no object was found
 
         """
-        for obj in self.objects:
-            if obj.identity == search_string:
+        if self._lazy is not None:
+            self._lazy.materialize_matching(search_string)
+        found = self._identity_index.get(search_string)
+        if isinstance(found, TopLevel):
+            return found
+        same_display_id = self._display_id_index.get(search_string, ())
+        for obj in same_display_id:
+            if isinstance(obj, TopLevel):
                 return obj
-            if obj.display_id and obj.display_id == search_string:
-                return obj
-        return self._find_in_objects(search_string)
+        if found is not None:
+            return found
+        return next(iter(same_display_id), None)
 
     def join_lines(self, lines: List[Union[bytes, str]]) -> Union[bytes, str]:
         """Join lines for either bytes or strings. Joins a list of lines
@@ -440,44 +441,59 @@ class Document:
         joined = newline.join(lines)
         return joined + newline
 
+    def triples(self) -> pytyping.Iterator[tuple[rdflib.term.Node, rdflib.term.Node, rdflib.term.Node]]:
+        """Generate the RDF triples of this document: those of every
+        object, followed by the non-SBOL triples.
+
+        Unlike graph(), no intermediate RDF Graph is built.
+        """
+        for orphan in self.orphans:
+            yield from orphan.triples()
+        for obj in self.objects:
+            yield from obj.triples()
+        yield from self._other_rdf
+
     def write_string(self, file_format: str) -> str:
-        graph = self.graph()
         if file_format in (NTRIPLES, SORTED_NTRIPLES):
-            # RDFlib puts in an extra blank line so we handle N-Triples
-            # in a special way to get rid of the extra line.
-
-            # Have RDFlib give us the n-triples as a string
-            nt_text = graph.serialize(format=NTRIPLES)
-            # Split it into lines and filter out the blank lines
-            lines = [line for line in nt_text.splitlines() if line]
-            if file_format == SORTED_NTRIPLES:
-                # sort the lines
-                lines.sort()
-            # Join the lines together
-            result = self.join_lines(lines)
-        elif file_format == JSONLD:
-            context = {f'@{prefix}': uri for prefix, uri in self._namespaces.items()}
-            result = graph.serialize(format=file_format, context=context)
-        else:
-            result = graph.serialize(format=file_format)
+            buffer = io.StringIO()
+            writing.write_text(self, buffer, file_format)
+            return buffer.getvalue()
+        result = writing.serialize(self, file_format)
         if isinstance(result, bytes):
             result = result.decode()
         return result
 
-    def write(self, fpath: Union[Path, str], file_format: str = None) -> None:
+    def write(self, fpath: Union[Path, str, pytyping.IO], file_format: str = None,
+              stream_turtle: bool = False) -> None:
         """Write the document to file.
 
+        fpath may be a path or a file object opened for writing in
+        either text or binary mode. A file object is left open.
+
         If file_format is None the desired format is guessed from the
-        extension of fpath. If file_format cannot be guessed a ValueError
-        is raised.
+        extension of fpath, or from the name of the file object. If
+        file_format cannot be guessed a ValueError is raised.
+
+        N-Triples and sorted N-Triples are written incrementally, one
+        object tree at a time, rather than first building the whole
+        output in memory. The output is the same as write_string().
+
+        If stream_turtle is true, Turtle is written incrementally too.
+        The Turtle written this way groups statements by TopLevel, so
+        it can be ordered differently from the output of
+        write_string().
         """
-        _fpath = str(fpath)  # normalize fpath to a string
+        is_stream = hasattr(fpath, 'write')
+        if not is_stream:
+            fpath = str(fpath)  # normalize fpath to a string
         if file_format is None:
-            file_format = self._guess_format(_fpath)
+            file_format = self._guess_format(str(getattr(fpath, 'name', '')) if is_stream else fpath)
         if file_format is None:
             raise ValueError('Unable to determine file format')
-        with open(_fpath, 'w', encoding='utf-8') as outfile:
-            outfile.write(self.write_string(file_format))
+        if is_stream:
+            writing.write_stream(self, fpath, file_format, stream_turtle)
+        else:
+            writing.write_location(self, fpath, file_format, stream_turtle)
 
     def graph(self) -> rdflib.Graph:
         """Convert document to an RDF Graph.
@@ -553,39 +569,174 @@ class Document:
         return report
 
     def validate_shacl(self,
-                       report: Optional[ValidationReport] = None
+                       report: Optional[ValidationReport] = None,
+                       shapes_path: Optional[str] = None,
+                       workers: int = 1,
+                       engine: str = PYSHACL_ENGINE,
+                       max_errors: Optional[int] = None,
+                       fail_fast: bool = False
                        ) -> ValidationReport:
         """Validate this document using SHACL rules.
+
+        The shapes are parsed once and cached, see
+        sbol3.clear_shacl_cache().
+
+        Two engines are available. The 'compiled' engine checks the
+        document's objects directly, without converting the document
+        to RDF, but supports only the SHACL features used by the SBOL3
+        shapes. The 'pyshacl' engine converts the document to an RDF
+        graph and validates it with pyshacl, and supports all of SHACL.
+        Both find the same issues, although not always in the same
+        order. The pyshacl engine is the default and the reference; the
+        compiled engine must be requested, and validates in a single
+        process.
+
+        With the pyshacl engine, if workers is greater than 1, the
+        document is partitioned into shards of whole TopLevel object
+        trees, and the shards are
+        validated in parallel by that many worker processes. The SBOL3
+        shapes only look at an object's own triples and the types of
+        the objects it refers to, which each shard includes, so the
+        results are the same as validating the whole document at once.
+        Custom shapes that look further than that can give different
+        results when sharded.
+
+        Validation stops once the report holds max_errors errors, see
+        validate(). The pyshacl engine can only stop early when one
+        more error will fill the report.
+
+        :param report: The ValidationReport to be populated
+        :param shapes_path: A Turtle file of SHACL shapes to use instead
+                            of the SBOL3 shapes
+        :param workers: The number of processes to validate with when
+                        using the pyshacl engine
+        :param engine: 'pyshacl' or 'compiled'
+        :param max_errors: Stop after this many errors
+        :param fail_fast: Stop after the first error
+        :raises ValueError: If the engine is unknown, or is 'compiled'
+                            and the shapes cannot be compiled or
+                            workers is greater than 1
+        :return: report
         """
-        if report is None:
-            report = ValidationReport()
-        # Save to RDF, then run SHACL over the resulting graph
-        data_graph = self.graph()
-        shacl_graph = None
-        data_graph.parse(data_path(os.path.join('rdf', 'sbol3-shapes.ttl')),
-                         format='ttl')
-        shacl_report = pyshacl.validate(data_graph=data_graph,
-                                        shacl_graph=shacl_graph,
-                                        ont_graph=None,
-                                        inference=None,
-                                        abort_on_first=False,
-                                        meta_shacl=False,
-                                        advanced=True,
-                                        debug=False)
-        # Split up the shacl_report tuple
-        conforms, results_graph, _ = shacl_report
-        if not conforms:
-            self.parse_shacl_graph(results_graph, report)
-        return report
+        report = validating.limit_report(report, max_errors, fail_fast)
+        return validating.validate_shacl(self, report, shapes_path, workers, engine)
 
-    def validate(self, report: ValidationReport = None) -> ValidationReport:
-        """Validate all objects in this document."""
-        if report is None:
-            report = ValidationReport()
-        for obj in self.objects:
-            obj.validate(report)
-        self.validate_shacl(report)
-        return report
+    def _object_changed(self, obj: Identified) -> None:
+        """Note that an object in this document has changed, for
+        incremental validation and the reference index.
+        """
+        self._generation += 1
+        if self._incremental is not None:
+            self._incremental.object_changed(obj)
+        if self._references is not None:
+            self._references.object_changed(obj)
+
+    def referrers(self, target: Union[Identified, str]) -> List[pytyping.Tuple[Identified, str]]:
+        """Find the objects in this document that refer to an object.
+
+        For example, the referrers of a Sequence include the
+        Components whose sequences property lists it. An index of
+        references is built the first time this method is called, and
+        then kept up to date as objects change, so later calls are
+        fast. Changes made directly to the internal property storage
+        are not detected.
+
+        :param target: An object or the URI of an object, which need
+                       not be in this document
+        :return: The objects that refer to target, each with the URI
+                 of the property that refers to it
+        """
+        if isinstance(target, Identified):
+            target = target.identity
+        return reference_index(self).get(str(target))
+
+    def resolve_references(self) -> Dict[str, Identified]:
+        """Resolve every reference of the objects in this document in
+        one pass.
+
+        The references are found with the same index as referrers(),
+        and resolved by identity, as ReferencedURI.lookup() resolves
+        them. The map is returned again until the document changes,
+        so it must not be modified.
+
+        :return: The objects that the references refer to, by URI.
+                 References to objects that are not in the document
+                 are left out.
+        """
+        return resolve_references(self)
+
+    def check_references(self, report: Optional[ValidationReport] = None) -> ValidationReport:
+        """Check that the references of the objects in this document
+        refer to objects in the document.
+
+        A reference to a missing object in one of the namespaces of
+        the document's TopLevel objects is reported as an error. A
+        reference to a missing object in another namespace is
+        reported as a warning, as it may refer to an object in another
+        document. The document is checked in a single pass, using the
+        same index of references as referrers().
+
+        :param report: The ValidationReport to populate, or None to
+                       create one
+        :return: The report
+        """
+        return check_references(self, report)
+
+    def validate(self, report: ValidationReport = None, workers: int = 1,
+                 incremental: bool = False,
+                 chunk_size: Optional[int] = None,
+                 max_errors: Optional[int] = None,
+                 fail_fast: bool = False,
+                 cache: Union[str, Path, ValidationCache, None] = None) -> ValidationReport:
+        """Validate all objects in this document.
+
+        If workers is greater than 1, the TopLevel objects are
+        validated in chunks by that many worker processes. Their
+        results are merged in order of TopLevel identity, so the report
+        does not depend on how the work was divided, but it may list
+        issues in a different order than validating in one process.
+
+        If incremental is True, the results of each TopLevel are kept
+        for the next incremental validation, and only the TopLevels
+        that have changed since then are validated again, along with
+        those that refer to objects whose types have changed. The
+        report holds the same issues as a full validation, provided
+        that custom validate() methods look only at the object being
+        validated and the objects it owns. Incremental validation
+        runs in a single process, and uses the compiled SHACL engine,
+        so SHACL issues can be listed in a different order.
+
+        If max_errors is given, or fail_fast is True, validation stops
+        once the report holds that many errors, or one error. The
+        report then holds the issues found up to that point. The limit
+        is kept in the report, see ValidationReport.max_errors, so a
+        report with a limit can also be passed to validate() itself or
+        to the validate() method of an object.
+
+        If a cache is given, the results of each TopLevel are stored in
+        it, and TopLevels whose results are already in the cache are
+        not validated again, see ValidationCache. As for incremental
+        validation, the report holds the same issues as a full
+        validation.
+
+        :param report: The ValidationReport to be populated
+        :param workers: The number of processes to validate with, see
+                        also validate_shacl()
+        :param incremental: Re-use the results of unchanged TopLevels
+        :param chunk_size: The number of TopLevels each worker process
+                           validates at a time, by default chosen from
+                           the number of workers
+        :param max_errors: Stop after this many errors
+        :param fail_fast: Stop after the first error
+        :param cache: A ValidationCache, or the path of the SQLite
+                      database of one
+        :raises ValueError: If workers, chunk_size or max_errors is
+                            less than 1, or if a cache is combined with
+                            incremental or parallel validation
+        :return: report
+        """
+        report = validating.limit_report(report, max_errors, fail_fast)
+        return validating.validate(self, report, workers, incremental, chunk_size, cache)
 
     def find_all(self, predicate: Callable[[Identified], bool]) -> List[Identified]:
         """Executes a predicate on every object in the document tree,
@@ -669,14 +820,16 @@ class Document:
 
         :return: The total number of objects in the Document.
         """
-        return len(self.objects)
+        if self._lazy is not None:
+            return len(self._objects) + len(self._lazy)
+        return len(self._objects)
 
     def remove(self, objects: Iterable[TopLevel]):
         objects_to_remove = []
         for obj in objects:
             if not isinstance(obj, TopLevel):
                 raise ValueError('')
-            if obj not in self.objects:
+            if obj not in self:
                 raise ValueError('')
             objects_to_remove.append(obj)
         # Now do the removal of each top level object and all of its children
@@ -695,9 +848,10 @@ class Document:
         :return: Nothing
         """
         try:
-            self.objects.remove(top_level)
+            self._objects.remove(top_level)
         except ValueError:
-            pass
+            return
+        top_level.traverse(self._unindex_object)
 
     def migrate(self, top_levels: Iterable[TopLevel]) -> Any:
         """Migrate objects to this document.
@@ -720,6 +874,32 @@ class Document:
         # Add each document to this document
         self.add(objects)
 
+    def merge(self, documents: Iterable[Document], on_conflict: str = 'error') -> List[str]:
+        """Merge other documents into this document.
+
+        The TopLevel objects and orphans of the documents are moved to
+        this document, as by migrate(). An object with the same
+        identity as one already in this document, or merged from an
+        earlier document, is a duplicate if it has the same content
+        hash, and is left where it is. Otherwise it conflicts with the
+        first object, and on_conflict determines what happens:
+
+        * 'error': a ValueError is raised, and nothing is merged
+        * 'keep': the first object is kept
+        * 'replace': the first object is replaced by the later one
+
+        The non-SBOL triples of the documents are merged, and their
+        namespace prefixes are bound unless the prefix or the
+        namespace is already bound in this document.
+
+        No effort is made to maintain referential integrity.
+
+        :param documents: The documents to merge into this document
+        :param on_conflict: 'error', 'keep' or 'replace'
+        :return: The identities of the conflicting objects
+        """
+        return merge(self, documents, on_conflict)
+
     @staticmethod
     def change_object_namespace(top_levels: Iterable[TopLevel],
                                 new_namespace: str,
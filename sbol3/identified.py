@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import copy
+import hashlib
 import math
 import posixpath
 import typing
-from typing import Any, Callable, Optional
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
 from urllib.parse import urlparse
 
 import rdflib
 
 from . import *
+from .ntriples import _term_text
 from .typing import *
 from .utils import parse_class_name
 
@@ -126,6 +130,71 @@ class Identified(SBOLObject):
     def __str__(self):
         return f'<{self.__class__.__name__} {self.identity}>'
 
+    def __copy__(self) -> Identified:
+        """Shallow copy this object, sharing its attributes, including
+        its document. Without this, copy.copy() would use
+        __getstate__(), which leaves out the document for pickling.
+        """
+        cls = self.__class__
+        result = cls.__new__(cls)
+        # Populate __dict__ directly to bypass SBOLObject.__setattr__
+        result.__dict__.update(self.__dict__)
+        return result
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Identified:
+        """Structurally copy this object and the objects it owns.
+
+        The document is only carried over if it is itself part of the
+        copy (i.e. a Document is being deep copied), so copying an
+        object never copies the document it lives in. The rdflib terms
+        in the property stores are immutable and are shared with the
+        copy rather than duplicated.
+        """
+        cls = self.__class__
+        result = cls.__new__(cls)
+        memo[id(self)] = result
+        # Populate __dict__ directly to bypass SBOLObject.__setattr__
+        result_dict = result.__dict__
+        for name, value in self.__dict__.items():
+            if name == '_document':
+                value = memo.get(id(value))
+            elif name == '_properties':
+                value = defaultdict(list, {uri: list(items)
+                                           for uri, items in value.items()})
+            elif name == '_owned_objects':
+                value = defaultdict(list, {uri: [copy.deepcopy(child, memo)
+                                                 for child in children]
+                                           for uri, children in value.items()})
+            elif isinstance(value, Property):
+                # Properties only hold their configuration and a pointer
+                # to their owner, so a shallow copy re-pointed at the
+                # new owner is sufficient.
+                prop_class = value.__class__
+                prop = prop_class.__new__(prop_class)
+                prop.__dict__.update(value.__dict__)
+                prop.property_owner = result
+                memo[id(value)] = prop
+                value = prop
+            else:
+                value = copy.deepcopy(value, memo)
+            result_dict[name] = value
+        return result
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle this object and the objects it owns.
+
+        As with deep copying, pickling an object never pickles the
+        document it lives in. A Document restores the document of its
+        objects when it is itself unpickled. Shallow copies keep the
+        document, see __copy__().
+        """
+        state = self.__dict__.copy()
+        state['_document'] = None
+        # The cached content hash is only valid in this process, see
+        # content_hash
+        state.pop('_hash_cache', None)
+        return state
+
     @staticmethod
     def _is_valid_display_id(display_id: str) -> bool:
         # is_valid_display_id was made public to support the public
@@ -157,17 +226,24 @@ class Identified(SBOLObject):
 
     @document.setter
     def document(self, value):
-        self._document = value
-        # Now assign document to the whole object hierarchy
-        # rooted here
-        # Note: we prevent an infinite loop by assigning to
-        # `_document` instead of recursively entering this
+        # Assign document to the whole object hierarchy rooted here
+        # Note: we prevent an infinite loop by calling
+        # `_set_document` instead of recursively entering this
         # method by assigning to `document`.
-
         def assign_document(x: Identified):
-            x._document = value
+            x._set_document(value)
         self.traverse(assign_document)
 
+    def _set_document(self, value: Union[Document, None]) -> None:
+        """Set the document of this object only, keeping the indexes
+        of the old and new documents up to date.
+        """
+        if self._document is not None and self._document is not value:
+            self._document._unindex_object(self)
+        self._document = value
+        if value is not None:
+            value._index_object(self)
+
     def _validate_display_id(self, report: ValidationReport) -> None:
         if self.identity_is_url():
             if (self.display_id is not None and
@@ -192,6 +268,9 @@ class Identified(SBOLObject):
             raise ValueError(msg)
         self._identity = identity
         self._display_id = display_id
+        self._content_changed()
+        if self._document is not None:
+            self._document._index_object(self)
         # Now cycle through any owned objects and update their identities
         for _, objects in self._owned_objects.items():
             for child in objects:
@@ -237,6 +316,25 @@ class Identified(SBOLObject):
             self._properties[uri] = []
         elif uri in self._owned_objects:
             self._owned_objects[uri] = []
+        self._content_changed()
+        if self._document is not None:
+            self._document._object_changed(self)
+
+    @property
+    def content_hash(self) -> str:
+        """A fingerprint of the contents of this object and the objects
+        it owns, as a SHA-256 hex digest. Objects have the same content
+        hash if they have the same identity, the same property values,
+        regardless of order, and own objects with the same content
+        hashes. The hash is cached, and is computed again only for the
+        objects that have changed since it was last requested.
+
+        Changes are tracked as for incremental validation: when
+        properties are set, and when items are added to, replaced in
+        or deleted from list properties. Changes made directly to the
+        internal property storage are not detected.
+        """
+        return _content_hash(self, SBOLObject._content_generation)
 
     def _validate_properties(self, report: ValidationReport) -> None:
         """Call validate on all the properties. Pass the name of the
@@ -252,28 +350,41 @@ class Identified(SBOLObject):
         # Do validations for Identified
         self._validate_display_id(report)
         self._validate_properties(report)
-        # Validate all owned objects
+        # Validate all owned objects, unless the report is full
         for object_list in self._owned_objects.values():
             for obj in object_list:
+                if report.limit_reached:
+                    return report
                 obj.validate(report)
         return report
 
-    def serialize(self, graph: rdflib.Graph):
+    def triples(self) -> typing.Iterator[tuple[rdflib.URIRef, rdflib.URIRef, rdflib.term.Node]]:
+        """Generate the RDF triples of this object and of all the
+        objects it owns.
+
+        As in an RDF graph, a value that appears more than once in a
+        property generates a single triple.
+        """
         identity = rdflib.URIRef(self.identity)
-        # graph.add((identity, rdflib.RDF.type, rdflib.URIRef(self.type_uri)))
         for prop, items in self._properties.items():
             if not items:
                 continue
             rdf_prop = rdflib.URIRef(prop)
+            if len(items) > 1:
+                items = dict.fromkeys(items)
             for item in items:
-                graph.add((identity, rdf_prop, item))
+                yield identity, rdf_prop, item
         for prop, items in self._owned_objects.items():
             if not items:
                 continue
             rdf_prop = rdflib.URIRef(prop)
             for item in items:
-                graph.add((identity, rdf_prop, rdflib.URIRef(item.identity)))
-                item.serialize(graph)
+                yield identity, rdf_prop, rdflib.URIRef(item.identity)
+                yield from item.triples()
+
+    def serialize(self, graph: rdflib.Graph):
+        for triple in self.triples():
+            graph.add(triple)
 
     def accept(self, visitor: Any) -> Any:
         """
@@ -303,4 +414,35 @@ class Identified(SBOLObject):
         for children in self._owned_objects.values():
             for child in children:
                 child.remove_from_document()
-        self._document = None
+        self._set_document(None)
+
+
+def _content_hash(obj: Identified, generation: int) -> str:
+    # The content hash of obj, see Identified.content_hash. Attributes
+    # are read from __dict__ to bypass SBOLObject.__getattribute__.
+    #
+    # The cache holds the hash, the version of the object and the
+    # generation it was computed or last checked at, and the
+    # (property, hash) of each owned object. It is still valid if
+    # nothing has changed since then, or if neither the object nor any
+    # of the objects it owns have changed.
+    attributes = obj.__dict__
+    cached = attributes.get('_hash_cache')
+    if cached is not None and cached[2] == generation:
+        return cached[0]
+    version = attributes.get('_content_version', 0)
+    children = tuple((uri, _content_hash(child, generation))
+                     for uri, objects in attributes['_owned_objects'].items()
+                     for child in objects)
+    if cached is not None and cached[1] == version and cached[3] == children:
+        result = cached[0]
+    else:
+        lines = [f'<{uri}> {_term_text(item)}'
+                 for uri, items in attributes['_properties'].items()
+                 for item in items]
+        lines.extend(f'<{uri}> #{child_hash} .\n' for uri, child_hash in children)
+        lines.sort()
+        lines.insert(0, f'<{attributes["_identity"]}>\n')
+        result = hashlib.sha256(''.join(lines).encode()).hexdigest()
+    attributes['_hash_cache'] = (result, version, generation, children)
+    return result
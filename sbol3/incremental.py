@@ -0,0 +1,241 @@
+"""Incremental validation for Document.validate(incremental=True).
+
+Validating a document checks each TopLevel object tree on its own,
+then checks the document against the SBOL3 SHACL shapes. A SHACL check
+of a tree looks at the tree itself and at the types of the objects it
+refers to, so its results only change when the tree changes or when
+the type of an object it refers to changes.
+
+The IncrementalValidator keeps the results of each tree from one
+validation to the next. Objects report changes to their properties to
+their document, see Document._object_changed(), and only the trees
+that have changed, or that refer to objects whose types have changed,
+are validated again.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import rdflib
+
+from .constants import RDF_TYPE
+from .shacl import get_shapes
+from .validation import ValidationError, ValidationIssue, ValidationReport, ValidationWarning
+
+Issues = List[ValidationIssue]
+
+
+class _ObjectTypes:
+    """The rdf:type values of the objects of a document, looked up by
+    URIRef as the compiled SHACL engine does.
+    """
+
+    def __init__(self, document):
+        self.identity_index = document._identity_index
+        self.orphans = {orphan.identity: orphan for orphan in document.orphans}
+
+    def get(self, node: rdflib.term.Node, default=None):
+        identity = str(node)
+        obj = self.identity_index.get(identity) or self.orphans.get(identity)
+        if obj is None:
+            return default
+        return obj._properties.get(RDF_TYPE, default)
+
+
+class _TreeResults:
+    """The validation results of one TopLevel object tree, and what
+    they depend on.
+    """
+
+    def __init__(self, top_level):
+        self.top_level = top_level
+        # The objects in the tree, and the rdf:type values of each
+        self.objects = []
+        self.types: Dict[rdflib.URIRef, Tuple[rdflib.term.Node, ...]] = {}
+        # The objects outside the tree that the tree refers to
+        self.references = set()
+        pending = [top_level]
+        while pending:
+            obj = pending.pop()
+            self.objects.append(obj)
+            self.types[rdflib.URIRef(obj.identity)] = tuple(obj._properties.get(RDF_TYPE, ()))
+            for children in obj._owned_objects.values():
+                pending.extend(children)
+        for obj in self.objects:
+            for prop, items in obj._properties.items():
+                if prop == RDF_TYPE:
+                    continue
+                for item in items:
+                    if isinstance(item, rdflib.URIRef) and item not in self.types:
+                        self.references.add(item)
+        # Results of TopLevel.validate()
+        self.python_issues: Issues = []
+        # Results of SHACL validation
+        self.shacl_issues: Issues = []
+
+
+class IncrementalValidator:
+    """Validates a document, re-using the results of the TopLevel
+    trees that have not changed since it last validated the document.
+
+    Objects and SHACL shapes are assumed to validate as pySBOL3's own
+    do: an object's validate() method looks only at the object and the
+    objects it owns.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.results: Dict[object, _TreeResults] = {}
+        # The trees that refer to each object
+        self.referenced_by: Dict[rdflib.URIRef, Dict[object, None]] = {}
+        # The TopLevel of each object in a tree with results
+        self.tree_of: Dict[object, object] = {}
+        # TopLevels whose trees have changed
+        self.dirty: Dict[object, None] = {}
+        # Everything else the results depend on
+        self.context = None
+
+    def object_changed(self, obj) -> None:
+        """Record that an object has changed.
+
+        Objects that are not yet in a tree with results are ignored:
+        they have been added since the last validation, so the tree
+        they were added to is already due to be validated.
+        """
+        top_level = self.tree_of.get(obj)
+        if top_level is not None:
+            self.dirty[top_level] = None
+
+    def _forget(self, top_level) -> Optional[_TreeResults]:
+        results = self.results.pop(top_level, None)
+        if results is not None:
+            for obj in results.objects:
+                if self.tree_of.get(obj) is top_level:
+                    del self.tree_of[obj]
+            for reference in results.references:
+                self.referenced_by[reference].pop(top_level, None)
+        return results
+
+    def _remember(self, top_level, results: _TreeResults) -> None:
+        self.results[top_level] = results
+        for obj in results.objects:
+            self.tree_of[obj] = top_level
+        for reference in results.references:
+            self.referenced_by.setdefault(reference, {})[top_level] = None
+
+    def validate(self, report: Optional[ValidationReport] = None) -> ValidationReport:
+        """Validate the document, as Document.validate() does.
+
+        :param report: The ValidationReport to be populated
+        :return: report
+        """
+        if report is None:
+            report = ValidationReport()
+        document = self.document
+        compiled = get_shapes().compiled()
+        other_rdf = document._other_rdf
+        context = (compiled, tuple(document._namespaces.items()), id(other_rdf), len(other_rdf))
+        if context != self.context:
+            # Results of every tree depend on these
+            for top_level in list(self.results):
+                self._forget(top_level)
+            self.context = context
+        dirty = self.dirty
+        self.dirty = {}
+        # Identities whose types have changed, including objects that
+        # have been added or removed
+        changed = set()
+        current = dict.fromkeys(document.objects)
+        for top_level in list(self.results):
+            if top_level not in current:
+                changed.update(self._forget(top_level).types)
+        stale = [top_level for top_level in current
+                 if top_level in dirty or top_level not in self.results]
+        for top_level in stale:
+            old = self._forget(top_level)
+            new = _TreeResults(top_level)
+            if old is None:
+                changed.update(new.types)
+            else:
+                changed.update(identity for identity in old.types.keys() | new.types.keys()
+                               if old.types.get(identity) != new.types.get(identity))
+            top_level.validate(_IssueList(new.python_issues))
+            self._remember(top_level, new)
+        # Trees that refer to an object whose types have changed need
+        # their SHACL results refreshed
+        recheck = dict.fromkeys(stale)
+        for identity in changed:
+            recheck.update(self.referenced_by.get(identity, {}))
+        object_types = _ObjectTypes(document)
+        if recheck:
+            _validate_trees_shacl(compiled, document, [self.results[top_level] for top_level in recheck],
+                                  object_types)
+        return _assemble_report(compiled, document, [self.results[top_level] for top_level in current],
+                                object_types, report)
+
+
+def _validate_trees_shacl(compiled, document, trees: List[_TreeResults],
+                          object_types: _ObjectTypes) -> None:
+    """Validate TopLevel trees against compiled SHACL shapes, replacing
+    the SHACL results of each tree.
+    """
+    shacl_report = compiled.validate([tree.top_level for tree in trees], document._other_rdf,
+                                     document._namespaces, ValidationReport(),
+                                     object_types=object_types, other_subjects=())
+    tree_of_focus = {}
+    for tree in trees:
+        tree.shacl_issues = []
+        tree_of_focus.update(dict.fromkeys(tree.types, tree))
+    for issue in shacl_report:
+        tree_of_focus[issue.object_id].shacl_issues.append(issue)
+
+
+def _assemble_report(compiled, document, trees: List[_TreeResults], object_types: _ObjectTypes,
+                     report: ValidationReport) -> ValidationReport:
+    """Fill a report from the results of the document's TopLevel
+    trees, in the same order as a full validation with the compiled
+    SHACL engine.
+
+    Orphans and other non-SBOL subjects are not tracked, and are
+    usually few, so they are validated here every time.
+    """
+    other_rdf = document._other_rdf
+    orphan_identities = {rdflib.URIRef(orphan.identity) for orphan in document.orphans}
+    other_subjects = {subject for subject in other_rdf.subjects()
+                      if object_types.get(subject) is None}
+    other_report = ValidationReport()
+    if document.orphans or other_subjects:
+        compiled.validate(document.orphans, other_rdf, document._namespaces, other_report,
+                          object_types=object_types, other_subjects=other_subjects)
+    for tree in trees:
+        _add_issues(report, tree.python_issues)
+    _add_issues(report, (issue for issue in other_report
+                         if issue.object_id in orphan_identities))
+    for tree in trees:
+        _add_issues(report, tree.shacl_issues)
+    _add_issues(report, (issue for issue in other_report
+                         if issue.object_id not in orphan_identities))
+    return report
+
+
+class _IssueList(ValidationReport):
+    """A ValidationReport that collects errors and warnings in a
+    single list, in the order they are reported.
+    """
+
+    def __init__(self, issues: Issues, max_errors: Optional[int] = None):
+        super().__init__(max_errors)
+        self.issues = issues
+
+    def _add(self, severity, object_id, rule_id, message):
+        issue_class = ValidationError if severity == self._ERROR else ValidationWarning
+        self.issues.append(issue_class(object_id, rule_id, message))
+
+
+def _add_issues(report: ValidationReport, issues: Iterable[ValidationIssue]) -> None:
+    for issue in issues:
+        if report.limit_reached:
+            break
+        if isinstance(issue, ValidationWarning):
+            report.addWarning(issue.object_id, issue.rule_id, issue.message)
+        else:
+            report.addError(issue.object_id, issue.rule_id, issue.message)
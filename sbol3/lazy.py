@@ -0,0 +1,171 @@
+"""Lazy loading for Document.read(lazy=True).
+
+When a document is read lazily, its triples are grouped by subject as
+usual, but objects are not built. Instead the subjects are divided
+into TopLevel object trees, using a prototype object of each type to
+tell which types are TopLevels and which properties own objects. Each
+tree is built when it is first needed, by the same code that builds
+the objects of a document that is read eagerly.
+"""
+
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import rdflib
+
+from . import parsing
+from .constants import RDF_TYPE, SBOL_DISPLAY_ID
+from .identified import Identified, extract_display_id
+from .object import SBOLObject
+from .toplevel import TopLevel
+
+# Triples grouped by subject, see sbol3.parsing.group_triples()
+Subjects = Dict[rdflib.term.Node, List[Tuple[str, rdflib.term.Node, rdflib.term.Node]]]
+
+
+class _Kind:
+    """What the prototype of a list of rdf:types tells about the
+    objects with those types.
+    """
+
+    def __init__(self, prototype: Optional[Identified]):
+        self.is_sbol = prototype is not None
+        self.is_top_level = isinstance(prototype, TopLevel)
+        self.owned_properties: Set[str] = set(prototype._owned_objects) if prototype is not None else set()
+
+
+class LazyTrees:
+    """The TopLevel object trees of a document that have not been
+    built yet, and the triples of their objects.
+    """
+
+    def __init__(self, document, subjects: Subjects, trees: Dict[str, List[rdflib.term.Node]]):
+        self.document = document
+        self.subjects = subjects
+        # The subjects of each pending tree, by TopLevel identity, in
+        # the order the TopLevels were read
+        self.trees = trees
+        # The TopLevel identity of each object in a pending tree
+        self.tree_of: Dict[str, str] = {}
+        # The identities of the objects in pending trees that may have
+        # each display_id
+        self.display_ids: Dict[str, List[str]] = {}
+        for top_identity, nodes in trees.items():
+            for node in nodes:
+                identity = str(node)
+                self.tree_of[identity] = top_identity
+                display_ids = {str(o) for str_p, _, o in subjects[node] if str_p == SBOL_DISPLAY_ID}
+                try:
+                    display_ids.add(extract_display_id(identity))
+                except ValueError:
+                    pass
+                for display_id in display_ids:
+                    if display_id:
+                        self.display_ids.setdefault(display_id, []).append(identity)
+
+    def __len__(self):
+        return len(self.trees)
+
+    @staticmethod
+    def plan(document, subjects: Subjects) -> Optional[Tuple[Dict[str, List[rdflib.term.Node]],
+                                                             List[rdflib.term.Node], List[rdflib.term.Node]]]:
+        """Divide the subjects of a document into TopLevel object trees.
+
+        :return: The subjects of each tree by TopLevel identity, the
+                 other SBOL subjects, which are built at once as they
+                 are orphans, and the non-SBOL subjects. None if the
+                 objects are not arranged in separate trees, in which
+                 case the document is read eagerly, as eager reading
+                 handles or reports such files.
+        """
+        kinds: Dict[Tuple[str, ...], _Kind] = {}
+        kind_of: Dict[rdflib.term.Node, _Kind] = {}
+        non_sbol = []
+        for subject, predicate_objects in subjects.items():
+            types = tuple(str(o) for str_p, _, o in predicate_objects if str_p == RDF_TYPE)
+            if not types:
+                non_sbol.append(subject)
+                continue
+            kind = kinds.get(types)
+            if kind is None:
+                kind = kinds[types] = _Kind(parsing.parse_schema(document, str(subject), types).prototype)
+            if not kind.is_sbol:
+                non_sbol.append(subject)
+                continue
+            identity = str(subject)
+            if not isinstance(subject, rdflib.URIRef) or SBOLObject._make_identity(identity) != identity:
+                return None
+            kind_of[subject] = kind
+        trees: Dict[str, List[rdflib.term.Node]] = {}
+        owner: Dict[rdflib.term.Node, rdflib.term.Node] = {}
+        for subject, kind in kind_of.items():
+            for str_p, _, o in subjects[subject]:
+                if str_p in kind.owned_properties:
+                    child_kind = kind_of.get(o)
+                    if child_kind is None or child_kind.is_top_level or o in owner:
+                        return None
+                    owner[o] = subject
+        for subject, kind in kind_of.items():
+            if not kind.is_top_level:
+                continue
+            nodes = [subject]
+            for node in nodes:
+                kind = kind_of[node]
+                nodes.extend(o for str_p, _, o in subjects[node] if str_p in kind.owned_properties)
+            trees[str(subject)] = nodes
+        in_trees = {node for nodes in trees.values() for node in nodes}
+        orphans = [subject for subject in kind_of if subject not in in_trees]
+        return trees, orphans, non_sbol
+
+    def materialize(self, top_identity: str) -> Optional[TopLevel]:
+        """Build a pending tree, and add it to the document.
+
+        :param top_identity: The identity of the TopLevel of the tree
+        :return: The TopLevel, or None if the tree is not pending
+        """
+        nodes = self.trees.pop(top_identity, None)
+        if nodes is None:
+            return None
+        group = {}
+        for node in nodes:
+            del self.tree_of[str(node)]
+            group[node] = self.subjects.pop(node)
+        document = self.document
+        objects = parsing.parse_subjects(document, group, document._other_rdf)
+        top_level = objects[top_identity]
+        document._objects.append(top_level)
+        top_level.traverse(document._index_object)
+        if not self.trees:
+            document._lazy = None
+        return top_level
+
+    def materialize_identity(self, identity: str) -> None:
+        """Build the pending tree of the object with an identity, if
+        there is one.
+        """
+        top_identity = self.tree_of.get(identity)
+        if top_identity is not None:
+            self.materialize(top_identity)
+
+    def materialize_matching(self, search_string: str) -> None:
+        """Build the pending trees of the objects that may have an
+        identity or display_id, see Document.find().
+        """
+        self.materialize_identity(search_string)
+        for identity in self.display_ids.pop(search_string, ()):
+            self.materialize_identity(identity)
+
+    def materialize_all(self) -> None:
+        """Build all the pending trees, in the order they were read."""
+        for top_identity in list(self.trees):
+            self.materialize(top_identity)
+
+    def __iter__(self) -> Iterator[TopLevel]:
+        """Build the pending trees one at a time, in the order they
+        were read, yielding their TopLevels.
+        """
+        # Trees built while the caller uses the previous TopLevels
+        # are no longer pending, and are skipped
+        for top_identity in list(self.trees):
+            top_level = self.materialize(top_identity)
+            if top_level is not None:
+                yield top_level
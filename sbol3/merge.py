@@ -0,0 +1,89 @@
+"""Merging documents, see Document.merge()."""
+
+import itertools
+from typing import Dict, Iterable, List, Tuple
+
+from .identified import Identified
+
+# The ways Document.merge() can handle conflicting objects
+CONFLICT_MODES = ('error', 'keep', 'replace')
+
+
+def merge(document, documents: Iterable, on_conflict: str = 'error') -> List[str]:
+    """Merge other documents into a document, see Document.merge().
+
+    :param document: The document to merge into
+    :param documents: The documents to merge into document
+    :param on_conflict: 'error', 'keep' or 'replace'
+    :return: The identities of the conflicting objects
+    """
+    if on_conflict not in CONFLICT_MODES:
+        raise ValueError(f'Unknown conflict mode: {on_conflict}')
+    documents = [other for other in documents if other is not document]
+    top_levels, orphans, conflicts = _choose(document, documents, on_conflict)
+    if conflicts and on_conflict == 'error':
+        raise ValueError('Conflicting objects: ' + ', '.join(conflicts))
+    _move(document, documents, top_levels, orphans)
+    for other in documents:
+        document._other_rdf += other._other_rdf
+        _merge_namespaces(document, other)
+    return list(conflicts)
+
+
+def _choose(document, documents: List,
+            on_conflict: str) -> Tuple[Dict[str, Identified], Dict[str, Identified], Dict[str, None]]:
+    # The TopLevels and orphans that will be in the document, by
+    # identity, and the conflicting identities as an ordered set
+    top_levels: Dict[str, Identified] = {obj.identity: obj for obj in document.objects}
+    orphans: Dict[str, Identified] = {obj.identity: obj for obj in document.orphans}
+    conflicts: Dict[str, None] = {}
+    for other in documents:
+        for chosen, objects in ((top_levels, other.objects), (orphans, other.orphans)):
+            for obj in objects:
+                identity = obj.identity
+                current = chosen.get(identity)
+                if current is None:
+                    current = document._identity_index.get(identity)
+                if current is None:
+                    chosen[identity] = obj
+                elif current.content_hash != obj.content_hash:
+                    conflicts[identity] = None
+                    if on_conflict == 'replace' and identity in chosen:
+                        chosen[identity] = obj
+    return top_levels, orphans, conflicts
+
+
+def _move(document, documents: List, top_levels: Dict[str, Identified],
+          orphans: Dict[str, Identified]) -> None:
+    # Remove the replaced objects from the document and the merged
+    # objects from their documents, in a single pass over each list
+    kept = {id(obj) for chosen in (top_levels, orphans) for obj in chosen.values()}
+    for objects in (document.objects, document.orphans):
+        replaced = [obj for obj in objects if id(obj) not in kept]
+        if replaced:
+            objects[:] = [obj for obj in objects if id(obj) in kept]
+            for obj in replaced:
+                obj.remove_from_document()
+    present = {id(obj) for obj in itertools.chain(document.objects, document.orphans)}
+    for other in documents:
+        for objects in (other.objects, other.orphans):
+            objects[:] = [obj for obj in objects if id(obj) not in kept]
+    merged = [obj for obj in top_levels.values() if id(obj) not in present]
+    for obj in merged:
+        obj.remove_from_document()
+    document._add_all(merged)
+    # Orphans are not indexed, as when a document is read
+    for obj in orphans.values():
+        if id(obj) not in present:
+            obj._document = document
+            document.orphans.append(obj)
+
+
+def _merge_namespaces(document, other) -> None:
+    # Bind the prefixes of other whose prefix and namespace are both
+    # unbound in document
+    bound = set(document._namespaces.values())
+    for prefix, uri in other._namespaces.items():
+        if prefix not in document._namespaces and uri not in bound:
+            document._namespaces[prefix] = uri
+            bound.add(uri)
@@ -0,0 +1,229 @@
+"""Native reading and writing of N-Triples, without building an
+rdflib Graph.
+
+rdflib's parsers load every triple into a Graph, with its in-memory
+store and indexes, before pySBOL3 copies the triples into objects.
+Likewise, serializing through rdflib requires first copying every
+triple into a Graph and then holding the whole output in memory. The
+functions here tokenize N-Triples line by line into rdflib terms, and
+format rdflib terms into N-Triples lines that are streamed to a file.
+"""
+
+import heapq
+import re
+import tempfile
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+
+import rdflib
+
+Triple = Tuple[rdflib.term.Node, rdflib.URIRef, rdflib.term.Node]
+
+# A complete N-Triples statement: subject, predicate, object, and the
+# terminating '.', with an optional trailing comment. Blank node labels
+# may contain '.', but not as their last character.
+_IRI = r'<([^<>"\s]*)>'
+_BNODE = r'_:([A-Za-z0-9_:](?:[-A-Za-z0-9_:.]*[-A-Za-z0-9_:])?)'
+_LITERAL = r'"([^"\\]*(?:\\.[^"\\]*)*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^' + _IRI + r')?'
+_STATEMENT = re.compile(r'[ \t]*(?:' + _IRI + '|' + _BNODE + r')[ \t]*'
+                        + _IRI + r'[ \t]*'
+                        + '(?:' + _IRI + '|' + _BNODE + '|' + _LITERAL + ')'
+                        + r'[ \t]*\.[ \t]*(?:#.*)?$')
+_BLANK_OR_COMMENT = re.compile(r'[ \t]*(?:#.*)?$')
+_ESCAPE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+_ECHARS = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f',
+           '"': '"', "'": "'", '\\': '\\'}
+
+
+def _unescape_match(match: re.Match) -> str:
+    short, long, char = match.groups()
+    if char is None:
+        return chr(int(short or long, 16))
+    try:
+        return _ECHARS[char]
+    except KeyError:
+        raise ValueError(f'Invalid escape sequence \\{char}')
+
+
+def unescape(text: str) -> str:
+    """Replace the character escapes (ECHAR) and unicode escapes
+    (UCHAR) of N-Triples with the characters they represent.
+    """
+    if '\\' not in text:
+        return text
+    return _ESCAPE.sub(_unescape_match, text)
+
+
+def parse_ntriples(lines: Iterable[str]) -> Iterator[Triple]:
+    """Parse N-Triples, yielding one rdflib triple per statement.
+
+    Lines are consumed lazily, so `lines` can be an open file. Blank
+    node labels are mapped to new blank nodes specific to this parse,
+    as rdflib does.
+
+    :param lines: N-Triples text, one statement per line
+    :return: An iterator over (subject, predicate, object) tuples
+    :raises ValueError: If a line is not a valid N-Triples statement
+    """
+    uri_refs: Dict[str, rdflib.URIRef] = {}
+    bnodes: Dict[str, rdflib.BNode] = {}
+
+    def uri_ref(iri: str) -> rdflib.URIRef:
+        # Identities and predicates recur many times, so share a
+        # single URIRef per distinct IRI
+        try:
+            return uri_refs[iri]
+        except KeyError:
+            result = uri_refs[iri] = rdflib.URIRef(unescape(iri))
+            return result
+
+    def bnode(label: str) -> rdflib.BNode:
+        try:
+            return bnodes[label]
+        except KeyError:
+            result = bnodes[label] = rdflib.BNode()
+            return result
+
+    for line_number, line in enumerate(lines, start=1):
+        match = _STATEMENT.match(line)
+        if match is None:
+            if _BLANK_OR_COMMENT.match(line):
+                continue
+            raise ValueError(f'Invalid N-Triples statement at line {line_number}: {line.strip()}')
+        (s_iri, s_label, p_iri, o_iri, o_label,
+         lexical, language, datatype) = match.groups()
+        subject = uri_ref(s_iri) if s_label is None else bnode(s_label)
+        if o_iri is not None:
+            obj = uri_ref(o_iri)
+        elif o_label is not None:
+            obj = bnode(o_label)
+        else:
+            try:
+                lexical = unescape(lexical)
+            except ValueError as e:
+                raise ValueError(f'{e} at line {line_number}')
+            if datatype is not None:
+                obj = rdflib.Literal(lexical, datatype=uri_ref(datatype))
+            else:
+                obj = rdflib.Literal(lexical, lang=language)
+        yield subject, uri_ref(p_iri), obj
+
+
+# The number of lines sorted in memory at a time when writing sorted
+# N-Triples. Larger outputs are sorted in runs that are spilled to
+# temporary files and then merged.
+SORT_BUFFER_LINES = 500000
+
+
+def _quote_literal(literal: rdflib.Literal) -> str:
+    # Format a literal exactly as rdflib's N-Triples serializer does
+    encoded = '"%s"' % literal.replace('\\', '\\\\').replace('\n', '\\n').replace(
+        '"', '\\"').replace('\r', '\\r')
+    if literal.language:
+        if literal.datatype:
+            raise ValueError(f'Literal {literal!r} has both a datatype and a language')
+        return f'{encoded}@{literal.language}'
+    if literal.datatype:
+        return f'{encoded}^^<{literal.datatype}>'
+    return encoded
+
+
+def _term_text(term: rdflib.term.Node) -> str:
+    # Format a value of a property store as the end of an N-Triples
+    # line. Blank node labels are arbitrary, so all blank nodes are
+    # formatted as the same node.
+    if isinstance(term, rdflib.Literal):
+        return f'{_quote_literal(term)} .\n'
+    if isinstance(term, rdflib.BNode):
+        return '_:blank .\n'
+    return f'<{term}> .\n'
+
+
+def ntriples_lines(triples: Iterable[Triple]) -> Iterator[str]:
+    """Format triples as N-Triples lines, each ending in a newline.
+
+    The output is identical to the lines rdflib's N-Triples serializer
+    produces for the same triples.
+
+    :param triples: rdflib (subject, predicate, object) tuples
+    :return: An iterator over the formatted lines
+    """
+    # Subjects and predicates recur many times, so format each
+    # distinct IRI or blank node once
+    formatted: Dict[rdflib.term.Node, str] = {}
+    for s, p, o in triples:
+        try:
+            s_text = formatted[s]
+        except KeyError:
+            s_text = formatted[s] = s.n3()
+        try:
+            p_text = formatted[p]
+        except KeyError:
+            p_text = formatted[p] = p.n3()
+        if isinstance(o, rdflib.Literal):
+            o_text = _quote_literal(o)
+        else:
+            try:
+                o_text = formatted[o]
+            except KeyError:
+                o_text = formatted[o] = o.n3()
+        yield f'{s_text} {p_text} {o_text} .\n'
+
+
+def _spill(lines: List[str]) -> TextIO:
+    # Write a sorted run of lines to a temporary file and rewind it
+    run = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+    run.writelines(lines)
+    run.seek(0)
+    return run
+
+
+def sort_lines(lines: Iterable[str], buffer_lines: int = SORT_BUFFER_LINES) -> Iterator[str]:
+    """Sort lines and drop duplicates, holding at most `buffer_lines`
+    lines in memory at a time.
+
+    If there are more lines than fit in the buffer, sorted runs are
+    written to temporary files and merged (an external merge sort).
+
+    :param lines: Lines to sort, each ending in a newline
+    :param buffer_lines: The maximum number of lines to sort in memory
+    :return: An iterator over the distinct lines, in sorted order
+    """
+    runs: List[TextIO] = []
+    buffer: List[str] = []
+    try:
+        for line in lines:
+            buffer.append(line)
+            if len(buffer) >= buffer_lines:
+                buffer.sort()
+                runs.append(_spill(buffer))
+                buffer = []
+        buffer.sort()
+        previous = None
+        for line in heapq.merge(*runs, buffer) if runs else buffer:
+            if line != previous:
+                yield line
+                previous = line
+    finally:
+        for run in runs:
+            run.close()
+
+
+def write_ntriples(triples: Iterable[Triple], stream: TextIO, sort: bool = False,
+                   buffer_lines: int = SORT_BUFFER_LINES) -> None:
+    """Write triples to a text stream as N-Triples.
+
+    Lines are written as they are formatted. When `sort` is true the
+    lines are sorted and duplicates are dropped, as for the
+    `SORTED_NTRIPLES` format, using at most `buffer_lines` lines of
+    memory.
+
+    :param triples: rdflib (subject, predicate, object) tuples
+    :param stream: A text stream opened for writing
+    :param sort: Whether to write the lines in sorted order
+    :param buffer_lines: The maximum number of lines to sort in memory
+    :return: Nothing
+    """
+    lines = ntriples_lines(triples)
+    if sort:
+        lines = sort_lines(lines, buffer_lines)
+    stream.writelines(lines)
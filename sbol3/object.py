@@ -11,6 +11,12 @@ from . import *
 
 class SBOLObject:
 
+    # Incremented on every change to the contents of any object, so
+    # that content hashes can be re-used without checking the objects
+    # for changes when nothing at all has changed. See
+    # Identified.content_hash.
+    _content_generation = 0
+
     def __init__(self, name: str) -> None:
         self._properties = defaultdict(list)
         self._owned_objects = defaultdict(list)
@@ -36,6 +42,12 @@ class SBOLObject:
             result = result.get()
         return result
 
+    def _content_changed(self) -> None:
+        # Record a change to the properties, owned objects or identity
+        # of this object, see Identified.content_hash
+        self.__dict__['_content_version'] = self.__dict__.get('_content_version', 0) + 1
+        SBOLObject._content_generation += 1
+
     @staticmethod
     def _is_url(name: str) -> bool:
         parsed = urlparse(name)
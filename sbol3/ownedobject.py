@@ -51,6 +51,11 @@ class OwnedObjectPropertyMixin:
                 raise ValueError(f'Duplicate URI: {new_url}')
         item._update_identity(new_url, new_display_id)
 
+    def item_removed(self, item: Any) -> None:
+        # A child that is no longer owned leaves the document
+        if hasattr(item, 'document'):
+            item.document = None
+
     def validate_type_constraint(self, name: str, report: ValidationReport):
         if not self.type_constraint:
             return
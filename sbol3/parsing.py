@@ -0,0 +1,422 @@
+"""Reading documents.
+
+The triples of a file are read in a single pass, grouping them by
+subject, and are then turned into objects one subject at a time.
+N-Triples are tokenized natively, see sbol3.ntriples, while other
+formats are parsed into an rdflib Graph first. The objects of a
+document can be built eagerly, or lazily, see sbol3.lazy, and some
+types of objects can be left out, see sbol3.type_filter.
+"""
+
+import io
+import logging
+import os
+import time
+# import typing for typing.Sequence, which we don't want to confuse
+# with sbol3.Sequence
+import typing as pytyping
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import rdflib
+
+from .constants import (NTRIPLES, RDF_TYPE, SBOL3_NS, SBOL_IDENTIFIED, SBOL_NAMESPACE, SBOL_TOP_LEVEL,
+                        SORTED_NTRIPLES)
+from .custom import CustomIdentified, CustomTopLevel
+from .error import SBOLError
+from .identified import Identified
+from .lazy import LazyTrees, Subjects
+from .ntriples import parse_ntriples
+from .object import SBOLObject
+from .property_base import SingletonProperty
+from .schema import ParseSchema
+from .toplevel import TopLevel
+from .type_filter import TypeFilter
+
+# rdflib format names that are read with the native N-Triples parser
+NTRIPLES_FORMATS = {'nt', 'nt11', 'ntriples'}
+
+# The builders of extension objects whose rdf:types have no builder,
+# by SBOL type, see section 6.11 of the spec
+_EXTENSION_TYPES = {
+    SBOL_IDENTIFIED: CustomIdentified,
+    SBOL_TOP_LEVEL: CustomTopLevel
+}
+
+
+def is_binary(stream: pytyping.IO) -> bool:
+    """Whether a file object reads and writes bytes rather than str."""
+    if isinstance(stream, io.TextIOBase):
+        return False
+    if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    return 'b' in getattr(stream, 'mode', '')
+
+
+def record_timing(document, phase: str, start: float) -> float:
+    """Record the duration of a load phase that began at `start`
+    in the document's `parse_timings`, returning the end time of the
+    phase.
+    """
+    now = time.perf_counter()
+    document.parse_timings[phase] = now - start
+    document.logger.debug('Load phase "%s" took %.3f seconds', phase, now - start)
+    return now
+
+
+def read_location(document, location: str, file_format: str, lazy: bool = False,
+                  type_filter: Optional[TypeFilter] = None) -> None:
+    """Read a document from a path or URL, see Document.read()."""
+    if file_format == SORTED_NTRIPLES:
+        file_format = NTRIPLES
+    document.parse_timings = {}
+    if file_format in NTRIPLES_FORMATS and os.path.isfile(location):
+        # Stream local files. URLs are fetched by rdflib.
+        with open(location, encoding='utf-8') as infile:
+            return parse_lines(document, infile, lazy, type_filter)
+    start = time.perf_counter()
+    graph = rdflib.Graph()
+    graph.parse(location, format=file_format)
+    record_timing(document, 'parse rdf', start)
+    return parse_graph(document, graph, lazy, type_filter)
+
+
+def read_stream(document, stream: pytyping.IO, file_format: str, lazy: bool = False,
+                type_filter: Optional[TypeFilter] = None) -> None:
+    """Read a document from a file object in text or binary mode."""
+    if file_format == SORTED_NTRIPLES:
+        file_format = NTRIPLES
+    document.parse_timings = {}
+    if file_format in NTRIPLES_FORMATS:
+        lines = stream
+        if is_binary(stream):
+            lines = (line.decode('utf-8') for line in stream)
+        return parse_lines(document, lines, lazy, type_filter)
+    start = time.perf_counter()
+    graph = rdflib.Graph()
+    graph.parse(source=stream, format=file_format)
+    record_timing(document, 'parse rdf', start)
+    return parse_graph(document, graph, lazy, type_filter)
+
+
+def read_string(document, data: str, file_format: str, lazy: bool = False,
+                type_filter: Optional[TypeFilter] = None) -> None:
+    """Read a document from a string, see Document.read_string()."""
+    if file_format == SORTED_NTRIPLES:
+        file_format = NTRIPLES
+    document.parse_timings = {}
+    if file_format in NTRIPLES_FORMATS:
+        return parse_lines(document, data.splitlines(), lazy, type_filter)
+    start = time.perf_counter()
+    graph = rdflib.Graph()
+    graph.parse(data=data, format=file_format)
+    record_timing(document, 'parse rdf', start)
+    return parse_graph(document, graph, lazy, type_filter)
+
+
+def parse_graph(document, graph: rdflib.Graph, lazy: bool = False,
+                type_filter: Optional[TypeFilter] = None) -> None:
+    """Load a document from an rdflib Graph."""
+    parse_triples(document, graph.triples((None, None, None)), graph.namespaces(), lazy, type_filter)
+
+
+def parse_lines(document, lines: Iterable[str], lazy: bool = False,
+                type_filter: Optional[TypeFilter] = None) -> None:
+    """Load a document from lines of N-Triples."""
+    # N-Triples are tokenized natively and fed straight to the
+    # object builder without building an rdflib Graph. N-Triples
+    # has no prefixes, so bind the defaults an empty Graph has, as
+    # loading via rdflib would.
+    namespaces = list(rdflib.Graph().namespaces())
+    parse_triples(document, parse_ntriples(lines), namespaces, lazy, type_filter)
+
+
+def group_triples(triples: Iterable[Tuple[rdflib.term.Node, rdflib.term.Node, rdflib.term.Node]]) -> Subjects:
+    """Group triples by subject in a single pass.
+
+    Each subject maps to a list of (predicate string, predicate,
+    object) tuples in the order they were encountered. Predicates
+    are converted to strings once per distinct predicate.
+    """
+    predicate_strings: Dict[rdflib.term.Node, str] = {}
+    subjects: Subjects = {}
+    for s, p, o in triples:
+        try:
+            str_p = predicate_strings[p]
+        except KeyError:
+            str_p = predicate_strings[p] = str(p)
+        try:
+            subjects[s].append((str_p, p, o))
+        except KeyError:
+            subjects[s] = [(str_p, p, o)]
+    return subjects
+
+
+def parse_subjects(document, subjects: Subjects, other_rdf: rdflib.Graph) -> Dict[str, SBOLObject]:
+    """Build SBOL objects from triples grouped by subject.
+
+    Each subject with an SBOL rdf:type is built and its property
+    stores are filled, and then its singleton properties are
+    cleaned up. Triples of all other subjects are added to
+    `other_rdf` for round-tripping. Subjects are consumed from
+    `subjects` as they are processed.
+
+    Objects are allocated from the schema of their rdf:types where
+    possible, rather than by running their builders, see
+    ParseSchema.
+    """
+    objects: Dict[str, SBOLObject] = {}
+    # Each object built, with the schema it was built from
+    built: List[Tuple[SBOLObject, ParseSchema]] = []
+    # Owned objects may be encountered before their owners, so
+    # links to them are resolved once every object is built.
+    owned_links = []
+    for subject in list(subjects):
+        predicate_objects = subjects.pop(subject)
+        obj, schema = _build_subject(document, subject, predicate_objects)
+        if obj is not None:
+            # Use __dict__ directly, as SBOLObject attribute access
+            # is slow
+            obj_dict = obj.__dict__
+            # Objects are indexed once they have been linked into
+            # the object hierarchy, see parse_triples()
+            obj_dict['_document'] = document
+            objects[obj_dict['_identity']] = obj
+            built.append((obj, schema))
+            if obj_dict['_identity'] != str(subject):
+                # The builder normalized the identity, so the
+                # triples are not this object's properties
+                obj = None
+        if obj is None:
+            # Not an SBOL object, keep the triples for round-tripping
+            # See https://github.com/SynBioDex/pySBOL3/issues/96
+            for _, p, o in predicate_objects:
+                other_rdf.add((subject, p, o))
+        else:
+            _fill_stores(obj.__dict__, predicate_objects, owned_links)
+    for owned_store, other_identity in owned_links:
+        owned_store.append(objects[other_identity])
+    for obj, schema in built:
+        if schema.singletons is None:
+            clean_up_singletons({obj.identity: obj})
+        else:
+            schema.trim_singletons(obj)
+    return objects
+
+
+def _build_subject(document, subject: rdflib.term.Node,
+                   predicate_objects) -> Tuple[Optional[SBOLObject], Optional[ParseSchema]]:
+    # Build the object of a subject, without its property values,
+    # returning it with the schema of its rdf:types. The object is
+    # None if the subject is not an SBOL object.
+    # Each identity can have either one or two rdf:type
+    # properties. If one, create the entity. If two, it is a
+    # custom type (see section 6.11 of the spec) and we
+    # instantiate it specially.
+    types = tuple(str(o) for str_p, _, o in predicate_objects if str_p == RDF_TYPE)
+    if not types:
+        return None, None
+    identity = str(subject)
+    schema = parse_schema(document, identity, types)
+    if schema.recipe is not None:
+        return schema.build(identity), schema
+    if schema.prototype is not None:
+        return build_object(document, identity, list(types)), schema
+    return None, schema
+
+
+def _fill_stores(obj_dict: Dict[str, pytyping.Any], predicate_objects, owned_links: List) -> None:
+    # Add the values of the triples of an object to its property
+    # stores. Links to owned objects are added to owned_links, to be
+    # resolved once every object is built.
+    # Look up the stores once rather than once per triple
+    owned_objects = obj_dict['_owned_objects']
+    properties = obj_dict['_properties']
+    for str_p, _, o in predicate_objects:
+        if str_p in owned_objects:
+            owned_links.append((owned_objects[str_p], str(o)))
+        elif str_p == RDF_TYPE:
+            # Handle rdf:type specially because the main type(s)
+            # will already be in the list from the build_object
+            # phase and those entries need to be maintained and
+            # we don't want duplicates
+            if o not in properties[str_p]:
+                properties[str_p].append(o)
+        else:
+            properties[str_p].append(o)
+
+
+def parse_schema(document, identity: str, types: Tuple[str, ...]) -> ParseSchema:
+    """Find how to build the objects with a list of rdf:types,
+    building a prototype with their builder the first time.
+    """
+    try:
+        return document._schemas[types]
+    except KeyError:
+        schema = document._schemas[types] = ParseSchema(build_object(document, identity, list(types)))
+        return schema
+
+
+def build_object(document, identity: str, types: List[str]) -> Optional[Identified]:
+    """Build an object with its builder, given an identity and a list
+    of RDF types, if possible.
+    """
+    # If there is 1 SBOL type and we don't know it, raise an exception
+    # If there are multiple types and 1 is TopLevel or Identified, then
+    #    it is an extension. Use the other types to try to build it. If
+    #    no other type is known, build a generic TopLevel or Identified.
+    sbol_types = [t for t in types if t.startswith(SBOL3_NS)]
+    if len(sbol_types) == 0:
+        # If there are no SBOL types in the list. Ignore this entity.
+        # Its triples will be stored in document._other_rdf later in the
+        # load process.
+        return None
+    if len(sbol_types) > 1:
+        # If there are multiple SBOL types in the list, raise an error.
+        # SBOL 3.0.1 Section 5.4: "an object MUST have no more than one
+        # rdfType property in the 'http://sbols.org/v3#' namespace"
+        msg = f'{identity} has more than one rdfType property in the'
+        msg += f' {SBOL3_NS} namespace.'
+        raise SBOLError(msg)
+    sbol_type = sbol_types[0]
+    if sbol_type in _EXTENSION_TYPES:
+        # Build an extension object
+        types.remove(sbol_type)
+        result = _build_extension_object(document, identity, sbol_type, types)
+    else:
+        try:
+            builder = document._uri_type_map[sbol_type]
+        except KeyError:
+            logging.warning('No builder found for %s', sbol_type)
+            raise SBOLError(f'Unknown type {sbol_type}')
+        result = builder(identity=identity, type_uri=sbol_type)
+    # Fix https://github.com/SynBioDex/pySBOL3/issues/264
+    if isinstance(result, TopLevel):
+        # Ensure namespace is not set. It should get set later in the
+        # build process. This avoids setting it when the file is invalid
+        # and the object has no namespace in the file.
+        result.clear_property(SBOL_NAMESPACE)
+    # End of fix for https://github.com/SynBioDex/pySBOL3/issues/264
+    return result
+
+
+def _build_extension_object(document, identity: str, sbol_type: str,
+                            types: List[str]) -> Optional[Identified]:
+    if sbol_type not in _EXTENSION_TYPES:
+        msg = f'{identity} has SBOL type {sbol_type} which is not one of'
+        msg += f' {_EXTENSION_TYPES.keys()}. (See Section 6.11)'
+        raise SBOLError(msg)
+    # Look for a builder associated with one of the rdf:types.
+    # If none of the rdf:types have a builder, use the sbol_type's builder
+    builder = None
+    build_type = None
+    for type_uri in types:
+        try:
+            builder = document._uri_type_map[type_uri]
+            build_type = type_uri
+            break
+        except KeyError:
+            logging.warning('No builder for %s', type_uri)
+    if builder is None:
+        builder = _EXTENSION_TYPES[sbol_type]
+        build_type = types[0]
+    return builder(identity=identity, type_uri=build_type)
+
+
+def clean_up_singletons(objects: Dict[str, SBOLObject]):
+    """Clean up singleton properties after reading an SBOL file.
+
+    When an SBOL file is read, values are appended to the property
+    stores without knowledge of which stores are singletons and
+    which stores are lists. This function cleans up singleton properties
+    by ensuring that each has exactly one value.
+    """
+    # This is necessary due to defaulting of properties when using
+    # the builder. Some objects have required properties, which the
+    # builder sets. In the case of singleton values, that can result
+    # in multiple values in a singleton property. Only the first value
+    # is used, so the value read from file is ignored.
+    for _, obj in objects.items():
+        for _, attr in obj.__dict__.items():
+            if isinstance(attr, SingletonProperty):
+                prop_uri = attr.property_uri
+                store = attr._storage()
+                if len(store[prop_uri]) > 1:
+                    store[prop_uri] = store[prop_uri][-1:]
+
+
+def parse_triples(document, triples, namespaces, lazy: bool = False,
+                  type_filter: Optional[TypeFilter] = None) -> None:
+    """Load a document from an iterable of rdflib triples and an
+    iterable of (prefix, namespace) bindings.
+
+    The triples are read in a single pass, grouping them by
+    subject, and are then turned into objects one subject at a
+    time. Triples that are not part of an SBOL object are kept in
+    a new graph for round-tripping. If lazy is true, the TopLevel
+    object trees are only built when needed, see LazyTrees. If a
+    type_filter is given, the objects it leaves out are removed
+    before any object is built.
+    """
+    start = time.perf_counter()
+    document._schemas = {}
+    subjects = group_triples(triples)
+    start = record_timing(document, 'group triples', start)
+    other_rdf = rdflib.Graph()
+    if type_filter is not None:
+        type_filter.apply(document, subjects, other_rdf)
+        start = record_timing(document, 'filter types', start)
+    plan = LazyTrees.plan(document, subjects) if lazy else None
+    if plan is not None:
+        start = record_timing(document, 'plan trees', start)
+        _parse_lazily(document, subjects, plan, other_rdf, namespaces)
+        return
+    objects = parse_subjects(document, subjects, other_rdf)
+    start = record_timing(document, 'build objects', start)
+    # Validate all the objects
+    # TODO: Where does this belong? Is this automatic?
+    #       Or should a user invoke validate?
+    # for obj in objects.values():
+    #     obj.validate()
+
+    # Store the TopLevel objects in the Document
+    document.objects = [obj for obj in objects.values()
+                        if isinstance(obj, TopLevel)]
+    # Index the objects that are reachable from the TopLevels. This
+    # single traversal is also the reachability pass for finding
+    # orphans below.
+    document._clear_index()
+    document.traverse(document._index_object)
+    start = record_timing(document, 'index objects', start)
+    # Gather Orphans for future writing.
+    # These are expected to be non-TopLevel annotation objects whose owners
+    # have no custom implementation (i.e. no builder registered). These objects
+    # will be written out as part of Document.write_string()
+    document.orphans = [obj for uri, obj in objects.items()
+                        if uri not in document._identity_index]
+    start = record_timing(document, 'gather orphans', start)
+    _finish_parse(document, namespaces, other_rdf)
+
+
+def _finish_parse(document, namespaces, other_rdf: rdflib.Graph) -> None:
+    # Store the namespaces in the Document for later use
+    for prefix, uri in namespaces:
+        document.bind(prefix, uri)
+        other_rdf.bind(prefix, uri)
+    # Now tuck away the non-SBOL triples for use in Document.write_string()
+    document._other_rdf = other_rdf
+
+
+def _parse_lazily(document, subjects: Subjects, plan, other_rdf: rdflib.Graph, namespaces) -> None:
+    # Keep the triples of the TopLevel object trees to build them
+    # when needed. Orphans and non-SBOL triples are handled at
+    # once, as in an eager read.
+    trees, orphans, non_sbol = plan
+    for subject in non_sbol:
+        for _, p, o in subjects.pop(subject):
+            other_rdf.add((subject, p, o))
+    objects = parse_subjects(document, {subject: subjects.pop(subject) for subject in orphans}, other_rdf)
+    document.orphans = list(objects.values())
+    document._objects = []
+    document._clear_index()
+    _finish_parse(document, namespaces, other_rdf)
+    document._lazy = LazyTrees(document, subjects, trees) if trees else None
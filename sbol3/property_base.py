@@ -26,6 +26,14 @@ class Property(abc.ABC):
     def _storage(self) -> Dict[str, list]:
         return self.property_owner._properties
 
+    def _changed(self) -> None:
+        # Invalidate the owner's content hash, and tell the owner's
+        # document, for incremental validation
+        self.property_owner._content_changed()
+        document = getattr(self.property_owner, '_document', None)
+        if document is not None:
+            document._object_changed(self.property_owner)
+
     @abc.abstractmethod
     def set(self, value: Any) -> None:
         pass
@@ -56,6 +64,23 @@ class Property(abc.ABC):
         will be called on each individual item that was added to the list.
         """
 
+    def item_removed(self, item: Any) -> None:
+        """Stub method for child classes to override if they have to do
+        any additional processing on items after they are removed. This
+        method will be called on each individual item that was removed
+        from the property storage, receiving the stored value.
+        """
+
+    def _items_replaced(self, old_items: List[Any], new_items: List[Any]) -> None:
+        # Notify item_removed for every stored value that is no
+        # longer present after an update
+        if not old_items:
+            return
+        new_ids = {id(new_item) for new_item in new_items}
+        for old_item in old_items:
+            if id(old_item) not in new_ids:
+                self.item_removed(old_item)
+
     @property
     def attribute_name(self) -> Union[str, None]:
         """Heuristically determine which attribute is associated with
@@ -83,13 +108,18 @@ class SingletonProperty(Property, abc.ABC):
 
     def set(self, value: Any) -> None:
         value = self.from_user(value)
+        old_items = self._storage()[self.property_uri]
         if value is None:
             if self.lower_bound == 0:
                 self._storage()[self.property_uri] = []
+                self._changed()
+                self._items_replaced(old_items, [])
             else:
                 raise ValueError(f'Property {self.property_uri} cannot be unset')
         else:
             self._storage()[self.property_uri] = [value]
+            self._changed()
+            self._items_replaced(old_items, [value])
             self.item_added(value)
 
     def get(self) -> Any:
@@ -103,7 +133,12 @@ class SingletonProperty(Property, abc.ABC):
 class ListProperty(Property, MutableSequence, abc.ABC):
 
     def __delitem__(self, key: Union[int, slice]) -> None:
-        self._storage()[self.property_uri].__delitem__(key)
+        storage = self._storage()[self.property_uri]
+        old_items = storage[key] if isinstance(key, slice) else [storage[key]]
+        storage.__delitem__(key)
+        self._changed()
+        for old_item in old_items:
+            self.item_removed(old_item)
 
     def __setitem__(self, key: Union[int, slice], value: Any) -> None:
         # Do string separately because it, too, is iterable
@@ -118,7 +153,11 @@ class ListProperty(Property, MutableSequence, abc.ABC):
             # Not string or iterable
             values = [value]
             value = self.from_user(value)
-        self._storage()[self.property_uri].__setitem__(key, value)
+        storage = self._storage()[self.property_uri]
+        old_items = storage[key] if isinstance(key, slice) else [storage[key]]
+        storage.__setitem__(key, value)
+        self._changed()
+        self._items_replaced(old_items, value if isinstance(key, slice) else [value])
         for val in values:
             self.item_added(val)
 
@@ -154,6 +193,7 @@ class ListProperty(Property, MutableSequence, abc.ABC):
     def insert(self, index: int, value: Any) -> None:
         item = self.from_user(value)
         self._storage()[self.property_uri].insert(index, item)
+        self._changed()
         self.item_added(value)
 
     def set(self, value: Any) -> None:
@@ -174,6 +214,9 @@ class ListProperty(Property, MutableSequence, abc.ABC):
             msg += ' packed in an iterable'
             raise TypeError(msg)
         items = [self.from_user(v) for v in value]
+        old_items = self._storage()[self.property_uri]
         self._storage()[self.property_uri] = items
+        self._changed()
+        self._items_replaced(old_items, items)
         for val in value:
             self.item_added(val)
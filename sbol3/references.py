@@ -0,0 +1,143 @@
+"""Indexes over the references between the objects of a document.
+
+A reference is a value of a ReferencedObject property, such as
+Component.sequences or SubComponent.instance_of. The ReferenceIndex
+maps each referenced URI to the objects that refer to it, see
+Document.referrers(). Like incremental validation, it relies on
+objects reporting changes to their properties to their document, and
+brings itself up to date with those changes when it is next used.
+The same index is used to find dangling references, see
+Document.check_references().
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .constants import SBOL_NAMESPACE
+from .identified import Identified
+from .refobj_property import ReferencedObjectMixin
+from .validation import ValidationReport
+
+# An object and the URI of one of its reference properties
+Referrer = Tuple[Identified, str]
+
+
+def _references(obj: Identified) -> Iterator[Tuple[str, str]]:
+    # The (referenced URI, property URI) of each reference of obj
+    properties = obj._properties
+    for value in obj.__dict__.values():
+        if isinstance(value, ReferencedObjectMixin):
+            for item in properties.get(value.property_uri, ()):
+                yield str(item), value.property_uri
+
+
+class ReferenceIndex:
+    """The objects of a document that refer to each URI."""
+
+    def __init__(self, document):
+        self.document = document
+        # The referrers of each URI, as ordered sets
+        self.referrers: Dict[str, Dict[Referrer, None]] = {}
+        # The references of each indexed object, to unindex it
+        self.references_of: Dict[Identified, List[Tuple[str, str]]] = {}
+        # Objects changed, added or removed since the index was last
+        # brought up to date
+        self.dirty: Dict[Identified, None] = {}
+        document.traverse(self._add)
+
+    def object_changed(self, obj: Identified) -> None:
+        """Record that an object has changed, or has been added to or
+        removed from the document.
+        """
+        self.dirty[obj] = None
+
+    def _add(self, obj: Identified) -> None:
+        references = list(dict.fromkeys(_references(obj)))
+        if not references:
+            return
+        self.references_of[obj] = references
+        for uri, property_uri in references:
+            self.referrers.setdefault(uri, {})[obj, property_uri] = None
+
+    def _remove(self, obj: Identified) -> None:
+        for uri, property_uri in self.references_of.pop(obj, ()):
+            referrers = self.referrers[uri]
+            del referrers[obj, property_uri]
+            if not referrers:
+                del self.referrers[uri]
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the changes to the
+        document.
+        """
+        dirty = self.dirty
+        self.dirty = {}
+        # Only objects still in the document are indexed again
+        indexed = self.document._index_keys
+        for obj in dirty:
+            self._remove(obj)
+            if obj in indexed:
+                self._add(obj)
+
+    def get(self, uri: str) -> List[Referrer]:
+        """
+        :param uri: A referenced URI
+        :return: The objects that refer to uri, with the URI of the
+                 property that refers to it
+        """
+        self.refresh()
+        return list(self.referrers.get(uri, ()))
+
+
+def reference_index(document) -> ReferenceIndex:
+    """The index of the references of a document, created on first
+    use, see Document.referrers().
+    """
+    if document._references is None:
+        document._references = ReferenceIndex(document)
+    return document._references
+
+
+def check_references(document, report: Optional[ValidationReport] = None) -> ValidationReport:
+    """Report the references of a document that refer to objects that
+    are not in it, see Document.check_references().
+    """
+    if report is None:
+        report = ValidationReport()
+    index = reference_index(document)
+    index.refresh()
+    identities = document._identity_index
+    orphans = {orphan.identity for orphan in document.orphans}
+    namespaces = None
+    for uri, referrers in index.referrers.items():
+        if uri in identities or uri in orphans:
+            continue
+        if namespaces is None:
+            # The namespaces of the document, gathered only if needed
+            namespaces = {str(namespace) for top_level in document.objects
+                          for namespace in top_level._properties.get(SBOL_NAMESPACE, ())}
+        in_namespace = any(uri.startswith(namespace) for namespace in namespaces)
+        for obj, property_uri in referrers:
+            if in_namespace:
+                message = f'{property_uri} refers to {uri}, which is not in the document'
+                report.addError(obj.identity, None, message)
+            else:
+                message = f'{property_uri} refers to {uri}, which is not in the document or its namespaces'
+                report.addWarning(obj.identity, None, message)
+            if report.limit_reached:
+                return report
+    return report
+
+
+def resolve_references(document) -> Dict[str, Identified]:
+    """Resolve the references of a document by identity, see
+    Document.resolve_references(). The result is kept in the document
+    until the document changes.
+    """
+    if document._resolved is not None and document._resolved[0] == document._generation:
+        return document._resolved[1]
+    index = reference_index(document)
+    index.refresh()
+    identities = document._identity_index
+    resolved = {uri: identities[uri] for uri in index.referrers if uri in identities}
+    document._resolved = (document._generation, resolved)
+    return resolved
@@ -0,0 +1,181 @@
+"""Raw construction of objects when reading a document.
+
+Builders such as build_range() run the full constructor of a class
+with placeholder values. When a document is read, each list of
+rdf:types is built once with its builder, and the resulting prototype
+is taken apart into a schema: the attributes, properties and initial
+property stores of its class. The other objects with those types are
+allocated from the schema without running constructors. The schema
+also lists the singleton properties, so that extra values read from
+the file can be trimmed without inspecting every object.
+"""
+
+import copy
+from collections import defaultdict
+from typing import Any, List, Optional, Set, Tuple
+
+import rdflib
+
+from .constants import SBOL_DISPLAY_ID
+from .identified import Identified, extract_display_id
+from .object import SBOLObject
+from .property_base import Property, SingletonProperty
+
+# Steps of the recipe to allocate an object, see ParseSchema.build()
+_PROPERTIES = 0
+_OWNED_OBJECTS = 1
+_IDENTITY = 2
+_DOCUMENT = 3
+_PROPERTY = 4
+_CONTENT_VERSION = 5
+_OTHER = 6
+
+# The steps of the attributes that are set afresh on each object
+_FRESH_STEPS = {
+    '_identity': _IDENTITY,
+    '_document': _DOCUMENT,
+    '_content_version': _CONTENT_VERSION,
+}
+
+
+class ParseSchema:
+    """How to build the objects with one list of rdf:types when
+    reading a document, derived from a prototype built by the builder
+    of those types.
+    """
+
+    def __init__(self, prototype: Optional[Identified]):
+        """
+        :param prototype: An object built by the builder of the
+                          rdf:types, or None if they are not SBOL types
+        """
+        self.prototype = prototype
+        # The steps to allocate an object, in the order the constructor
+        # creates the attributes, or None if objects must be built by
+        # their builder
+        self.recipe: Optional[List[Tuple[str, int, Any]]] = None
+        # The (store attribute, property URI) of each singleton
+        # property, or None if the stores must be found on each object
+        self.singletons: Optional[List[Tuple[str, str]]] = None
+        if prototype is None:
+            return
+        self.singletons = self._singletons(prototype)
+        self.recipe = self._recipe(prototype)
+
+    @staticmethod
+    def _singletons(prototype: Identified) -> Optional[List[Tuple[str, str]]]:
+        result = []
+        for value in prototype.__dict__.values():
+            if isinstance(value, SingletonProperty):
+                storage = value._storage()
+                if storage is prototype._properties:
+                    result.append(('_properties', value.property_uri))
+                elif storage is prototype._owned_objects:
+                    result.append(('_owned_objects', value.property_uri))
+                else:
+                    return None
+        return result
+
+    @staticmethod
+    def _recipe(prototype: Identified) -> Optional[List[Tuple[str, int, Any]]]:
+        # Objects can only be allocated from the prototype if nothing
+        # but the identity and display_id depends on the identity, and
+        # if the builder does not create owned objects
+        identity = prototype.identity
+        display_id = extract_display_id(identity)
+        dependent = {identity, display_id}
+        if not ParseSchema._allocatable(prototype, display_id, dependent):
+            return None
+        recipe = []
+        for name, value in prototype.__dict__.items():
+            if name == '_hash_cache':
+                continue
+            step = ParseSchema._step(prototype, name, value, dependent)
+            if step is None:
+                return None
+            recipe.append(step)
+        return recipe
+
+    @staticmethod
+    def _allocatable(prototype: Identified, display_id: str, dependent: Set[str]) -> bool:
+        # Whether the property stores of the prototype can be copied
+        if prototype._properties.get(SBOL_DISPLAY_ID) != ([rdflib.Literal(display_id)] if display_id else []):
+            return False
+        if any(prototype._owned_objects.values()):
+            return False
+        return not any(uri != SBOL_DISPLAY_ID and any(str(value) in dependent for value in values)
+                       for uri, values in prototype._properties.items())
+
+    @staticmethod
+    def _step(prototype: Identified, name: str, value: Any, dependent: Set[str]) -> Optional[Tuple[str, int, Any]]:
+        # The step to create one attribute, or None if it cannot be
+        # copied from the prototype
+        if name == '_properties':
+            return name, _PROPERTIES, [(uri, list(values)) for uri, values in value.items()]
+        if name == '_owned_objects':
+            return name, _OWNED_OBJECTS, list(value)
+        if name in _FRESH_STEPS:
+            return name, _FRESH_STEPS[name], None
+        if isinstance(value, Property):
+            return ParseSchema._property_step(prototype, name, value)
+        if isinstance(value, str) and value in dependent:
+            return None
+        return name, _OTHER, value
+
+    @staticmethod
+    def _property_step(prototype: Identified, name: str, value: Property) -> Optional[Tuple[str, int, Any]]:
+        # The step to create a Property of the object, from the state
+        # of the prototype's Property without its owner
+        if value.property_owner is not prototype:
+            return None
+        state = dict(value.__dict__)
+        del state['property_owner']
+        return name, _PROPERTY, (value.__class__, state)
+
+    def build(self, identity: str) -> Identified:
+        """Allocate an object from the schema, with the property values
+        the builder gives it.
+
+        :param identity: The identity of the object
+        :return: The new object
+        """
+        identity = SBOLObject._make_identity(identity)
+        display_id = extract_display_id(identity)
+        cls = self.prototype.__class__
+        obj = cls.__new__(cls)
+        # Populate __dict__ directly to bypass SBOLObject.__setattr__
+        obj_dict = obj.__dict__
+        for name, step, value in self.recipe:
+            if step == _PROPERTY:
+                prop_class, state = value
+                prop = prop_class.__new__(prop_class)
+                prop.__dict__ = dict(state, property_owner=obj)
+                obj_dict[name] = prop
+            elif step == _PROPERTIES:
+                properties = defaultdict(list, {uri: values.copy() for uri, values in value})
+                properties[SBOL_DISPLAY_ID] = [rdflib.Literal(display_id)] if display_id else []
+                obj_dict[name] = properties
+            elif step == _OWNED_OBJECTS:
+                obj_dict[name] = defaultdict(list, {uri: [] for uri in value})
+            elif step == _IDENTITY:
+                obj_dict[name] = identity
+            elif step == _DOCUMENT:
+                obj_dict[name] = None
+            elif step == _CONTENT_VERSION:
+                obj_dict[name] = 0
+            else:
+                obj_dict[name] = copy.deepcopy(value)
+        return obj
+
+    def trim_singletons(self, obj: Identified) -> None:
+        """Keep only the last value of each singleton property of an
+        object built from the triples of a file, see
+        sbol3.parsing.clean_up_singletons(). The schema must list its
+        singletons.
+        """
+        obj_dict = obj.__dict__
+        for store_name, uri in self.singletons:
+            store = obj_dict[store_name]
+            values = store.get(uri)
+            if values is not None and len(values) > 1:
+                store[uri] = values[-1:]
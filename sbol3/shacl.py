@@ -0,0 +1,588 @@
+"""SHACL validation support for Document.validate_shacl().
+
+Parsing the SBOL3 shapes takes longer than validating a small
+document, so the shapes are parsed once per process and reused. If a
+shapes file changes on disk while a program is running, call
+clear_shacl_cache() so that it is read again.
+
+Documents are validated by one of two engines. pyshacl is the
+reference: it implements all of SHACL, but works on an RDF graph of the
+whole document. The compiled engine supports only the small part of
+SHACL that the SBOL3 shapes use, compiling the shapes into checks that
+run directly against the objects in a document. It produces the same
+results as pyshacl, and is much faster.
+"""
+
+import collections
+import datetime
+import decimal
+import hashlib
+import os
+from typing import Container, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import pyshacl
+import rdflib
+from pyshacl.rdfutil import stringify_node
+
+from .constants import OM_NS, PROV_NS, RDF_TYPE, SBOL3_NS
+from .ntriples import ntriples_lines, parse_ntriples
+from .validation import ValidationReport
+
+SBOL3_SHAPES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'rdf', 'sbol3-shapes.ttl')
+
+SH = rdflib.Namespace('http://www.w3.org/ns/shacl#')
+
+# Engines for Document.validate_shacl()
+COMPILED_ENGINE = 'compiled'
+PYSHACL_ENGINE = 'pyshacl'
+
+
+class Shapes:
+    """SHACL shapes parsed from a file, ready to pass to pyshacl."""
+
+    def __init__(self, path: str):
+        # A fingerprint of the shapes file, which identifies the shapes
+        # in persistent caches of validation results
+        with open(path, 'rb') as shapes_file:
+            self.digest = hashlib.sha256(shapes_file.read()).hexdigest()
+        # The shapes, passed to pyshacl as the shacl_graph
+        self.shacl_graph = rdflib.Graph()
+        self.shacl_graph.parse(path, format='ttl')
+        # pyshacl abbreviates the paths in its messages with the
+        # prefixes of the shapes graph. Bind the same prefixes as a
+        # Document does.
+        for prefix, uri in [('sbol', SBOL3_NS), ('prov', PROV_NS), ('om', OM_NS)]:
+            self.shacl_graph.bind(prefix, uri)
+        # The class hierarchy of the shapes. Targets and sh:class
+        # constraints are resolved against the data graph, so these
+        # triples must be added to each data graph.
+        self.class_hierarchy = rdflib.Graph()
+        for triple in self.shacl_graph.triples((None, rdflib.RDFS.subClassOf, None)):
+            if isinstance(triple[2], rdflib.URIRef):
+                self.class_hierarchy.add(triple)
+        # The compiled shapes, or the reason they cannot be compiled
+        self._compiled: Union['CompiledShapes', str, None] = None
+
+    def compiled(self) -> 'CompiledShapes':
+        """Return these shapes compiled for the compiled engine,
+        compiling them the first time they are needed.
+
+        :raises ValueError: If the shapes use SHACL features that the
+                            compiled engine does not support
+        :return: The compiled shapes
+        """
+        if self._compiled is None:
+            try:
+                self._compiled = CompiledShapes(self.shacl_graph, self.class_hierarchy)
+            except ValueError as e:
+                self._compiled = str(e)
+        if isinstance(self._compiled, str):
+            raise ValueError(self._compiled)
+        return self._compiled
+
+
+_shapes_cache: Dict[str, Shapes] = {}
+
+
+def get_shapes(path: Optional[str] = None) -> Shapes:
+    """Return the parsed shapes in the given file, parsing the file
+    only the first time it is requested.
+
+    :param path: A Turtle file of SHACL shapes. Defaults to the SBOL3
+                 shapes distributed with pySBOL3.
+    :return: The parsed shapes
+    """
+    path = os.path.abspath(path or SBOL3_SHAPES_PATH)
+    try:
+        return _shapes_cache[path]
+    except KeyError:
+        shapes = _shapes_cache[path] = Shapes(path)
+        return shapes
+
+
+def clear_shacl_cache(path: Optional[str] = None) -> None:
+    """Discard cached SHACL shapes so that they are parsed again on
+    next use.
+
+    :param path: The shapes file to discard. If None, all cached shapes
+                 are discarded.
+    :return: Nothing
+    """
+    if path is None:
+        _shapes_cache.clear()
+    else:
+        _shapes_cache.pop(os.path.abspath(path), None)
+
+
+def run_pyshacl(data_graph: rdflib.Graph, shapes: Shapes,
+                abort_on_first: bool = False) -> Optional[rdflib.Graph]:
+    """Validate a graph against SHACL shapes.
+
+    The data graph is modified: the class hierarchy of the shapes is
+    added to it, and pyshacl works on it in place rather than copying
+    it. Pass a graph that is private to the caller.
+
+    :param data_graph: The graph to validate
+    :param shapes: The shapes to validate against
+    :param abort_on_first: Stop at the first shape that finds a
+                           violation. Warnings do not stop validation.
+    :return: The pyshacl results graph, or None if there are no results
+    """
+    data_graph += shapes.class_hierarchy
+    # With allow_warnings, only violations make the graph
+    # non-conforming, and so abort validation
+    _, results_graph, _ = pyshacl.validate(data_graph=data_graph,
+                                           shacl_graph=shapes.shacl_graph,
+                                           ont_graph=None,
+                                           inference=None,
+                                           inplace=True,
+                                           abort_on_first=abort_on_first,
+                                           allow_warnings=abort_on_first,
+                                           meta_shacl=False,
+                                           advanced=True,
+                                           debug=False)
+    if (None, SH.result, None) not in results_graph:
+        return None
+    return results_graph
+
+
+def validate_shard(owned: str, context: str, shapes_path: Optional[str] = None) -> str:
+    """Validate one shard of a document, for Document.validate_shacl().
+
+    This runs in a worker process, so the shard is passed in and the
+    results are passed back as N-Triples text.
+
+    :param owned: The triples whose subjects are validated, as N-Triples
+    :param context: Additional triples needed to validate them, such as
+                    the types of the objects they refer to, as N-Triples
+    :param shapes_path: The shapes to use, see get_shapes()
+    :return: The pyshacl results for the subjects of `owned`, as
+             N-Triples, or an empty string if there are none
+    """
+    data_graph = rdflib.Graph()
+    for triple in parse_ntriples(owned.splitlines()):
+        data_graph.add(triple)
+    subjects = set(data_graph.subjects())
+    for triple in parse_ntriples(context.splitlines()):
+        data_graph.add(triple)
+    results_graph = run_pyshacl(data_graph, get_shapes(shapes_path))
+    if results_graph is None:
+        return ''
+    # Context objects are validated in their own shard, so drop their
+    # results here
+    for report, result in list(results_graph.subject_objects(SH.result)):
+        if results_graph.value(result, SH.focusNode) not in subjects:
+            results_graph.remove((report, SH.result, result))
+            results_graph.remove((result, None, None))
+    if (None, SH.result, None) not in results_graph:
+        return ''
+    return ''.join(ntriples_lines(results_graph))
+
+
+# The SHACL terms understood by the compiled engine. Shapes that use
+# any other SHACL term must be validated with pyshacl.
+_COMPILED_PREDICATES = {SH.path, SH.property, SH['class'], SH.datatype,
+                        SH.minCount, SH.maxCount, SH.targetClass,
+                        SH.targetSubjectsOf, SH.severity,
+                        # Non-validating properties
+                        SH.name, SH.description, SH.order, SH.group}
+_COMPILED_TYPES = {SH.NodeShape, SH.PropertyShape}
+
+# Python types of the values of well-formed literals, as checked by
+# pyshacl's sh:datatype constraint. Literals of other datatypes only
+# need the right datatype.
+_DATATYPE_VALUES = {
+    rdflib.XSD.string: (str, bytes),
+    rdflib.RDF.langString: (str, bytes),
+    rdflib.XSD.integer: int,
+    rdflib.XSD.float: float,
+    rdflib.XSD.decimal: decimal.Decimal,
+    rdflib.XSD.boolean: bool,
+    rdflib.XSD.date: datetime.date,
+    rdflib.XSD.time: datetime.time,
+    rdflib.XSD.dateTime: datetime.datetime,
+}
+
+
+# Characters that rdflib does not allow in a URI written as N3
+_INVALID_URI_CHARS = '<>" {}|\\^`'
+
+
+def _has_datatype(value: rdflib.term.Node, datatype: rdflib.URIRef) -> bool:
+    """Check a value against an sh:datatype constraint, following the
+    rules of pyshacl.
+    """
+    if not isinstance(value, rdflib.Literal):
+        return False
+    if value.datatype == datatype:
+        if getattr(value, 'ill_typed', None) is True:
+            return False
+    elif datatype == rdflib.RDFS.Literal:
+        return True
+    elif datatype == rdflib.RDFS.Datatype:
+        return value.datatype is not None
+    elif not ((value.datatype is None and value.language is None and datatype == rdflib.XSD.string)
+              or (value.language and datatype == rdflib.RDF.langString)):
+        return False
+    python_type = _DATATYPE_VALUES.get(datatype)
+    return python_type is None or isinstance(value.value, python_type)
+
+
+class _ValidationData:
+    """The parts of a document that constraints look at beyond the
+    values of the focus node: the types of every node, the class
+    hierarchy, and the prefixes used to format focus nodes.
+    """
+
+    def __init__(self, compiled: 'CompiledShapes',
+                 types: Mapping[rdflib.term.Node, List[rdflib.term.Node]],
+                 hierarchy: Mapping[rdflib.term.Node, List[rdflib.term.Node]],
+                 other_rdf: rdflib.Graph, namespaces: Mapping[str, str],
+                 object_types: Optional[Mapping[rdflib.term.Node, List[rdflib.term.Node]]] = None):
+        self.compiled = compiled
+        self.types = types
+        self.object_types = object_types
+        self.hierarchy = hierarchy
+        self._superclasses: Dict[rdflib.term.Node, frozenset] = {}
+        self._class_shapes: Dict[tuple, tuple] = {}
+        # pyshacl formats focus nodes with the prefixes of the data
+        # graph, which are those of Document.graph()
+        self.other_rdf = other_rdf
+        graph = rdflib.Graph()
+        for prefix, uri in namespaces.items():
+            graph.bind(prefix, uri)
+        self.namespace_manager = graph.namespace_manager
+        self._bound = {str(uri) for _, uri in graph.namespaces()}
+        self._focus_text: Dict[rdflib.term.Node, str] = {}
+
+    def superclasses(self, rdf_type: rdflib.term.Node) -> frozenset:
+        """Return a class and all of its superclasses."""
+        try:
+            return self._superclasses[rdf_type]
+        except KeyError:
+            pass
+        found = {rdf_type}
+        pending = [rdf_type]
+        while pending:
+            for superclass in self.hierarchy.get(pending.pop(), ()):
+                if superclass not in found:
+                    found.add(superclass)
+                    pending.append(superclass)
+        result = self._superclasses[rdf_type] = frozenset(found)
+        return result
+
+    def has_class(self, node: rdflib.term.Node, rdf_class: rdflib.term.Node) -> bool:
+        types = self.types.get(node)
+        if types is None and self.object_types is not None:
+            types = self.object_types.get(node)
+        return any(rdf_class in self.superclasses(rdf_type) for rdf_type in types or ())
+
+    def class_shapes(self, types: Iterable[rdflib.term.Node]) -> tuple:
+        """Return the shapes that target instances of any of the given
+        types, directly or via a superclass.
+        """
+        key = tuple(types)
+        try:
+            return self._class_shapes[key]
+        except KeyError:
+            pass
+        shapes = {}
+        for rdf_type in key:
+            for rdf_class in self.superclasses(rdf_type):
+                shapes.update(dict.fromkeys(self.compiled.class_targets.get(rdf_class, ())))
+        result = self._class_shapes[key] = tuple(shapes)
+        return result
+
+    def focus_text(self, focus: rdflib.term.Node) -> str:
+        try:
+            return self._focus_text[focus]
+        except KeyError:
+            pass
+        text = None
+        if isinstance(focus, rdflib.URIRef) and not any(c in focus for c in _INVALID_URI_CHARS):
+            # Most focus nodes have no prefix. rdflib takes time that
+            # grows with the number of namespaces it has seen to find
+            # that out, so check first.
+            try:
+                namespace = rdflib.namespace.split_uri(focus)[0]
+            except ValueError:
+                namespace = None
+            if namespace not in self._bound:
+                text = f'<{focus}>'
+        if text is None:
+            text = stringify_node(self.other_rdf, focus, ns_manager=self.namespace_manager)
+        self._focus_text[focus] = text
+        return text
+
+
+class _MinCount:
+
+    def __init__(self, count: int, path_text: str):
+        self.count = count
+        self.path_text = path_text
+
+    def check(self, focus, values, data: _ValidationData) -> Iterator[str]:
+        if len(values) < self.count:
+            yield f'Less than {self.count} values on {data.focus_text(focus)}{self.path_text}'
+
+
+class _MaxCount:
+
+    def __init__(self, count: int, path_text: str):
+        self.count = count
+        self.path_text = path_text
+
+    def check(self, focus, values, data: _ValidationData) -> Iterator[str]:
+        if len(values) > self.count:
+            yield f'More than {self.count} values on {data.focus_text(focus)}{self.path_text}'
+
+
+class _Class:
+
+    def __init__(self, classes: List[rdflib.term.Node], message: str):
+        self.classes = classes
+        self.message = message
+
+    def check(self, focus, values, data: _ValidationData) -> Iterator[str]:
+        # One result per class per failing value, as pyshacl does
+        for rdf_class in self.classes:
+            for value in values:
+                if isinstance(value, rdflib.Literal) or not data.has_class(value, rdf_class):
+                    yield self.message
+
+
+class _Datatype:
+
+    def __init__(self, datatype: rdflib.URIRef, message: str):
+        self.datatype = datatype
+        self.message = message
+
+    def check(self, focus, values, data: _ValidationData) -> Iterator[str]:
+        for value in values:
+            if not _has_datatype(value, self.datatype):
+                yield self.message
+
+
+class _Shape:
+    """A compiled node shape or property shape."""
+
+    def __init__(self, path: Optional[rdflib.URIRef], severity: rdflib.URIRef):
+        # Property paths are looked up in Identified._properties, which
+        # is keyed by str
+        self.path = None if path is None else str(path)
+        self.severity = severity
+        # Results are reported with the path, as parse_shacl_graph() does
+        self.prefix = f'{path}: '
+        self.constraints = []
+        self.properties: List[_Shape] = []
+
+    def check(self, focus: rdflib.term.Node,
+              values: Mapping[str, List[rdflib.term.Node]],
+              data: _ValidationData, results: list) -> None:
+        if self.path is None:
+            value_nodes = [focus]
+        else:
+            value_nodes = values.get(self.path, ())
+            if len(value_nodes) > 1:
+                # A graph holds each value once
+                value_nodes = list(dict.fromkeys(value_nodes))
+        for constraint in self.constraints:
+            for message in constraint.check(focus, value_nodes, data):
+                results.append((self.severity, focus, self.prefix + message))
+        for shape in self.properties:
+            shape.check(focus, values, data, results)
+
+
+class CompiledShapes:
+    """SHACL shapes compiled into checks that run directly against the
+    objects in a document, for the compiled engine.
+
+    Only the SHACL features that the SBOL3 shapes use are supported:
+    class targets (explicit and implicit), sh:targetSubjectsOf,
+    sh:property with a predicate path, sh:class, sh:datatype,
+    sh:minCount, sh:maxCount and sh:severity. Results and their
+    messages are the same as pyshacl's.
+    """
+
+    def __init__(self, shacl_graph: rdflib.Graph, class_hierarchy: rdflib.Graph):
+        """
+        :param shacl_graph: The shapes
+        :param class_hierarchy: The rdfs:subClassOf triples of the shapes
+        :raises ValueError: If the shapes use SHACL features that are
+                            not supported
+        """
+        graph = shacl_graph
+        for _, predicate, obj in graph:
+            if predicate.startswith(SH) and predicate not in _COMPILED_PREDICATES:
+                raise ValueError(f'{predicate} is not supported by the compiled SHACL engine')
+            if predicate == rdflib.RDF.type and obj.startswith(SH) and obj not in _COMPILED_TYPES:
+                raise ValueError(f'{obj} is not supported by the compiled SHACL engine')
+        self.hierarchy: Dict[rdflib.term.Node, List[rdflib.term.Node]] = collections.defaultdict(list)
+        for subclass, superclass in class_hierarchy.subject_objects(rdflib.RDFS.subClassOf):
+            self.hierarchy[subclass].append(superclass)
+        self.hierarchy = dict(self.hierarchy)
+        # Shapes that target instances of a class, and shapes that
+        # target the subjects of a predicate
+        self.class_targets: Dict[rdflib.term.Node, List[_Shape]] = collections.defaultdict(list)
+        self.subject_targets: Dict[str, List[_Shape]] = collections.defaultdict(list)
+        # A shape that is also an rdfs:Class, or an instance of a
+        # subclass of it, implicitly targets the instances of itself
+        class_types = set(graph.subjects(rdflib.RDFS.subClassOf, rdflib.RDFS.Class))
+        class_types.update([rdflib.RDFS.Class, rdflib.OWL.Class])
+        shape_nodes = set(graph.subjects(rdflib.RDF.type, SH.NodeShape))
+        shape_nodes.update(graph.subjects(rdflib.RDF.type, SH.PropertyShape))
+        for predicate in [SH.targetClass, SH.targetSubjectsOf, SH.property]:
+            shape_nodes.update(graph.subjects(predicate, None))
+        self._shapes: Dict[rdflib.term.Node, _Shape] = {}
+        for node in sorted(shape_nodes):
+            shape = self._compile(graph, node)
+            target_classes = list(graph.objects(node, SH.targetClass))
+            if any(rdf_type in class_types for rdf_type in graph.objects(node, rdflib.RDF.type)):
+                target_classes.append(node)
+            for rdf_class in dict.fromkeys(target_classes):
+                self.class_targets[rdf_class].append(shape)
+            for predicate in graph.objects(node, SH.targetSubjectsOf):
+                self.subject_targets[str(predicate)].append(shape)
+        self.class_targets = dict(self.class_targets)
+        self.subject_targets = dict(self.subject_targets)
+
+    def _compile(self, graph: rdflib.Graph, node: rdflib.term.Node) -> _Shape:
+        try:
+            return self._shapes[node]
+        except KeyError:
+            pass
+        paths = list(graph.objects(node, SH.path))
+        if len(paths) > 1 or (paths and not isinstance(paths[0], rdflib.URIRef)):
+            raise ValueError(f'Shape {node} has a path that is not supported'
+                             ' by the compiled SHACL engine')
+        path = paths[0] if paths else None
+        severity = graph.value(node, SH.severity) or SH.Violation
+        shape = self._shapes[node] = _Shape(path, severity)
+        path_text = '' if path is None else '->' + stringify_node(graph, path)
+        for parameter, constraint in [(SH.minCount, _MinCount), (SH.maxCount, _MaxCount)]:
+            counts = list(graph.objects(node, parameter))
+            if len(counts) > 1:
+                raise ValueError(f'Shape {node} has more than one {parameter}')
+            if counts and not (parameter == SH.minCount and int(counts[0]) == 0):
+                shape.constraints.append(constraint(int(counts[0]), path_text))
+        classes = list(graph.objects(node, SH['class']))
+        if len(classes) == 1:
+            message = f'Value does not have class {stringify_node(graph, classes[0])}'
+            shape.constraints.append(_Class(classes, message))
+        elif classes:
+            names = ', '.join(stringify_node(graph, rdf_class) for rdf_class in classes)
+            shape.constraints.append(_Class(classes, f'Value class is not in classes ({names})'))
+        datatypes = list(graph.objects(node, SH.datatype))
+        if len(datatypes) > 1:
+            raise ValueError(f'Shape {node} has more than one {SH.datatype}')
+        if datatypes:
+            message = f'Value is not Literal with datatype {stringify_node(graph, datatypes[0])}'
+            shape.constraints.append(_Datatype(datatypes[0], message))
+        for property_node in graph.objects(node, SH.property):
+            if path is not None:
+                raise ValueError(f'Property shape {node} has a {SH.property},'
+                                 ' which is not supported by the compiled SHACL engine')
+            shape.properties.append(self._compile(graph, property_node))
+        return shape
+
+    def validate(self, objects: Iterable, other_rdf: rdflib.Graph,
+                 namespaces: Mapping[str, str], report: ValidationReport,
+                 object_types: Optional[Mapping[rdflib.term.Node, List[rdflib.term.Node]]] = None,
+                 other_subjects: Optional[Container[rdflib.term.Node]] = None) -> ValidationReport:
+        """Validate a document's objects, and the non-SBOL triples that
+        go with them, against the shapes.
+
+        By default the whole document is validated. To validate part
+        of a document, pass only some of its objects, with the types
+        of the others in `object_types` so that references to them can
+        be checked, and choose which other subjects to validate with
+        `other_subjects`.
+
+        :param objects: The document's TopLevel objects and orphans
+        :param other_rdf: The document's non-SBOL triples
+        :param namespaces: The document's prefix bindings
+        :param report: The ValidationReport to be populated
+        :param object_types: The rdf:type values of SBOL objects that
+                             are not among `objects`
+        :param other_subjects: The subjects of `other_rdf` to validate,
+                               other than those of `objects`. If None,
+                               all of them are validated.
+        :return: report
+        """
+        # Non-SBOL triples, by subject and predicate
+        other: Dict[rdflib.term.Node, Dict[str, list]] = collections.defaultdict(
+            lambda: collections.defaultdict(list))
+        for subject, predicate, obj in other_rdf:
+            other[subject][str(predicate)].append(obj)
+        # Gather all objects first, so that sh:class constraints can
+        # look up the types of any object in the document
+        nodes = self._object_nodes(objects)
+        types: Dict[rdflib.term.Node, List[rdflib.term.Node]] = {}
+        for focus, values in nodes:
+            extra = other.pop(focus, None)
+            if extra:
+                for predicate, items in extra.items():
+                    values[predicate] = values.get(predicate, []) + items
+            types[focus] = values.get(RDF_TYPE, [])
+        for subject, values in other.items():
+            if other_subjects is None or subject in other_subjects:
+                nodes.append((subject, values))
+            types[subject] = values.get(RDF_TYPE, [])
+            if object_types is not None:
+                # Non-SBOL types of an SBOL object that is not
+                # being validated
+                types[subject] = types[subject] + list(object_types.get(subject, ()))
+        data = _ValidationData(self, types, self._hierarchy(other_rdf), other_rdf, namespaces, object_types)
+        for focus, values in nodes:
+            if report.limit_reached:
+                break
+            self._check(focus, values, data, report)
+        return report
+
+    def _hierarchy(self, other_rdf: rdflib.Graph) -> Dict[rdflib.term.Node, List[rdflib.term.Node]]:
+        # The class hierarchy of the shapes. As for pyshacl, the
+        # document's class hierarchy extends it.
+        if (None, rdflib.RDFS.subClassOf, None) not in other_rdf:
+            return self.hierarchy
+        hierarchy = {subclass: list(superclasses) for subclass, superclasses in self.hierarchy.items()}
+        for subclass, superclass in other_rdf.subject_objects(rdflib.RDFS.subClassOf):
+            hierarchy.setdefault(subclass, []).append(superclass)
+        return hierarchy
+
+    @staticmethod
+    def _object_nodes(objects: Iterable) -> List[Tuple[rdflib.URIRef, Dict[str, list]]]:
+        # The values of each object and the objects it owns, by
+        # property, in depth-first order
+        nodes = []
+        pending = list(objects)
+        pending.reverse()
+        while pending:
+            obj = pending.pop()
+            focus = rdflib.URIRef(obj.identity)
+            values = {prop: items for prop, items in obj._properties.items() if items}
+            for prop, children in obj._owned_objects.items():
+                if children:
+                    identities = [rdflib.URIRef(child.identity) for child in children]
+                    values[prop] = values.get(prop, []) + identities
+                    pending.extend(reversed(children))
+            nodes.append((focus, values))
+        return nodes
+
+    def _check(self, focus: rdflib.term.Node, values: Dict[str, list], data: _ValidationData,
+               report: ValidationReport) -> None:
+        # Check a focus node against the shapes that target it
+        shapes = data.class_shapes(data.types[focus])
+        for predicate in values:
+            if predicate in self.subject_targets:
+                # A shape is checked once per focus node, however
+                # it is targeted
+                shapes = tuple(dict.fromkeys(shapes + tuple(self.subject_targets[predicate])))
+        results = []
+        for shape in shapes:
+            shape.check(focus, values, data, results)
+        for severity, _, message in results:
+            if severity == SH.Violation:
+                report.addError(focus, None, message)
+            elif severity == SH.Warning:
+                report.addWarning(focus, None, message)
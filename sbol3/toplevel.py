@@ -138,15 +138,18 @@ class TopLevel(Identified):
         self._identity = self._make_identity(new_identity)
         # Set display_id of new object
         self._display_id = self._extract_display_id(self._identity)
+        self._content_changed()
+        if self._document is not None:
+            self._document._index_object(self)
 
     def clone(self, new_identity: str = None) -> 'TopLevel':
+        # Identified.__deepcopy__ copies only this object's tree, and
+        # leaves the clone without a document
         obj = copy.deepcopy(self)
         identity_map = {self.identity: obj}
         # Set identity of new object
         if new_identity is not None:
             obj.set_identity(new_identity)
-        # Drop the document pointer
-        obj.document = None
 
         obj.update_all_dependents(identity_map)
         return obj
@@ -244,4 +247,7 @@ def make_update_references_traverser(identity_map: Dict[str, Identified])\
                     # Hacky? yes, and it seems to work
                     constructor = type(items[i])
                     items[i] = constructor(new_reference)
+                    x._content_changed()
+                    if x._document is not None:
+                        x._document._object_changed(x)
     return update_references_traverser
@@ -0,0 +1,112 @@
+"""Streaming Turtle writer.
+
+rdflib's Turtle serializer needs the whole document in a Graph and
+sorts every subject before writing anything. The writer here formats
+one chunk of triples at a time, typically the tree of a single
+TopLevel, so output starts immediately and memory is bounded by the
+largest chunk.
+"""
+
+import re
+from typing import Dict, Iterable, List, Mapping, Optional, TextIO
+
+import rdflib
+
+from .ntriples import Triple
+
+# Conservative forms of the Turtle PN_PREFIX and PN_LOCAL productions.
+# Names that do not match are written as full IRIs, which is always
+# valid.
+_PREFIX = re.compile(r'(?:[A-Za-z][A-Za-z0-9_-]*)?$')
+_LOCAL_NAME = re.compile(r'(?:[A-Za-z0-9_](?:[A-Za-z0-9_.-]*[A-Za-z0-9_-])?)?$')
+
+
+class _TermFormatter:
+    """Format rdflib terms as Turtle, abbreviating IRIs with the
+    longest matching namespace prefix.
+    """
+
+    def __init__(self, namespaces: Mapping[str, str]):
+        self.namespaces = {prefix: uri for prefix, uri in namespaces.items()
+                           if _PREFIX.match(prefix)}
+        self.formatted: Dict[rdflib.term.Node, str] = {rdflib.RDF.type: 'a'}
+        # Prefixes that have been used but not yet declared
+        self.undeclared: Dict[str, str] = {}
+        self.declared = set()
+
+    def qname(self, uri: str) -> Optional[str]:
+        prefix = None
+        namespace = ''
+        for candidate, candidate_namespace in self.namespaces.items():
+            if len(candidate_namespace) > len(namespace) and uri.startswith(candidate_namespace):
+                prefix, namespace = candidate, candidate_namespace
+        if prefix is None:
+            return None
+        local_name = uri[len(namespace):]
+        if not _LOCAL_NAME.match(local_name):
+            return None
+        if prefix not in self.declared:
+            self.declared.add(prefix)
+            self.undeclared[prefix] = namespace
+        return f'{prefix}:{local_name}'
+
+    def __call__(self, term: rdflib.term.Node) -> str:
+        try:
+            return self.formatted[term]
+        except KeyError:
+            pass
+        if isinstance(term, rdflib.Literal):
+            # Literals are rarely repeated, so are not cached
+            return term.n3()
+        text = None
+        if isinstance(term, rdflib.URIRef):
+            text = self.qname(term)
+        if text is None:
+            text = term.n3()
+        self.formatted[term] = text
+        return text
+
+
+def write_turtle(chunks: Iterable[Iterable[Triple]], stream: TextIO,
+                 namespaces: Mapping[str, str]) -> None:
+    """Write triples to a text stream as Turtle.
+
+    Each chunk is written in turn, as one statement per subject in the
+    order the subjects first appear in the chunk. A subject that
+    appears in more than one chunk is written once per chunk. IRIs in
+    `namespaces` are abbreviated, and each prefix is declared just
+    before the first chunk that uses it.
+
+    :param chunks: An iterable of groups of rdflib triples
+    :param stream: A text stream opened for writing
+    :param namespaces: A mapping of prefix to namespace URI
+    :return: Nothing
+    """
+    term = _TermFormatter(namespaces)
+    for chunk in chunks:
+        subjects: Dict[rdflib.term.Node, Dict[rdflib.term.Node, List[rdflib.term.Node]]] = {}
+        for s, p, o in chunk:
+            try:
+                predicates = subjects[s]
+            except KeyError:
+                predicates = subjects[s] = {}
+            try:
+                predicates[p].append(o)
+            except KeyError:
+                predicates[p] = [o]
+        statements = []
+        for s, predicates in subjects.items():
+            # Conventionally the type comes first
+            if rdflib.RDF.type in predicates:
+                predicates = {rdflib.RDF.type: predicates.pop(rdflib.RDF.type), **predicates}
+            lines = [f'{term(p)} {", ".join(term(o) for o in objects)}'
+                     for p, objects in predicates.items()]
+            statements.append(f'{term(s)} ' + ' ;\n    '.join(lines) + ' .\n\n')
+        # Turtle allows prefixes to be declared anywhere, so declare
+        # each one just before the first statement that uses it
+        if term.undeclared:
+            for prefix, uri in term.undeclared.items():
+                stream.write(f'@prefix {prefix}: {rdflib.URIRef(uri).n3()} .\n')
+            stream.write('\n')
+            term.undeclared.clear()
+        stream.writelines(statements)
@@ -0,0 +1,170 @@
+"""Type-filtered reading for Document.read(include_types=...,
+exclude_types=...).
+
+The triples of a document are grouped by subject as usual, and the
+rdf:types of each subject tell which objects to leave out before any
+object is built. As for lazy reading, one prototype object of each
+list of rdf:types tells whether the objects are TopLevels, which
+properties own objects, and whether they are instances of the
+requested classes.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type, Union
+
+import rdflib
+
+from . import parsing
+from .constants import RDF_TYPE
+from .lazy import Subjects, _Kind
+
+# A class of SBOL objects, or an rdf:type URI
+TypeSpec = Union[Type, str]
+
+
+class TypeFilter:
+    """The types of objects to build when reading a document."""
+
+    def __init__(self, include_types: Optional[Iterable[TypeSpec]] = None,
+                 exclude_types: Optional[Iterable[TypeSpec]] = None,
+                 keep_skipped: bool = False):
+        """
+        :param include_types: The types of the TopLevel objects to
+                              build, or None for all types
+        :param exclude_types: The types of the objects, TopLevel or
+                              not, to leave out
+        :param keep_skipped: If true, keep the triples of the objects
+                             that are left out with the non-SBOL
+                             triples, so that writing the document
+                             writes them back. They are still not
+                             objects of the document: they are not
+                             found, validated or resolved as
+                             references
+        """
+        self.include = None if include_types is None else self._split(include_types)
+        self.exclude = self._split(exclude_types or ())
+        self.keep_skipped = keep_skipped
+
+    @staticmethod
+    def _split(types: Iterable[TypeSpec]) -> Tuple[Tuple[Type, ...], Set[str]]:
+        # Divide types into classes and rdf:type URIs
+        if isinstance(types, (str, type)):
+            types = [types]
+        classes = []
+        uris = set()
+        for sbol_type in types:
+            if isinstance(sbol_type, type):
+                classes.append(sbol_type)
+            elif isinstance(sbol_type, str):
+                uris.add(sbol_type)
+            else:
+                raise TypeError(f'Expected a class or a type URI, {type(sbol_type).__name__} found')
+        return tuple(classes), uris
+
+    @staticmethod
+    def _matches(prototype, types: Tuple[str, ...], spec: Tuple[Tuple[Type, ...], Set[str]]) -> bool:
+        classes, uris = spec
+        return isinstance(prototype, classes) or any(t in uris for t in types)
+
+    def apply(self, document, subjects: Subjects, other_rdf: rdflib.Graph) -> None:
+        """Remove the subjects of the objects to leave out, and the
+        links to them from the objects that own them.
+
+        :param document: The document being read
+        :param subjects: Triples grouped by subject, which are modified
+        :param other_rdf: The non-SBOL triples of the document, which
+                          receive the removed triples if keep_skipped
+                          is true
+        """
+        kind_of, skipped = self._classify(document, subjects)
+        if not skipped:
+            return
+        skipped = self._with_owned(subjects, kind_of, skipped)
+        keep = self.keep_skipped
+        for subject in skipped:
+            predicate_objects = subjects.pop(subject)
+            if keep:
+                for _, p, o in predicate_objects:
+                    other_rdf.add((subject, p, o))
+        self._unlink(subjects, kind_of, skipped, other_rdf if keep else None)
+
+    def _classify(self, document,
+                  subjects: Subjects) -> Tuple[Dict[rdflib.term.Node, _Kind], List[rdflib.term.Node]]:
+        # The kind of each SBOL subject, and the subjects to leave out
+        # by their own rdf:types
+        kinds: Dict[Tuple[str, ...], Tuple[_Kind, bool]] = {}
+        kind_of: Dict[rdflib.term.Node, _Kind] = {}
+        skipped = []
+        for subject, predicate_objects in subjects.items():
+            types = tuple(str(o) for str_p, _, o in predicate_objects if str_p == RDF_TYPE)
+            if not types:
+                continue
+            if types not in kinds:
+                kinds[types] = self._kind(document, str(subject), types)
+            kind, skip = kinds[types]
+            if not kind.is_sbol:
+                continue
+            kind_of[subject] = kind
+            if skip:
+                skipped.append(subject)
+        return kind_of, skipped
+
+    def _kind(self, document, identity: str, types: Tuple[str, ...]) -> Tuple[_Kind, bool]:
+        # The kind of a list of rdf:types, and whether to leave out
+        # its objects
+        prototype = parsing.parse_schema(document, identity, types).prototype
+        kind = _Kind(prototype)
+        skip = self._matches(prototype, types, self.exclude)
+        if self.include is not None and kind.is_top_level:
+            skip = skip or not self._matches(prototype, types, self.include)
+        return kind, skip
+
+    @staticmethod
+    def _with_owned(subjects: Subjects, kind_of: Dict[rdflib.term.Node, _Kind],
+                    skipped: List[rdflib.term.Node]) -> Dict[rdflib.term.Node, None]:
+        # The subjects left out, with the objects they own, as an
+        # ordered set
+        result = dict.fromkeys(skipped)
+        pending = list(result)
+        while pending:
+            owned = []
+            for subject in pending:
+                owned_properties = kind_of[subject].owned_properties
+                for str_p, _, o in subjects[subject]:
+                    if str_p in owned_properties and o in kind_of and o not in result:
+                        result[o] = None
+                        owned.append(o)
+            pending = owned
+        return result
+
+    @staticmethod
+    def _unlink(subjects: Subjects, kind_of: Dict[rdflib.term.Node, _Kind],
+                skipped: Dict[rdflib.term.Node, None], other_rdf: Optional[rdflib.Graph]) -> None:
+        # Unlink the objects left out from the objects that own them,
+        # keeping the links with the non-SBOL triples if other_rdf is
+        # given
+        for subject, kind in kind_of.items():
+            if subject in skipped or not kind.owned_properties:
+                continue
+            predicate_objects = subjects[subject]
+            if not any(str_p in kind.owned_properties and o in skipped for str_p, _, o in predicate_objects):
+                continue
+            kept = []
+            for triple in predicate_objects:
+                str_p, p, o = triple
+                if str_p in kind.owned_properties and o in skipped:
+                    if other_rdf is not None:
+                        other_rdf.add((subject, p, o))
+                else:
+                    kept.append(triple)
+            subjects[subject] = kept
+
+
+def make_type_filter(include_types: Optional[Iterable[TypeSpec]] = None,
+                     exclude_types: Optional[Iterable[TypeSpec]] = None,
+                     keep_skipped: bool = False) -> Optional[TypeFilter]:
+    """The TypeFilter for the types given to Document.read(), or None
+    if no types are given, so that every object is built.
+    """
+    if include_types is None and exclude_types is None:
+        return None
+    return TypeFilter(include_types, exclude_types, keep_skipped)
@@ -0,0 +1,294 @@
+"""Validating documents, see Document.validate() and
+Document.validate_shacl().
+
+A document can be validated in one process, incrementally, see
+sbol3.incremental, with a persistent cache, see
+sbol3.validation_cache, or by worker processes. Workers validate the
+TopLevel objects of a document in chunks, and validate the document
+against the SHACL shapes in shards of whole object trees. The results
+of the chunks and shards are merged in order, so the report does not
+depend on which worker finishes first.
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing
+import sys
+# import typing for typing.Sequence, which we don't want to confuse
+# with sbol3.Sequence
+import typing as pytyping
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import rdflib
+
+from .incremental import IncrementalValidator, _IssueList, _add_issues
+from .ntriples import ntriples_lines, parse_ntriples
+from .shacl import COMPILED_ENGINE, PYSHACL_ENGINE, get_shapes, run_pyshacl, validate_shard
+from .toplevel import TopLevel
+from .validation import ValidationIssue, ValidationReport
+from .validation_cache import ValidationCache
+
+# The number of chunks or shards per worker process. Several per
+# worker evens out the load when object trees differ in size.
+SHARDS_PER_WORKER = 4
+
+# The TopLevel objects inherited by forked validation workers, see
+# validate_objects()
+_worker_top_levels: List[TopLevel] = []
+
+
+def limit_report(report: Optional[ValidationReport], max_errors: Optional[int],
+                 fail_fast: bool) -> ValidationReport:
+    """The report to validate into, with the error limit, if any, that
+    was passed to Document.validate() or Document.validate_shacl().
+    """
+    if fail_fast:
+        max_errors = 1
+    if report is None:
+        return ValidationReport(max_errors)
+    if max_errors is not None:
+        report.max_errors = max_errors
+    return report
+
+
+def validate(document, report: ValidationReport, workers: int = 1,
+             incremental: bool = False, chunk_size: Optional[int] = None,
+             cache: Union[str, Path, ValidationCache, None] = None) -> ValidationReport:
+    """Validate all objects in a document, see Document.validate().
+
+    :param document: The document to validate
+    :param report: The ValidationReport to populate
+    :param workers: The number of processes to validate with
+    :param incremental: Re-use the results of unchanged TopLevels
+    :param chunk_size: The number of TopLevels each worker process
+                       validates at a time, or None to choose from the
+                       number of workers
+    :param cache: A ValidationCache, or the path of the SQLite
+                  database of one
+    :return: report
+    """
+    if workers < 1:
+        raise ValueError(f'workers must be at least 1, not {workers}')
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError(f'chunk_size must be at least 1, not {chunk_size}')
+    if cache is not None:
+        if incremental or workers > 1:
+            raise ValueError('A validation cache cannot be used with incremental or parallel validation')
+        if not isinstance(cache, ValidationCache):
+            cache = ValidationCache(cache)
+        return cache.validate(document, report)
+    if incremental:
+        if document._incremental is None:
+            document._incremental = IncrementalValidator(document)
+        return document._incremental.validate(report)
+    if workers > 1 and len(document.objects) > 1:
+        validate_objects(document, report, workers, chunk_size)
+    else:
+        for obj in document.objects:
+            if report.limit_reached:
+                break
+            obj.validate(report)
+    document.validate_shacl(report, workers=workers)
+    return report
+
+
+def validate_shacl(document, report: ValidationReport, shapes_path: Optional[str] = None,
+                   workers: int = 1, engine: str = PYSHACL_ENGINE) -> ValidationReport:
+    """Validate a document using SHACL rules, see
+    Document.validate_shacl().
+
+    :param document: The document to validate
+    :param report: The ValidationReport to populate
+    :param shapes_path: A Turtle file of SHACL shapes, or None for the
+                        SBOL3 shapes
+    :param workers: The number of processes to validate with when
+                    using the pyshacl engine
+    :param engine: 'pyshacl' or 'compiled'
+    :return: report
+    """
+    if engine not in (COMPILED_ENGINE, PYSHACL_ENGINE):
+        raise ValueError(f'Unknown SHACL engine: {engine}')
+    if engine == COMPILED_ENGINE and workers > 1:
+        raise ValueError('The compiled SHACL engine validates in a single process')
+    if report.limit_reached:
+        return report
+    shapes = get_shapes(shapes_path)
+    if engine == COMPILED_ENGINE:
+        return shapes.compiled().validate(itertools.chain(document.orphans, document.objects),
+                                          document._other_rdf, document._namespaces, report)
+    if workers > 1:
+        return validate_shacl_shards(document, report, shapes_path, workers)
+    # Save to RDF, then run SHACL over the resulting graph
+    last_error = report.max_errors is not None and report.error_count + 1 == report.max_errors
+    results_graph = run_pyshacl(document.graph(), shapes, abort_on_first=last_error)
+    if results_graph is not None:
+        document.parse_shacl_graph(results_graph, report)
+    return report
+
+
+def validate_objects(document, report: ValidationReport, workers: int,
+                     chunk_size: Optional[int]) -> ValidationReport:
+    """Validate the TopLevel objects of a document in worker
+    processes, see Document.validate().
+
+    :param document: The document to validate
+    :param report: The ValidationReport to populate
+    :param workers: The number of worker processes
+    :param chunk_size: The number of TopLevels each worker validates
+                       at a time, or None to choose from the number of
+                       workers
+    :return: report
+    """
+    top_levels = sorted(document.objects, key=lambda obj: obj.identity)
+    if chunk_size is None:
+        chunk_count = workers * SHARDS_PER_WORKER
+        chunk_size = -(-len(top_levels) // chunk_count)
+    chunks = [(start, min(start + chunk_size, len(top_levels)))
+              for start in range(0, len(top_levels), chunk_size)]
+    if sys.platform.startswith('linux'):
+        # Forked workers inherit the objects, which is much faster
+        # than pickling them, so only the chunk bounds are sent. Fork
+        # is only used on Linux: on macOS it is unsafe once system
+        # frameworks are loaded, which is why spawn is the default.
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+            initializer=_set_worker_top_levels, initargs=(top_levels,))
+    else:
+        # Chunks are pickled without the document, see
+        # Identified.__getstate__()
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        chunks = [top_levels[start:stop] for start, stop in chunks]
+    with executor:
+        # A chunk can contribute at most max_errors errors to the
+        # report, so workers stop there too
+        futures = [executor.submit(_validate_top_levels, chunk, report.max_errors)
+                   for chunk in chunks]
+        for issues in results_until_full(futures, report):
+            _add_issues(report, issues)
+    return report
+
+
+def validate_shacl_shards(document, report: ValidationReport,
+                          shapes_path: Optional[str],
+                          workers: int) -> ValidationReport:
+    """Validate a document against SHACL shapes with pyshacl, in
+    shards validated by worker processes, see
+    Document.validate_shacl().
+
+    :param document: The document to validate
+    :param report: The ValidationReport to populate
+    :param shapes_path: A Turtle file of SHACL shapes, or None for the
+                        SBOL3 shapes
+    :param workers: The number of worker processes
+    :return: report
+    """
+    shards = shacl_shards(document, workers * SHARDS_PER_WORKER)
+    if not shards:
+        return report
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(validate_shard, owned, context, shapes_path)
+                   for owned, context in shards]
+        for results in results_until_full(futures, report):
+            if results:
+                results_graph = rdflib.Graph()
+                for triple in parse_ntriples(results.splitlines()):
+                    results_graph.add(triple)
+                document.parse_shacl_graph(results_graph, report)
+    return report
+
+
+def shacl_shards(document, count: int) -> List[pytyping.Tuple[str, str]]:
+    """Partition a document for sharded SHACL validation.
+
+    Each shard holds the triples of one or more whole object trees,
+    plus the rdf:type triples of every object those trees refer
+    to. Non-SBOL triples
+    about SBOL objects go with the object's tree, and the remaining
+    non-SBOL triples form one more tree.
+
+    :param document: The document to partition
+    :param count: The desired number of shards
+    :return: A list of (owned, context) pairs of N-Triples text, see
+             sbol3.shacl.validate_shard()
+    """
+    trees = [list(top.triples()) for top in itertools.chain(document.orphans, document.objects)]
+    tree_of = {}
+    for index, tree in enumerate(trees):
+        for subject, _, _ in tree:
+            tree_of[subject] = index
+    other_rdf = []
+    for triple in document._other_rdf:
+        try:
+            trees[tree_of[triple[0]]].append(triple)
+        except KeyError:
+            other_rdf.append(triple)
+    if other_rdf:
+        trees.append(other_rdf)
+    types: Dict[rdflib.term.Node, List[rdflib.term.Node]] = collections.defaultdict(list)
+    for tree in trees:
+        for subject, predicate, obj in tree:
+            if predicate == rdflib.RDF.type:
+                types[subject].append(obj)
+    # Group consecutive trees into shards of similar size
+    shard_size = sum(len(tree) for tree in trees) / max(count, 1)
+    groups = [[]]
+    size = 0
+    for tree in trees:
+        if size >= shard_size:
+            groups.append([])
+            size = 0
+        groups[-1].append(tree)
+        size += len(tree)
+    shards = []
+    for group in groups:
+        owned = list(itertools.chain.from_iterable(group))
+        if not owned:
+            continue
+        subjects = {subject for subject, _, _ in owned}
+        referenced = {obj for _, _, obj in owned
+                      if isinstance(obj, rdflib.URIRef) and obj not in subjects and obj in types}
+        context = [(obj, rdflib.RDF.type, rdf_type) for obj in referenced for rdf_type in types[obj]]
+        shards.append((''.join(ntriples_lines(owned)), ''.join(ntriples_lines(context))))
+    return shards
+
+
+def results_until_full(futures: List[concurrent.futures.Future],
+                       report: ValidationReport) -> Iterable[Any]:
+    """The results of the futures, in order, until the report is full.
+    The futures that have not started by then are cancelled.
+    """
+    for future in futures:
+        if report.limit_reached:
+            for pending in futures:
+                pending.cancel()
+            return
+        yield future.result()
+
+
+def _set_worker_top_levels(top_levels: List[TopLevel]) -> None:
+    global _worker_top_levels
+    _worker_top_levels = top_levels
+
+
+def _validate_top_levels(chunk: Union[List[TopLevel], pytyping.Tuple[int, int]],
+                         max_errors: Optional[int] = None) -> List[ValidationIssue]:
+    """Validate TopLevel objects in a worker process, see
+    validate_objects().
+
+    :param chunk: The TopLevel objects to validate, or the (start, stop)
+                  bounds of a slice of the objects the worker inherited
+    :param max_errors: Stop after this many errors
+    :return: The errors and warnings, in the order they were reported
+    """
+    if isinstance(chunk, tuple):
+        start, stop = chunk
+        chunk = _worker_top_levels[start:stop]
+    issues = []
+    report = _IssueList(issues, max_errors)
+    for top_level in chunk:
+        if report.limit_reached:
+            break
+        top_level.validate(report)
+    return issues
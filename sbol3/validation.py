@@ -1,4 +1,9 @@
-from typing import Sequence
+import array
+import collections.abc
+import json
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, TextIO, Tuple
+
+__all__ = ['ValidationIssue', 'ValidationError', 'ValidationWarning', 'ValidationReport']
 
 
 class ValidationIssue:
@@ -34,33 +39,258 @@ class ValidationWarning(ValidationIssue):
     # All functionality is in the base class
 
 
+class _IssueSequence(collections.abc.Sequence):
+    """The issues in some rows of a ValidationReport, created as they
+    are accessed.
+    """
+
+    def __init__(self, report: 'ValidationReport', rows: Sequence[int]):
+        self._report = report
+        self._rows = rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._report._issue(row) for row in self._rows[index]]
+        return self._report._issue(self._rows[index])
+
+    def __iter__(self):
+        issue = self._report._issue
+        for row in self._rows:
+            yield issue(row)
+
+
+class _IssueIndex(collections.abc.Mapping):
+    """The issues of a ValidationReport grouped by object identity or
+    rule id, see ValidationReport.by_object() and by_rule().
+    """
+
+    def __init__(self, report: 'ValidationReport', index: Dict[Any, array.array]):
+        self._report = report
+        self._index = index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, key) -> Sequence[ValidationIssue]:
+        try:
+            rows = self._index[key]
+        except (KeyError, TypeError):
+            raise KeyError(key) from None
+        return _IssueSequence(self._report, rows)
+
+    def __iter__(self):
+        return iter(self._index)
+
+
 class ValidationReport:
+    """The errors and warnings found by validation.
 
-    def __init__(self):
-        self._errors = []
-        self._warnings = []
+    Issues are stored compactly: each object identity, rule id and
+    message is stored once, and each issue refers to them. The
+    ValidationError and ValidationWarning objects are created as the
+    issues are accessed. Issues are also indexed by object identity
+    and by rule id, see by_object() and by_rule().
+
+    If a stream is given, issues are written to it as JSON lines
+    instead of being stored, see write_jsonl(). Only the number of
+    issues, and their counts by rule id, are kept.
+
+    If max_errors is set, the report stops recording issues once it
+    holds that many errors, and validation stops as soon as it can.
+    """
+
+    _ERROR = 0
+    _WARNING = 1
+
+    def __init__(self, max_errors: Optional[int] = None,
+                 stream: Optional[TextIO] = None):
+        """
+        :param max_errors: The number of errors after which validation
+                           stops, or None to find all issues
+        :param stream: A text file to write issues to as JSON lines,
+                       instead of storing them
+        :raises ValueError: If max_errors is less than 1
+        """
+        self.max_errors = max_errors
+        self._stream = stream
+        self._error_count = 0
+        self._warning_count = 0
+        self._rule_counts: Dict[Any, int] = {}
+        # Interned object identities, rule ids and messages, by type
+        # and value so that equal values of different types, such as
+        # a str and a URIRef, are kept apart
+        self._values: List[Any] = []
+        self._ids: Dict[Tuple[type, Any], int] = {}
+        # The issues, one row per issue, as columns of interned values
+        self._severities = array.array('b')
+        self._objects = array.array('i')
+        self._rules = array.array('i')
+        self._messages = array.array('i')
+        # The rows of the issues of each object identity and rule id,
+        # which can be looked up by any equal value
+        self._by_object: Dict[Any, array.array] = {}
+        self._by_rule: Dict[Any, array.array] = {}
 
     def __len__(self):
-        return len(self._errors) + len(self._warnings)
+        return self._error_count + self._warning_count
 
     def __iter__(self):
-        yield from self._errors
-        yield from self._warnings
+        yield from self._issues(self._ERROR)
+        yield from self._issues(self._WARNING)
 
     def __str__(self):
-        issues = self._errors + self._warnings
-        return '\n'.join([str(i) for i in issues])
+        return '\n'.join([str(i) for i in self])
 
     @property
     def warnings(self) -> Sequence[ValidationWarning]:
-        return tuple(self._warnings)
+        return tuple(self._issues(self._WARNING))
 
     @property
     def errors(self) -> Sequence[ValidationError]:
-        return tuple(self._errors)
+        return tuple(self._issues(self._ERROR))
+
+    @property
+    def error_count(self) -> int:
+        """The number of errors. Unlike len(errors), the errors are
+        not built, and the count is also kept when issues are streamed.
+        """
+        return self._error_count
+
+    @property
+    def warning_count(self) -> int:
+        """The number of warnings. Unlike len(warnings), the warnings are
+        not built, and the count is also kept when issues are streamed.
+        """
+        return self._warning_count
+
+    @property
+    def max_errors(self) -> Optional[int]:
+        return self._max_errors
+
+    @max_errors.setter
+    def max_errors(self, value: Optional[int]) -> None:
+        if value is not None and value < 1:
+            raise ValueError(f'max_errors must be at least 1, not {value}')
+        self._max_errors = value
+
+    @property
+    def limit_reached(self) -> bool:
+        """Whether the report holds max_errors errors, so that no more
+        issues are recorded.
+        """
+        return self._max_errors is not None and self._error_count >= self._max_errors
+
+    def by_object(self) -> Mapping[Any, Sequence[ValidationIssue]]:
+        """The issues grouped by object identity.
+
+        The grouping is a view of the report, and changes as issues
+        are added.
+
+        :return: A mapping from each object identity to its issues, in
+                 the order they were reported
+        """
+        return _IssueIndex(self, self._by_object)
+
+    def by_rule(self) -> Mapping[Any, Sequence[ValidationIssue]]:
+        """The issues grouped by rule id. Issues without a rule id,
+        such as SHACL results, are grouped under None.
+
+        The grouping is a view of the report, and changes as issues
+        are added.
+
+        :return: A mapping from each rule id to its issues, in the
+                 order they were reported
+        """
+        return _IssueIndex(self, self._by_rule)
+
+    def counts(self) -> Dict[Any, int]:
+        """Count the issues of each rule id. Unlike by_rule(), the
+        counts are also kept when issues are streamed.
+
+        :return: A dictionary from each rule id to its number of issues
+        """
+        return dict(self._rule_counts)
+
+    def write_jsonl(self, stream: TextIO) -> None:
+        """Write the issues as JSON lines, errors first.
+
+        Each line is an object with "severity" ("error" or "warning"),
+        "object_id", "rule_id" and "message". Identities and rule ids
+        are written as strings, or null if they are not set.
+
+        :param stream: The text file to write to
+        """
+        for severity in (self._ERROR, self._WARNING):
+            for row in self._rows(severity):
+                stream.write(self._jsonl(severity, self._values[self._objects[row]],
+                                         self._values[self._rules[row]],
+                                         self._values[self._messages[row]]))
 
     def addError(self, object_id, rule_id, message):
-        self._errors.append(ValidationError(object_id, rule_id, message))
+        if not self.limit_reached:
+            self._error_count += 1
+            self._add(self._ERROR, object_id, rule_id, message)
 
     def addWarning(self, object_id, rule_id, message):
-        self._warnings.append(ValidationWarning(object_id, rule_id, message))
+        if not self.limit_reached:
+            self._warning_count += 1
+            self._add(self._WARNING, object_id, rule_id, message)
+
+    def _add(self, severity: int, object_id, rule_id, message) -> None:
+        rule_counts = self._rule_counts
+        rule_counts[rule_id] = rule_counts.get(rule_id, 0) + 1
+        if self._stream is not None:
+            self._stream.write(self._jsonl(severity, object_id, rule_id, message))
+            return
+        row = len(self._severities)
+        object_key = self._intern(object_id)
+        rule_key = self._intern(rule_id)
+        self._severities.append(severity)
+        self._objects.append(object_key)
+        self._rules.append(rule_key)
+        self._messages.append(self._intern(message))
+        rows = self._by_object.get(object_id)
+        if rows is None:
+            rows = self._by_object[object_id] = array.array('i')
+        rows.append(row)
+        rows = self._by_rule.get(rule_id)
+        if rows is None:
+            rows = self._by_rule[rule_id] = array.array('i')
+        rows.append(row)
+
+    def _intern(self, value) -> int:
+        id_key = type(value), value
+        key = self._ids.get(id_key)
+        if key is None:
+            key = self._ids[id_key] = len(self._values)
+            self._values.append(value)
+        return key
+
+    def _rows(self, severity: int) -> Iterator[int]:
+        return (row for row, row_severity in enumerate(self._severities)
+                if row_severity == severity)
+
+    def _issues(self, severity: int) -> Iterator[ValidationIssue]:
+        issue_class = ValidationError if severity == self._ERROR else ValidationWarning
+        values = self._values
+        for row_severity, object_key, rule_key, message_key in zip(self._severities, self._objects,
+                                                                   self._rules, self._messages):
+            if row_severity == severity:
+                yield issue_class(values[object_key], values[rule_key], values[message_key])
+
+    def _issue(self, row: int) -> ValidationIssue:
+        issue_class = ValidationError if self._severities[row] == self._ERROR else ValidationWarning
+        return issue_class(self._values[self._objects[row]], self._values[self._rules[row]],
+                           self._values[self._messages[row]])
+
+    def _jsonl(self, severity: int, object_id, rule_id, message) -> str:
+        issue = {
+            'severity': 'error' if severity == self._ERROR else 'warning',
+            'object_id': None if object_id is None else str(object_id),
+            'rule_id': None if rule_id is None else str(rule_id),
+            'message': message,
+        }
+        return json.dumps(issue) + '\n'
@@ -0,0 +1,236 @@
+"""A persistent cache of validation results, for
+Document.validate(cache=...).
+
+The results of validating each TopLevel object tree are stored in an
+SQLite database, keyed by a fingerprint of everything they depend on:
+the tree's triples and the classes of its objects, the types
+of the objects it refers to, the document's prefixes and class
+hierarchy, the SHACL shapes and the version of pySBOL3. Trees whose
+fingerprint is in the cache are not validated again.
+
+As for incremental validation, custom validate() methods must look
+only at the object being validated and the objects it owns. The
+fingerprint includes the class of each object but not the code of
+its validate() method, so clear the cache when custom validation
+changes.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import rdflib
+
+from . import __version__
+from .incremental import (Issues, _assemble_report, _IssueList, _ObjectTypes, _TreeResults,
+                          _validate_trees_shacl)
+from .ntriples import _term_text, ntriples_lines
+from .shacl import get_shapes
+from .validation import ValidationError, ValidationReport, ValidationWarning
+
+# Changes whenever the fingerprints or the stored results change
+# format, so that older entries are no longer used
+_CACHE_FORMAT = 2
+
+# SQLite limits the number of parameters of a statement
+_BATCH_SIZE = 500
+
+# Blank node labels differ each time a file is read, so blank nodes are
+# fingerprinted as this one node
+_BLANK = rdflib.BNode('blank')
+
+Triple = Tuple[rdflib.term.Node, rdflib.term.Node, rdflib.term.Node]
+
+
+def _fingerprint_lines(triples: Iterable[Triple]) -> bytes:
+    triples = (tuple(_BLANK if isinstance(term, rdflib.BNode) else term for term in triple)
+               for triple in triples)
+    return ''.join(sorted(ntriples_lines(triples))).encode()
+
+
+def _encode_issues(issues: Issues) -> list:
+    return [[isinstance(issue, ValidationWarning), issue.object_id,
+             isinstance(issue.object_id, rdflib.URIRef), issue.rule_id, issue.message]
+            for issue in issues]
+
+
+def _decode_issues(encoded: list) -> Issues:
+    issues = []
+    for is_warning, object_id, is_uri, rule_id, message in encoded:
+        if is_uri:
+            object_id = rdflib.URIRef(object_id)
+        issue_class = ValidationWarning if is_warning else ValidationError
+        issues.append(issue_class(object_id, rule_id, message))
+    return issues
+
+
+class ValidationCache:
+    """A persistent cache of validation results, stored in an SQLite
+    database. See Document.validate().
+
+    Entries that have not been used for max_age seconds are evicted,
+    and then the least recently used entries are evicted while the
+    stored results take up more than max_size bytes. Eviction runs
+    after each validation that uses the cache.
+    """
+
+    def __init__(self, path: Union[str, Path], max_size: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        """
+        :param path: The SQLite database file, created if necessary
+        :param max_size: The size in bytes to limit the stored results
+                         to, or None for no limit
+        :param max_age: The number of seconds after which an unused
+                        entry is evicted, or None for no limit
+        """
+        self.path = os.fspath(path)
+        self.max_size = max_size
+        self.max_age = max_age
+        with self._connect() as connection:
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                                   'key TEXT PRIMARY KEY, issues TEXT NOT NULL, used REAL NOT NULL)')
+
+    def _connect(self) -> contextlib.closing:
+        # The connection is closed when the with statement ends. Within
+        # it, using the connection as a context manager commits a
+        # transaction, or rolls it back on error.
+        return contextlib.closing(sqlite3.connect(self.path))
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def get(self, keys: List[str]) -> Dict[str, Tuple[Issues, Issues]]:
+        """Look up the results of object trees, and mark them as used.
+
+        :param keys: The fingerprints of the trees
+        :return: The (Python, SHACL) issues of the trees that are in
+                 the cache, by fingerprint
+        """
+        results = {}
+        now = time.time()
+        with self._connect() as connection:
+            with connection:
+                for start in range(0, len(keys), _BATCH_SIZE):
+                    batch = keys[start:start + _BATCH_SIZE]
+                    marks = ','.join('?' * len(batch))
+                    rows = connection.execute(f'SELECT key, issues FROM results WHERE key IN ({marks})', batch)
+                    for key, issues in rows:
+                        python_issues, shacl_issues = json.loads(issues)
+                        results[key] = (_decode_issues(python_issues), _decode_issues(shacl_issues))
+                    connection.execute(f'UPDATE results SET used = ? WHERE key IN ({marks})', [now] + batch)
+        return results
+
+    def put(self, results: Mapping[str, Tuple[Issues, Issues]]) -> None:
+        """Store the results of object trees.
+
+        :param results: The (Python, SHACL) issues of the trees, by
+                        fingerprint
+        """
+        now = time.time()
+        rows = [(key, json.dumps([_encode_issues(python_issues), _encode_issues(shacl_issues)]), now)
+                for key, (python_issues, shacl_issues) in results.items()]
+        with self._connect() as connection:
+            with connection:
+                connection.executemany('INSERT OR REPLACE INTO results (key, issues, used) VALUES (?, ?, ?)',
+                                       rows)
+
+    def evict(self) -> None:
+        """Evict entries by age and by size, see ValidationCache."""
+        with self._connect() as connection:
+            with connection:
+                if self.max_age is not None:
+                    connection.execute('DELETE FROM results WHERE used < ?', (time.time() - self.max_age,))
+                if self.max_size is None:
+                    return
+                size_sql = 'LENGTH(key) + LENGTH(issues)'
+                total = connection.execute(f'SELECT COALESCE(SUM({size_sql}), 0) FROM results').fetchone()[0]
+                evicted = []
+                for key, size in connection.execute(f'SELECT key, {size_sql} FROM results ORDER BY used'):
+                    if total <= self.max_size:
+                        break
+                    evicted.append((key,))
+                    total -= size
+                connection.executemany('DELETE FROM results WHERE key = ?', evicted)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._connect() as connection:
+            with connection:
+                connection.execute('DELETE FROM results')
+
+    def validate(self, document, report: ValidationReport) -> ValidationReport:
+        """Validate a document, as Document.validate() does, re-using
+        the cached results of its unchanged TopLevel object trees.
+
+        :param document: The document to validate
+        :param report: The ValidationReport to be populated
+        :return: report
+        """
+        shapes = get_shapes()
+        compiled = shapes.compiled()
+        object_types = _ObjectTypes(document)
+        # Non-SBOL triples, by subject
+        other_rdf: Dict[rdflib.term.Node, List[Triple]] = {}
+        for triple in document._other_rdf:
+            other_rdf.setdefault(triple[0], []).append(triple)
+        context = hashlib.sha256()
+        context.update(f'{_CACHE_FORMAT} {__version__} {shapes.digest}\n'.encode())
+        context.update(''.join(f'{prefix} {uri}\n'
+                               for prefix, uri in sorted(document._namespaces.items())).encode())
+        # The document's class hierarchy extends that of the shapes
+        context.update(_fingerprint_lines(document._other_rdf.triples((None, rdflib.RDFS.subClassOf,
+                                                                       None))))
+        trees = [_TreeResults(top_level) for top_level in document.objects]
+        keys = [self._key(context.copy(), tree, object_types, other_rdf) for tree in trees]
+        cached = self.get(keys)
+        misses = {}
+        for key, tree in zip(keys, trees):
+            if key in cached:
+                tree.python_issues, tree.shacl_issues = cached[key]
+            else:
+                tree.top_level.validate(_IssueList(tree.python_issues))
+                misses[key] = tree
+        if misses:
+            _validate_trees_shacl(compiled, document, list(misses.values()), object_types)
+            self.put({key: (tree.python_issues, tree.shacl_issues) for key, tree in misses.items()})
+        self.evict()
+        return _assemble_report(compiled, document, trees, object_types, report)
+
+    @staticmethod
+    def _key(context, tree: _TreeResults, object_types: _ObjectTypes,
+             other_rdf: Mapping[rdflib.term.Node, List[Triple]]) -> str:
+        # The fingerprint of a tree, see the module documentation.
+        # Objects and properties are listed in a canonical order, but
+        # the values of each property are kept in their order, as
+        # validation can depend on it.
+        lines = []
+        triples = []
+        for obj in sorted(tree.objects, key=lambda obj: obj.identity):
+            subject = f'<{obj.identity}> '
+            lines.append(f'{subject}{type(obj).__module__}.{type(obj).__qualname__}\n')
+            # The triples of the object, formatted as N-Triples but
+            # directly from its property stores. Repeated values are
+            # kept, as validate() methods see them.
+            for prop, items in sorted(obj._properties.items()):
+                predicate = f'{subject}<{prop}> '
+                for item in items:
+                    lines.append(predicate + _term_text(item))
+            for prop, children in sorted(obj._owned_objects.items()):
+                predicate = f'{subject}<{prop}> '
+                for child in children:
+                    lines.append(f'{predicate}<{child.identity}> .\n')
+            if other_rdf:
+                triples.extend(other_rdf.get(rdflib.URIRef(obj.identity), ()))
+        for reference in tree.references:
+            triples.extend((reference, rdflib.RDF.type, value) for value in object_types.get(reference, ()))
+            triples.extend(triple for triple in other_rdf.get(reference, ()) if triple[1] == rdflib.RDF.type)
+        context.update(''.join(lines).encode())
+        context.update(_fingerprint_lines(triples))
+        return context.hexdigest()
@@ -0,0 +1,92 @@
+"""Writing documents, see Document.write() and Document.write_string().
+
+N-Triples and sorted N-Triples are written straight from the property
+stores of the objects, one object tree at a time, see sbol3.ntriples.
+Turtle is written the same way on request, see sbol3.turtle. Other
+formats, and Turtle by default, are serialized by rdflib from the
+document's graph.
+"""
+
+import io
+import itertools
+# import typing for typing.Sequence, which we don't want to confuse
+# with sbol3.Sequence
+import typing as pytyping
+from typing import Optional
+
+from .constants import JSONLD, NTRIPLES, SORTED_NTRIPLES, TURTLE
+from .ntriples import write_ntriples
+from .parsing import is_binary
+from .turtle import write_turtle
+
+# rdflib format names for Turtle, as given by users or guessed from
+# a file extension
+TURTLE_FORMATS = {TURTLE, 'turtle'}
+
+# Formats that Document.write() can stream one object tree at a time
+STREAMED_FORMATS = {NTRIPLES, SORTED_NTRIPLES} | TURTLE_FORMATS
+
+
+def write_location(document, fpath: str, file_format: str, stream_turtle: bool = False) -> None:
+    """Write a document to a file path, see Document.write()."""
+    if file_format in STREAMED_FORMATS:
+        with open(fpath, 'w', encoding='utf-8') as outfile:
+            write_text(document, outfile, file_format, stream_turtle)
+    else:
+        with open(fpath, 'wb') as outfile:
+            serialize(document, file_format, outfile)
+
+
+def write_stream(document, stream: pytyping.IO, file_format: str, stream_turtle: bool = False) -> None:
+    """Write a document to a file object in text or binary mode,
+    leaving it open.
+    """
+    if not is_binary(stream):
+        write_text(document, stream, file_format, stream_turtle)
+    elif file_format in STREAMED_FORMATS:
+        # Encode the text as it is written, then release the
+        # caller's stream without closing it
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        try:
+            write_text(document, text_stream, file_format, stream_turtle)
+        finally:
+            text_stream.flush()
+            text_stream.detach()
+    else:
+        serialize(document, file_format, stream)
+
+
+def write_text(document, stream: pytyping.TextIO, file_format: str, stream_turtle: bool = False) -> None:
+    """Write a document to a text stream. Turtle is only written one
+    object tree at a time if stream_turtle is true, otherwise it is
+    written as write_string() returns it.
+    """
+    if file_format in (NTRIPLES, SORTED_NTRIPLES):
+        # N-Triples are formatted straight from the property stores and
+        # streamed. Sorted N-Triples are sorted in bounded memory, see
+        # sbol3.ntriples.sort_lines()
+        write_ntriples(document.triples(), stream,
+                       sort=file_format == SORTED_NTRIPLES)
+    elif file_format in TURTLE_FORMATS and stream_turtle:
+        # Write each object tree as it is generated, rather than
+        # building the whole document as a Graph first
+        trees = (obj.triples() for obj in itertools.chain(document.orphans, document.objects))
+        write_turtle(itertools.chain(trees, [document._other_rdf]), stream, document._namespaces)
+    else:
+        stream.write(document.write_string(file_format))
+
+
+def serialize(document, file_format: str, destination: pytyping.BinaryIO = None) -> Optional[bytes]:
+    """Serialize a document via an rdflib Graph. If a destination is
+    given rdflib writes the encoded output straight to it, otherwise
+    the output is returned.
+    """
+    graph = document.graph()
+    kwargs = {}
+    if file_format == JSONLD:
+        kwargs['context'] = {f'@{prefix}': uri for prefix, uri in document._namespaces.items()}
+    if destination is None:
+        return graph.serialize(format=file_format, **kwargs)
+    graph.serialize(destination=destination, format=file_format,
+                    encoding='utf-8', **kwargs)
+    return None
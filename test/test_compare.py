@@ -0,0 +1,141 @@
+import io
+import os
+import tempfile
+import unittest
+
+import rdflib
+
+import sbol3
+
+
+class TestDiff(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    @staticmethod
+    def make_document() -> sbol3.Document:
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('s1', elements='acgt', encoding=sbol3.IUPAC_DNA_ENCODING)
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])
+        c1.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 1, 2)]))
+        c2 = sbol3.Component('c2', sbol3.SBO_DNA)
+        doc.add([seq, c1, c2])
+        return doc
+
+    def test_identical(self):
+        doc = self.make_document()
+        result = sbol3.diff(doc, self.make_document())
+        self.assertFalse(result)
+        self.assertEqual('', str(result))
+        result = sbol3.diff(doc, doc.copy())
+        self.assertFalse(result)
+
+    def test_diff(self):
+        doc1 = self.make_document()
+        doc2 = self.make_document()
+        doc2.remove_object(doc2.find('c2'))
+        doc2.add(sbol3.Component('c3', sbol3.SBO_RNA))
+        c1 = doc2.find('c1')
+        c1.types = [sbol3.SBO_RNA]
+        c1.name = 'Component 1'
+        range2 = c1.features[0].locations[0]
+        range2.end = 3
+        c1.features.append(sbol3.SubComponent(doc2.find('c3')))
+        result = sbol3.diff(doc1, doc2)
+        self.assertTrue(result)
+        self.assertEqual([doc1.find('c2').identity], result.removed)
+        self.assertEqual([doc2.find('c3').identity], result.added)
+        self.assertEqual([c1.identity], list(result.changed))
+        subcomponent = c1.features[1]
+        expected = [
+            sbol3.PropertyDifference(rdflib.URIRef(c1.identity), sbol3.SBOL_FEATURES, [],
+                                     [rdflib.URIRef(subcomponent.identity)]),
+            sbol3.PropertyDifference(rdflib.URIRef(c1.identity), sbol3.SBOL_NAME, [],
+                                     [rdflib.Literal('Component 1')]),
+            sbol3.PropertyDifference(rdflib.URIRef(c1.identity), sbol3.SBOL_TYPE,
+                                     [rdflib.URIRef(sbol3.SBO_DNA)], [rdflib.URIRef(sbol3.SBO_RNA)]),
+            sbol3.PropertyDifference(rdflib.URIRef(range2.identity), sbol3.SBOL_END,
+                                     [rdflib.Literal(2)], [rdflib.Literal(3)]),
+        ]
+        differences = result.changed[c1.identity]
+        self.assertEqual(expected, differences[:4])
+        # The properties of an added owned object are all added
+        added = [d for d in differences[4:] if d.identity == rdflib.URIRef(subcomponent.identity)]
+        self.assertEqual(differences[4:], added)
+        self.assertIn(sbol3.PropertyDifference(rdflib.URIRef(subcomponent.identity),
+                                               sbol3.SBOL_INSTANCE_OF, [],
+                                               [rdflib.URIRef(doc2.find('c3').identity)]),
+                      added)
+        self.assertTrue(all(not d.removed for d in added))
+        self.assertIn(f'Changed {c1.identity}', str(result))
+
+    def test_order(self):
+        # The order of values is not significant
+        doc1 = self.make_document()
+        doc2 = self.make_document()
+        doc1.find('c2').roles = [sbol3.SO_PROMOTER, sbol3.SO_CDS]
+        doc2.find('c2').roles = [sbol3.SO_CDS, sbol3.SO_PROMOTER]
+        self.assertFalse(sbol3.diff(doc1, doc2))
+
+    def test_other_rdf(self):
+        doc1 = self.make_document()
+        doc2 = self.make_document()
+        subject = rdflib.URIRef('https://example.org/thing')
+        doc2._other_rdf.add((subject, rdflib.RDFS.label, rdflib.Literal('thing')))
+        result = sbol3.diff(doc1, doc2)
+        self.assertEqual([sbol3.PropertyDifference(subject, str(rdflib.RDFS.label), [],
+                                                   [rdflib.Literal('thing')])],
+                         result.other_rdf)
+        self.assertFalse(result.changed)
+
+    def test_orphans(self):
+        # Orphans are compared by identity, like TopLevel objects
+        data = self.make_document().write_string(sbol3.SORTED_NTRIPLES)
+        # Unlink the feature from its owner, so that it and the
+        # location it owns are read as orphans
+        data = data.replace(f'<{sbol3.SBOL_FEATURES}>', f'<{sbol3.SBOL_NAME}>')
+        doc1 = sbol3.Document()
+        doc1.read_string(data, sbol3.NTRIPLES)
+        self.assertEqual(2, len(doc1.orphans))
+        feature = next(obj for obj in doc1.orphans if isinstance(obj, sbol3.SequenceFeature))
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.NTRIPLES)
+        self.assertFalse(sbol3.diff(doc1, doc2))
+        # A change to the location is reported once, with its owner
+        location = next(obj for obj in doc2.orphans if isinstance(obj, sbol3.Range))
+        location.end = 3
+        result = sbol3.diff(doc1, doc2)
+        self.assertEqual([feature.identity], list(result.changed))
+        self.assertEqual([sbol3.PropertyDifference(rdflib.URIRef(location.identity), sbol3.SBOL_END,
+                                                   [rdflib.Literal(2)], [rdflib.Literal(3)])],
+                         result.changed[feature.identity])
+        doc2.orphans.clear()
+        result = sbol3.diff(doc1, doc2)
+        self.assertEqual([feature.identity], result.removed)
+        self.assertEqual([feature.identity], sbol3.diff(doc2, doc1).added)
+
+    def test_files(self):
+        doc1 = self.make_document()
+        doc2 = self.make_document()
+        doc2.find('c2').name = 'c2'
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path1 = os.path.join(tmpdir, 'doc1.nt')
+            doc1.write(path1)
+            path2 = os.path.join(tmpdir, 'doc2.nt')
+            doc2.write(path2)
+            result = sbol3.diff(path1, path2)
+            self.assertEqual(result.changed, sbol3.diff(path1, doc2).changed)
+            # File objects can be compared too
+            data = doc2.write_string(sbol3.NTRIPLES)
+            with open(path2, 'rb') as stream:
+                self.assertFalse(sbol3.diff(io.StringIO(data), stream, file_format=sbol3.NTRIPLES))
+        self.assertEqual([doc2.find('c2').identity], list(result.changed))
+        self.assertFalse(result.added or result.removed)
+
+
+if __name__ == '__main__':
+    unittest.main()
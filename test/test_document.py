@@ -1,11 +1,15 @@
+import copy
+import io
 import logging
 import os
+import pickle
 import tempfile
 import unittest
 from pathlib import Path
 from typing import Optional
 
 import rdflib
+import rdflib.compare
 
 import sbol3
 
@@ -63,6 +67,17 @@ class TestDocument(unittest.TestCase):
             test_file = Path(tmpdirname) / filename
             doc.write(test_file, sbol3.NTRIPLES)
 
+    def test_read_ntriples_url(self):
+        # N-Triples at a URL are read by rdflib rather than streamed
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        doc.add(sbol3.Sequence('seq1', elements='acgt'))
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            test_file = Path(tmpdirname) / 'seq.nt'
+            doc.write(test_file)
+            doc2 = sbol3.Document.open(test_file.as_uri(), sbol3.NTRIPLES)
+        self.assertEqual('acgt', doc2.find('seq1').elements)
+
     def test_read_turtle(self):
         # Initial test of Document.read
         test_path = os.path.join(SBOL3_LOCATION, 'entity', 'model',
@@ -138,6 +153,29 @@ class TestDocument(unittest.TestCase):
         with self.assertRaises(TypeError):
             doc.add(objects)
 
+    def test_add_all_checked_first(self):
+        # A batch with a duplicate identity is rejected before any
+        # of its objects are added to the document
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        c1 = sbol3.Component('c1', types=[sbol3.SBO_DNA])
+        doc.add(c1)
+        batch = [sbol3.Sequence('s1'),
+                 sbol3.Component('c1', types=[sbol3.SBO_DNA])]
+        with self.assertRaises(ValueError):
+            doc.add(batch)
+        self.assertEqual(1, len(doc))
+        self.assertIsNone(batch[0].document)
+        batch = [sbol3.Sequence('s2'), sbol3.Sequence('s2')]
+        with self.assertRaises(ValueError):
+            doc.add(batch)
+        self.assertEqual(1, len(doc))
+        # Generators are accepted as well as sequences
+        doc.add(sbol3.Sequence(f's{i}') for i in range(3, 6))
+        self.assertEqual(4, len(doc))
+        for i in range(3, 6):
+            self.assertIsInstance(doc.find(f's{i}'), sbol3.Sequence)
+
     def test_write(self):
         sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
         doc = sbol3.Document()
@@ -223,6 +261,63 @@ class TestDocument(unittest.TestCase):
         actual = doc.write_string(sbol3.SORTED_NTRIPLES)
         self.assertEqual(expected, actual)
 
+    def test_write_file_object(self):
+        # Document.write accepts text and binary file objects, and
+        # leaves them open
+        test_path = os.path.join(TEST_RESOURCE_DIR, 'mixed-rdf.nt')
+        doc = sbol3.Document()
+        doc.read(test_path)
+        expected = doc.graph()
+        for file_format in [sbol3.SORTED_NTRIPLES, sbol3.TURTLE, sbol3.RDF_XML, sbol3.JSONLD]:
+            text_stream = io.StringIO()
+            doc.write(text_stream, file_format)
+            binary_stream = io.BytesIO()
+            doc.write(binary_stream, file_format)
+            self.assertFalse(binary_stream.closed)
+            self.assertEqual(text_stream.getvalue().encode(), binary_stream.getvalue())
+            self.assertEqual(doc.write_string(file_format), text_stream.getvalue())
+        # Turtle can be written one object tree at a time, in another
+        # order
+        for stream in [io.StringIO(), io.BytesIO()]:
+            doc.write(stream, sbol3.TURTLE, stream_turtle=True)
+            actual = rdflib.Graph()
+            actual.parse(data=stream.getvalue(), format=sbol3.TURTLE)
+            self.assertTrue(rdflib.compare.isomorphic(expected, actual))
+        # The format is guessed from the name of a file object
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            test_file = os.path.join(tmpdirname, 'out.ttl')
+            with open(test_file, 'wb') as outfile:
+                doc.write(outfile)
+            with open(test_file, encoding='utf-8') as infile:
+                self.assertEqual(doc.write_string(sbol3.TURTLE), infile.read())
+        with self.assertRaises(ValueError):
+            doc.write(io.StringIO())
+
+    def test_read_file_object(self):
+        # Document.read accepts text and binary file objects, and bytes
+        test_path = os.path.join(TEST_RESOURCE_DIR, 'circuit.nt')
+        expected = sbol3.Document()
+        expected.read(test_path)
+        ttl_data = expected.write_string(sbol3.TURTLE)
+        with open(test_path, 'rb') as infile:
+            nt_data = infile.read()
+        sources = [(io.BytesIO(nt_data), sbol3.NTRIPLES),
+                   (io.StringIO(nt_data.decode()), sbol3.SORTED_NTRIPLES),
+                   (nt_data, sbol3.NTRIPLES),
+                   (io.StringIO(ttl_data), sbol3.TURTLE),
+                   (ttl_data.encode(), sbol3.TURTLE)]
+        for source, file_format in sources:
+            doc = sbol3.Document()
+            doc.read(source, file_format)
+            self.assertEqual(len(expected), len(doc))
+            self.assertTrue(rdflib.compare.isomorphic(expected.graph(), doc.graph()))
+        with open(test_path, 'rb') as infile:
+            doc = sbol3.Document()
+            doc.read(infile)
+        self.assertEqual(len(expected), len(doc))
+        with self.assertRaises(ValueError):
+            sbol3.Document().read(nt_data)
+
     def test_validate(self):
         # Test the document level validation
         # This should validate all the objects in the document
@@ -348,6 +443,43 @@ class TestDocument(unittest.TestCase):
         self.assertIsNotNone(c2)
         self.assertEqual([sbol3.SBO_PROTEIN], c2.types)
 
+    def test_other_rdf_subjects(self):
+        # Only the triples of non-SBOL subjects are kept as other RDF
+        test_file = os.path.join(TEST_RESOURCE_DIR, 'mixed-rdf.nt')
+        doc = sbol3.Document()
+        doc.read(test_file)
+        self.assertEqual(3, len(doc._other_rdf))
+        person = rdflib.URIRef('http://example.com/foaf/pparker')
+        self.assertEqual({person}, set(doc._other_rdf.subjects()))
+        self.assertIn('group triples', doc.parse_timings)
+
+    def test_orphans(self):
+        # Objects with an SBOL type that are not reachable from any
+        # TopLevel are kept as orphans and written back out
+        data = """
+@prefix sbol: <http://sbols.org/v3#> .
+@prefix ex: <http://example.com/fake/> .
+<http://example.com/sbol3/c1> a sbol:Component ;
+    sbol:displayId "c1" ;
+    sbol:hasNamespace <http://example.com/sbol3> ;
+    sbol:type <https://identifiers.org/SBO:0000251> ;
+    ex:hasAnnotation <http://example.com/sbol3/c1/a1> .
+<http://example.com/sbol3/c1/a1> a sbol:Identified, ex:Annotation ;
+    sbol:displayId "a1" .
+"""
+        doc = sbol3.Document()
+        doc.read_string(data, sbol3.TURTLE)
+        self.assertEqual(1, len(doc.objects))
+        self.assertEqual(1, len(doc.orphans))
+        orphan = doc.orphans[0]
+        self.assertNotIsInstance(orphan, sbol3.TopLevel)
+        self.assertIsNone(doc.find(orphan.identity))
+        self.assertIn(f'<{orphan.identity}>',
+                      doc.write_string(sbol3.SORTED_NTRIPLES))
+        # Each load phase is timed
+        self.assertIn('parse rdf', doc.parse_timings)
+        self.assertIn('gather orphans', doc.parse_timings)
+
     def test_multi_type_sbol(self):
         # Load a file that includes an SBOL object that has multiple other
         # rdf:type properties
@@ -724,6 +856,105 @@ class TestDocument(unittest.TestCase):
         # Verify that the serializations are identical
         self.assertEqual(doc1_string, doc2_string)
 
+    def test_pickle(self):
+        # Pickling an object does not pickle its document, but
+        # pickling a document restores the document of its objects
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        c1 = sbol3.Component('c1', types=[sbol3.SBO_DNA])
+        c1.features.append(sbol3.SubComponent('https://example.com/instance/i1'))
+        doc = sbol3.Document()
+        doc.add(c1)
+        c1_copy = pickle.loads(pickle.dumps(c1))
+        self.assertIsNone(c1_copy.document)
+        self.assertIsNone(c1_copy.features[0].document)
+        self.assertEqual(c1.features[0].identity, c1_copy.features[0].identity)
+        doc_copy = pickle.loads(pickle.dumps(doc))
+        c1_copy = doc_copy.find('c1')
+        self.assertIs(doc_copy, c1_copy.document)
+        self.assertIs(doc_copy, c1_copy.features[0].document)
+        self.assertIs(c1_copy.features[0], doc_copy.find(c1.features[0].identity))
+        self.assertEqual(doc.write_string(sbol3.SORTED_NTRIPLES),
+                         doc_copy.write_string(sbol3.SORTED_NTRIPLES))
+
+    def test_shallow_copy(self):
+        # Unlike pickling, a shallow copy keeps the document
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        c1 = sbol3.Component('c1', types=[sbol3.SBO_DNA])
+        doc = sbol3.Document()
+        doc.add(c1)
+        c1_copy = copy.copy(c1)
+        self.assertIsNot(c1, c1_copy)
+        self.assertIs(doc, c1_copy.document)
+        self.assertEqual(c1.identity, c1_copy.identity)
+
+    def test_find_index(self):
+        # find() uses indexes maintained as objects enter and leave
+        # the document. Verify they track child additions, removals,
+        # and identity changes.
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        c1 = sbol3.Component('c1', types=[sbol3.SBO_DNA])
+        doc.add(c1)
+        sc1 = sbol3.SubComponent('https://example.com/instance/i1')
+        c1.features.append(sc1)
+        self.assertIs(c1, doc.find(c1.identity))
+        self.assertIs(c1, doc.find('c1'))
+        self.assertIs(sc1, doc.find(sc1.identity))
+        self.assertIs(sc1, doc.find('SubComponent1'))
+        # Removing a child takes it out of the document
+        c1.features.remove(sc1)
+        self.assertIsNone(doc.find(sc1.identity))
+        self.assertIsNone(sc1.document)
+        # Changing the identity of a top level updates the index
+        old_identity = c1.identity
+        c1.set_identity('c2')
+        self.assertIsNone(doc.find(old_identity))
+        self.assertIs(c1, doc.find(c1.identity))
+        self.assertIs(c1, doc.find('c2'))
+        # Removing a top level takes its tree out of the document
+        sc2 = sbol3.SubComponent('https://example.com/instance/i2')
+        c1.features.append(sc2)
+        self.assertIs(sc2, doc.find(sc2.identity))
+        doc.remove([c1])
+        self.assertNotIn(c1, doc)
+        self.assertIsNone(doc.find(c1.identity))
+        self.assertIsNone(doc.find(sc2.identity))
+        # A top level with a duplicate identity is still rejected
+        doc.add(c1)
+        self.assertIn(c1, doc)
+        with self.assertRaises(ValueError):
+            doc.add(sbol3.Component('c2', types=[sbol3.SBO_DNA]))
+        # Only top levels are "in" a document
+        self.assertNotIn(sc2, doc)
+        self.assertNotIn(c1.identity, doc)
+        # Top levels take precedence over the objects they own
+        c3 = sbol3.Component('SubComponent1', types=[sbol3.SBO_DNA])
+        c1.features.append(sbol3.SubComponent(c3))
+        doc.add(c3)
+        self.assertIs(c3, doc.find('SubComponent1'))
+
+    def test_add_to_other_document(self):
+        # A top level added to another document leaves its document
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc1 = sbol3.Document()
+        doc2 = sbol3.Document()
+        c1 = sbol3.Component('c1', types=[sbol3.SBO_DNA])
+        c1.features.append(sbol3.LocalSubComponent([sbol3.SBO_DNA]))
+        c2 = sbol3.Component('c2', types=[sbol3.SBO_DNA])
+        doc1.add([c1, c2])
+        doc2.add(c1)
+        self.assertEqual([c2], list(doc1))
+        self.assertEqual(1, len(doc1))
+        self.assertNotIn(c1, doc1)
+        self.assertIsNone(doc1.find(c1.features[0].identity))
+        self.assertIs(c1.features[0], doc2.find(c1.features[0].identity))
+        with self.assertRaises(ValueError):
+            doc1.remove([c1])
+        doc2.add([c2])
+        self.assertEqual(0, len(doc1))
+        self.assertEqual([c1, c2], doc2.objects)
+        self.assertIs(doc2, c2.document)
+
     def test_ntriples_blank_line(self):
         """Test that ntriples output does not contain an extra blank
         line due to RDFlib.
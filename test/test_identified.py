@@ -1,3 +1,4 @@
+import pickle
 import posixpath
 import unittest
 import uuid
@@ -102,6 +103,50 @@ class TestIdentified(unittest.TestCase):
         # Ensure that is_valid_display_id is a public function
         self.assertIn('is_valid_display_id', dir(sbol3))
 
+    def test_content_hash(self):
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+
+        def make_component():
+            c = sbol3.Component('c1', [sbol3.SBO_DNA, sbol3.SO_PROMOTER], name='c1')
+            c.features.append(sbol3.SequenceFeature([sbol3.Range('seq', 1, 10)]))
+            return c
+        c1 = make_component()
+        c2 = make_component()
+        h = c1.content_hash
+        self.assertEqual(64, len(h))
+        self.assertEqual(h, c2.content_hash)
+        # The order of property values does not matter
+        c2.types = [sbol3.SO_PROMOTER, sbol3.SBO_DNA]
+        self.assertEqual(h, c2.content_hash)
+        # A change to an owned object changes the hashes of its owners
+        location = c2.features[0].locations[0]
+        feature_hash = c2.features[0].content_hash
+        location.end = 11
+        self.assertNotEqual(feature_hash, c2.features[0].content_hash)
+        self.assertNotEqual(h, c2.content_hash)
+        location.end = 10
+        self.assertEqual(h, c2.content_hash)
+        # Adding and removing owned objects
+        c2.features.append(sbol3.SubComponent('https://example.org/c3'))
+        self.assertNotEqual(h, c2.content_hash)
+        del c2.features[1]
+        self.assertEqual(h, c2.content_hash)
+        # Datatypes of literals are significant
+        c2.name = rdflib.Literal('c1', lang='en')
+        self.assertNotEqual(h, c2.content_hash)
+        c2.clear_property(sbol3.SBOL_NAME)
+        c2.name = 'c1'
+        self.assertEqual(h, c2.content_hash)
+        # Identity is significant
+        c3 = c2.clone('c3')
+        self.assertNotEqual(h, c3.content_hash)
+        self.assertNotEqual(c2.features[0].content_hash, c3.features[0].content_hash)
+        # Copies and pickles have the same hash
+        doc = sbol3.Document()
+        doc.add(c2)
+        self.assertEqual(h, doc.copy().find(c2.identity).content_hash)
+        self.assertEqual(h, pickle.loads(pickle.dumps(c2)).content_hash)
+
 
 if __name__ == '__main__':
     unittest.main()
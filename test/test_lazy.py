@@ -0,0 +1,98 @@
+import unittest
+
+import rdflib
+
+import sbol3
+
+
+class TestLazyRead(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_defaults()
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    def test_lazy_read(self):
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        for i in range(3):
+            seq = sbol3.Sequence(f'seq{i}', elements='acgt', encoding=sbol3.IUPAC_DNA_ENCODING)
+            c = sbol3.Component(f'c{i}', sbol3.SBO_DNA, sequences=[seq])
+            c.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 1, 2)]))
+            doc.add([seq, c])
+        doc._other_rdf.add((rdflib.URIRef('https://example.org/thing'), rdflib.RDFS.label,
+                            rdflib.Literal('thing')))
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        lazy_doc = sbol3.Document()
+        lazy_doc.read_string(data, sbol3.NTRIPLES, lazy=True)
+        self.assertEqual(6, len(lazy_doc))
+        self.assertEqual([], lazy_doc._objects)
+        # Objects are built when they are found, with their TopLevel
+        feature = lazy_doc.find(doc.find('c1').features[0].identity)
+        self.assertIsInstance(feature, sbol3.SequenceFeature)
+        self.assertEqual(['c1'], [obj.display_id for obj in lazy_doc._objects])
+        self.assertIs(lazy_doc, feature.document)
+        c1 = lazy_doc.find('c1')
+        self.assertIsInstance(feature.locations[0].sequence.lookup(), sbol3.Sequence)
+        self.assertEqual(['c1', 'seq1'], [obj.display_id for obj in lazy_doc._objects])
+        self.assertEqual(6, len(lazy_doc))
+        # Adding an object with the identity of an object not yet built
+        with self.assertRaises(ValueError):
+            lazy_doc.add(sbol3.Component('c2', sbol3.SBO_DNA))
+        # Iteration builds the remaining objects
+        self.assertEqual(['c1', 'seq1', 'c2', 'c0', 'seq0', 'seq2'],
+                         [obj.display_id for obj in lazy_doc])
+        self.assertIsNone(lazy_doc._lazy)
+        self.assertIs(c1, lazy_doc.find('c1'))
+        self.assertEqual(data, lazy_doc.write_string(sbol3.SORTED_NTRIPLES))
+        # Objects built by the caller during iteration are not yielded
+        # again
+        lazy_doc = sbol3.Document()
+        lazy_doc.read_string(data, sbol3.NTRIPLES, lazy=True)
+        display_ids = []
+        for obj in lazy_doc:
+            display_ids.append(obj.display_id)
+            lazy_doc.find('seq2')
+        self.assertEqual(['c0', 'c1', 'c2', 'seq0', 'seq1'], display_ids)
+        self.assertEqual(6, len(lazy_doc.objects))
+        # The objects are built when all the objects are needed
+        lazy_doc = sbol3.Document()
+        lazy_doc.read_string(data, sbol3.NTRIPLES, lazy=True)
+        self.assertEqual(data, lazy_doc.write_string(sbol3.SORTED_NTRIPLES))
+        self.assertEqual(6, len(lazy_doc.objects))
+        self.assertIsNone(lazy_doc._lazy)
+
+    def test_lazy_read_orphans(self):
+        # Files whose objects do not form separate trees are read
+        # eagerly, and orphans are built at once
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA)
+        c1.features.append(sbol3.LocalSubComponent([sbol3.SBO_DNA]))
+        doc.add(c1)
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        # An owned object that is not owned by a TopLevel
+        orphan = data.replace(f'<{c1.identity}> <{sbol3.SBOL_FEATURES}>', f'<{c1.identity}> <{sbol3.SBOL_NAME}>')
+        lazy_doc = sbol3.Document()
+        lazy_doc.read_string(orphan, sbol3.NTRIPLES, lazy=True)
+        self.assertEqual(1, len(lazy_doc.orphans))
+        self.assertEqual(1, len(lazy_doc))
+        self.assertEqual([], lazy_doc._objects)
+        eager_doc = sbol3.Document()
+        eager_doc.read_string(orphan, sbol3.NTRIPLES)
+        self.assertEqual(eager_doc.write_string(sbol3.SORTED_NTRIPLES),
+                         lazy_doc.write_string(sbol3.SORTED_NTRIPLES))
+        # An owned object with two owners
+        c2_identity = c1.identity.replace('c1', 'c2')
+        shared = data + ''.join(line.replace(f'<{c1.identity}>', f'<{c2_identity}>')
+                                for line in data.splitlines(keepends=True)
+                                if line.startswith(f'<{c1.identity}> '))
+        lazy_doc = sbol3.Document()
+        lazy_doc.read_string(shared, sbol3.NTRIPLES, lazy=True)
+        self.assertIsNone(lazy_doc._lazy)
+        self.assertEqual(2, len(lazy_doc._objects))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+import rdflib
+
+import sbol3
+
+
+class TestMerge(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_defaults()
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    def test_merge(self):
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+
+        def make_document(name, *components):
+            doc = sbol3.Document()
+            doc.bind(name, f'https://example.org/{name}#')
+            doc._other_rdf.add((rdflib.URIRef(f'https://example.org/{name}'),
+                                rdflib.RDFS.label, rdflib.Literal(name)))
+            for display_id, role in components:
+                c = sbol3.Component(display_id, sbol3.SBO_DNA, roles=[role])
+                c.features.append(sbol3.LocalSubComponent([sbol3.SBO_DNA]))
+                doc.add(c)
+            return doc
+        doc = make_document('a', ('c1', sbol3.SO_PROMOTER))
+        doc2 = make_document('b', ('c1', sbol3.SO_PROMOTER), ('c2', sbol3.SO_CDS))
+        doc3 = make_document('c', ('c2', sbol3.SO_CDS), ('c3', sbol3.SO_CDS))
+        # Identical objects are not conflicts
+        self.assertEqual([], doc.merge([doc2, doc3]))
+        self.assertEqual(['c1', 'c2', 'c3'], [c.display_id for c in doc.objects])
+        self.assertIs(doc, doc.find('c2').document)
+        self.assertIs(doc, doc.find('c2').features[0].document)
+        # The duplicates are left in their documents
+        self.assertEqual(['c1'], [c.display_id for c in doc2.objects])
+        self.assertEqual(['c2'], [c.display_id for c in doc3.objects])
+        self.assertIsNone(doc2.find('c2'))
+        self.assertEqual(3, len(doc._other_rdf))
+        self.assertEqual('https://example.org/c#', doc._namespaces['c'])
+        # Conflicts
+        doc4 = make_document('d', ('c1', sbol3.SO_CDS), ('c4', sbol3.SO_CDS))
+        doc4.bind('a', 'https://example.org/other#')
+        with self.assertRaises(ValueError):
+            doc.merge([doc4])
+        self.assertEqual(3, len(doc))
+        self.assertEqual(2, len(doc4))
+        self.assertEqual([doc.find('c1').identity], doc.merge([doc4], on_conflict='keep'))
+        self.assertEqual([sbol3.SO_PROMOTER], doc.find('c1').roles)
+        self.assertEqual(4, len(doc))
+        self.assertEqual('https://example.org/a#', doc._namespaces['a'])
+        doc5 = make_document('e', ('c1', sbol3.SO_TERMINATOR))
+        old_c1 = doc.find('c1')
+        self.assertEqual([old_c1.identity], doc.merge([doc5], on_conflict='replace'))
+        self.assertEqual([sbol3.SO_TERMINATOR], doc.find('c1').roles)
+        self.assertIsNone(old_c1.document)
+        self.assertEqual(0, len(doc5))
+        self.assertEqual(4, len(doc))
+        self.assertEqual(len(doc.objects), len({c.identity for c in doc.objects}))
+        with self.assertRaises(ValueError):
+            doc.merge([doc4], on_conflict='overwrite')
+        self.assertFalse(doc.validate().errors)
+
+    def test_merge_orphans(self):
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('seq1')
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])
+        c1.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 1, 2)]))
+        doc.add([seq, c1])
+        # Unlink the feature from its owner, so that it and the
+        # location it owns are read as orphans
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        data = data.replace(f'<{sbol3.SBOL_FEATURES}>', f'<{sbol3.SBOL_NAME}>')
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.NTRIPLES)
+        self.assertEqual(2, len(doc2.orphans))
+        orphans = list(doc2.orphans)
+        data = doc2.write_string(sbol3.SORTED_NTRIPLES)
+        doc3 = sbol3.Document()
+        self.assertEqual([], doc3.merge([doc2]))
+        self.assertEqual(orphans, doc3.orphans)
+        self.assertEqual([], doc2.orphans)
+        for orphan in orphans:
+            self.assertIs(doc3, orphan.document)
+        self.assertEqual(data, doc3.write_string(sbol3.SORTED_NTRIPLES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import io
+import os
+import unittest
+
+import rdflib
+import rdflib.compare
+
+import sbol3
+from sbol3.ntriples import parse_ntriples, sort_lines, write_ntriples
+
+MODULE_LOCATION = os.path.dirname(os.path.abspath(__file__))
+TEST_RESOURCE_DIR = os.path.join(MODULE_LOCATION, 'resources')
+
+
+class TestParseNTriples(unittest.TestCase):
+
+    def test_terms(self):
+        data = r'''
+# A comment line, followed by a blank line
+
+<http://example.com/s> <http://example.com/p> <http://example.com/o> .
+<http://example.com/s> <http://example.com/p> "tab\there \"quoted\" é\U0001D11E" .
+<http://example.com/s> <http://example.com/p> "chat"@fr-CA .
+<http://example.com/s> <http://example.com/p> "5"^^<http://www.w3.org/2001/XMLSchema#integer> .
+<http://example.com/s> <http://example.com/p> _:b1 . # trailing comment
+_:b1 <http://example.com/p> _:b.2 .
+'''
+        triples = list(parse_ntriples(data.splitlines()))
+        self.assertEqual(6, len(triples))
+        s = rdflib.URIRef('http://example.com/s')
+        p = rdflib.URIRef('http://example.com/p')
+        self.assertEqual((s, p, rdflib.URIRef('http://example.com/o')), triples[0])
+        self.assertEqual(rdflib.Literal('tab\there "quoted" é\U0001D11E'), triples[1][2])
+        self.assertEqual(rdflib.Literal('chat', lang='fr-CA'), triples[2][2])
+        self.assertEqual(rdflib.Literal(5), triples[3][2])
+        # Blank node labels map to the same new blank node within a parse
+        self.assertIsInstance(triples[4][2], rdflib.BNode)
+        self.assertEqual(triples[4][2], triples[5][0])
+        self.assertIsInstance(triples[5][2], rdflib.BNode)
+        self.assertNotEqual(triples[5][0], triples[5][2])
+
+    def test_matches_rdflib(self):
+        for filename in os.listdir(TEST_RESOURCE_DIR):
+            if not filename.endswith('.nt'):
+                continue
+            path = os.path.join(TEST_RESOURCE_DIR, filename)
+            expected = rdflib.Graph()
+            expected.parse(path, format=sbol3.NTRIPLES)
+            actual = rdflib.Graph()
+            with open(path, encoding='utf-8') as infile:
+                for triple in parse_ntriples(infile):
+                    actual.add(triple)
+            self.assertTrue(rdflib.compare.isomorphic(expected, actual), filename)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            list(parse_ntriples(['<http://example.com/s> <http://example.com/p> .']))
+        with self.assertRaises(ValueError):
+            list(parse_ntriples(['<http://example.com/s> <http://example.com/p> "\\q" .']))
+
+    def test_document_read(self):
+        # Document reads N-Triples natively and keeps non-SBOL triples
+        path = os.path.join(TEST_RESOURCE_DIR, 'mixed-rdf.nt')
+        doc = sbol3.Document()
+        doc.read(path)
+        self.assertNotIn('parse rdf', doc.parse_timings)
+        self.assertIsNotNone(doc.find('http://example.com/sbol3/c1'))
+        self.assertEqual(3, len(doc._other_rdf))
+        expected = rdflib.Graph()
+        expected.parse(path, format=sbol3.NTRIPLES)
+        self.assertTrue(rdflib.compare.isomorphic(expected, doc.graph()))
+
+
+class TestWriteNTriples(unittest.TestCase):
+
+    def test_matches_rdflib(self):
+        # The direct writer produces exactly what rdflib serializes
+        for filename in os.listdir(TEST_RESOURCE_DIR):
+            if not filename.endswith('.nt'):
+                continue
+            path = os.path.join(TEST_RESOURCE_DIR, filename)
+            doc = sbol3.Document()
+            doc.read(path)
+            nt_text = doc.graph().serialize(format=sbol3.NTRIPLES)
+            expected = sorted(line + '\n' for line in nt_text.splitlines() if line)
+            actual = doc.write_string(sbol3.SORTED_NTRIPLES)
+            self.assertEqual(''.join(expected), actual, filename)
+            unsorted = doc.write_string(sbol3.NTRIPLES)
+            self.assertEqual(expected, sorted(unsorted.splitlines(keepends=True)))
+
+    def test_literals(self):
+        s = rdflib.URIRef('http://example.com/s')
+        p = rdflib.URIRef('http://example.com/p')
+        literals = [rdflib.Literal('back\\slash "quoted"\nnew line\r'),
+                    rdflib.Literal('chat', lang='fr'),
+                    rdflib.Literal(5)]
+        graph = rdflib.Graph()
+        for literal in literals:
+            graph.add((s, p, literal))
+        expected = sorted(line + '\n' for line in graph.serialize(format=sbol3.NTRIPLES).splitlines() if line)
+        buffer = io.StringIO()
+        write_ntriples([(s, p, literal) for literal in literals], buffer, sort=True)
+        self.assertEqual(''.join(expected), buffer.getvalue())
+
+    def test_sort_lines(self):
+        # Force several sorted runs through temporary files
+        lines = [f'{i % 7} {i % 5}\n' for i in range(100)]
+        expected = sorted(set(lines))
+        self.assertEqual(expected, list(sort_lines(lines, buffer_lines=8)))
+        self.assertEqual(expected, list(sort_lines(lines)))
+        self.assertEqual([], list(sort_lines([], buffer_lines=8)))
+
+    def test_empty_document(self):
+        doc = sbol3.Document()
+        self.assertEqual('', doc.write_string(sbol3.NTRIPLES))
+        self.assertEqual('', doc.write_string(sbol3.SORTED_NTRIPLES))
+
+
+if __name__ == '__main__':
+    unittest.main()
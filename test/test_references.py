@@ -0,0 +1,161 @@
+import unittest
+
+import sbol3
+
+
+class TestReferences(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_defaults()
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    def test_referrers(self):
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('seq1')
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])
+        c2 = sbol3.Component('c2', sbol3.SBO_DNA)
+        doc.add([seq, c1, c2])
+        self.assertEqual([(c1, sbol3.SBOL_SEQUENCES)], doc.referrers(seq))
+        self.assertEqual([], doc.referrers(c1))
+        # Owned objects refer too, and the index follows changes
+        sub = sbol3.SubComponent(c1)
+        c2.features.append(sub)
+        c2.constraints.append(sbol3.Constraint(sbol3.SBOL_REPLACES, sub, sub))
+        constraint = c2.constraints[0]
+        self.assertEqual([(sub, sbol3.SBOL_INSTANCE_OF)], doc.referrers(c1.identity))
+        self.assertEqual([(constraint, sbol3.SBOL_SUBJECT), (constraint, sbol3.SBOL_OBJECT)],
+                         doc.referrers(sub))
+        c2.sequences.append(seq)
+        self.assertEqual([(c1, sbol3.SBOL_SEQUENCES), (c2, sbol3.SBOL_SEQUENCES)],
+                         doc.referrers(seq))
+        c1.sequences = []
+        self.assertEqual([(c2, sbol3.SBOL_SEQUENCES)], doc.referrers(seq))
+        # Removed objects no longer refer
+        del c2.constraints[0]
+        self.assertEqual([], doc.referrers(sub))
+        doc.remove_object(c2)
+        self.assertEqual([], doc.referrers(seq))
+        self.assertEqual([], doc.referrers(c1))
+        # References to objects not in the document
+        doc.add(c2)
+        self.assertEqual([(c2, sbol3.SBOL_SEQUENCES)], doc.referrers(seq))
+        doc.remove_object(seq)
+        self.assertEqual([(c2, sbol3.SBOL_SEQUENCES)], doc.referrers(seq.identity))
+        # Changing namespaces updates references
+        doc.add(seq)
+        old_identity = seq.identity
+        doc.change_object_namespace([seq], 'https://example.org/other', update_references=[c2])
+        self.assertEqual([], doc.referrers(old_identity))
+        self.assertEqual([(c2, sbol3.SBOL_SEQUENCES)], doc.referrers(seq))
+
+    def test_referrers_reread(self):
+        # Reading a document replaces the references of the objects
+        # that were read before
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('seq1')
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])
+        doc.add([seq, c1])
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        doc2 = sbol3.Document()
+        doc2.add([sbol3.Sequence('seq1'), sbol3.Component('c2', sbol3.SBO_DNA, sequences=[seq])])
+        other_data = doc2.write_string(sbol3.SORTED_NTRIPLES)
+        for lazy in (False, True):
+            doc = sbol3.Document()
+            doc.read_string(data, sbol3.NTRIPLES, lazy=lazy)
+            self.assertEqual(['c1'], [obj.display_id for obj, _ in doc.referrers(seq.identity)])
+            doc.read_string(other_data, sbol3.NTRIPLES, lazy=lazy)
+            self.assertEqual(['c2'], [obj.display_id for obj, _ in doc.referrers(seq.identity)])
+            self.assertIsNone(doc.find('c1'))
+
+    def test_check_references(self):
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('seq1')
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])
+        sub = sbol3.SubComponent(c1)
+        c1.features.append(sub)
+        c1.constraints.append(sbol3.Constraint(sbol3.SBOL_REPLACES, sub, sub))
+        doc.add([seq, c1])
+        self.assertEqual(0, len(doc.check_references()))
+        # Dangling references within the document's namespaces are
+        # errors, others are warnings
+        doc.remove_object(seq)
+        c1.features.append(sbol3.SubComponent('https://example.org/parts/c2'))
+        report = doc.check_references()
+        self.assertEqual([c1.identity], [str(e.object_id) for e in report.errors])
+        self.assertIn(seq.identity, report.errors[0].message)
+        self.assertEqual([c1.features[1].identity], [str(w.object_id) for w in report.warnings])
+        self.assertIn(sbol3.SBOL_INSTANCE_OF, report.warnings[0].message)
+        # The report can be limited
+        report = doc.check_references(sbol3.ValidationReport(max_errors=1))
+        self.assertEqual(1, len(report.errors))
+        doc.add(seq)
+        report = doc.check_references()
+        self.assertEqual(0, len(report.errors))
+        self.assertEqual(1, len(report.warnings))
+
+    def test_check_references_reread(self):
+        # Dangling references of the objects read before are not
+        # reported after reading another document
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        doc.add(sbol3.Component('c1', sbol3.SBO_DNA, sequences=['https://github.com/synbiodex/pysbol3/seq1']))
+        dangling_data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        doc = sbol3.Document()
+        doc.add(sbol3.Component('c2', sbol3.SBO_DNA))
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        for lazy in (False, True):
+            doc = sbol3.Document()
+            doc.read_string(dangling_data, sbol3.NTRIPLES, lazy=lazy)
+            self.assertEqual(1, len(doc.check_references().errors))
+            doc.read_string(data, sbol3.NTRIPLES, lazy=lazy)
+            self.assertEqual(0, len(doc.check_references()))
+
+    def test_resolve_references(self):
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('seq1')
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])
+        c2 = sbol3.Component('c2', sbol3.SBO_DNA)
+        sub = sbol3.SubComponent(c1)
+        c2.features.append(sub)
+        c2.constraints.append(sbol3.Constraint(sbol3.SBOL_REPLACES, sub, sub))
+        c2.features.append(sbol3.SubComponent('https://example.org/parts/c3'))
+        doc.add([seq, c1, c2])
+        resolved = doc.resolve_references()
+        self.assertEqual({seq.identity: seq, c1.identity: c1, sub.identity: sub}, resolved)
+        for uri, obj in resolved.items():
+            self.assertIs(obj, doc.find(uri))
+        # The map is kept until the document changes
+        self.assertIs(resolved, doc.resolve_references())
+        c2.sequences.append(seq)
+        self.assertIsNot(resolved, doc.resolve_references())
+        self.assertEqual(resolved, doc.resolve_references())
+        doc.remove_object(seq)
+        self.assertEqual({c1.identity: c1, sub.identity: sub}, doc.resolve_references())
+
+    def test_resolve_references_reread(self):
+        # The references resolved before reading another document are
+        # not returned again
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('seq1')
+        doc.add([seq, sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])])
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        doc = sbol3.Document()
+        doc.add(sbol3.Component('c2', sbol3.SBO_DNA, sequences=[seq]))
+        dangling_data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        for lazy in (False, True):
+            doc = sbol3.Document()
+            doc.read_string(data, sbol3.NTRIPLES, lazy=lazy)
+            self.assertEqual([seq.identity], list(doc.resolve_references()))
+            doc.read_string(dangling_data, sbol3.NTRIPLES, lazy=lazy)
+            self.assertEqual({}, doc.resolve_references())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import math
+import unittest
+
+import rdflib
+
+import sbol3
+from sbol3.parsing import build_object
+from sbol3.schema import ParseSchema
+
+PYSBOL3_LABELLED_TOP = 'https://github.com/synbiodex/pysbol3#labelledTop'
+PYSBOL3_LABEL = 'https://github.com/synbiodex/pysbol3#label'
+
+
+class LabelledTopClass(sbol3.CustomTopLevel):
+    # The constructor derives a value from the identity, so objects
+    # cannot be allocated from a prototype
+    def __init__(self, identity, type_uri=PYSBOL3_LABELLED_TOP):
+        super().__init__(identity, type_uri)
+        self.label = sbol3.TextProperty(self, PYSBOL3_LABEL, 0, 1,
+                                        initial_value=identity)
+
+
+class TestParseSchema(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_defaults()
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    def test_build(self):
+        # Objects built from the schema are like the objects the
+        # builder builds
+        doc = sbol3.Document()
+        identity = 'https://github.com/synbiodex/pysbol3/r1'
+        schema = ParseSchema(build_object(doc, identity, [sbol3.SBOL_RANGE]))
+        self.assertIsNotNone(schema.recipe)
+        for identity in ['https://github.com/synbiodex/pysbol3/c1/r2',
+                         '3ff9b9f2-7a3c-4d1a-b0a5-2a4c7c4ff0b1']:
+            expected = build_object(doc, identity, [sbol3.SBOL_RANGE])
+            obj = schema.build(identity)
+            self.assertIsInstance(obj, sbol3.Range)
+            self.assertEqual(expected.identity, obj.identity)
+            self.assertEqual(expected.display_id, obj.display_id)
+            self.assertEqual(list(expected.__dict__), list(obj.__dict__))
+            self.assertEqual(dict(expected._properties), dict(obj._properties))
+            self.assertEqual(dict(expected._owned_objects), dict(obj._owned_objects))
+            self.assertIs(obj, obj.__dict__['start'].property_owner)
+            # Objects do not share their stores with the prototype
+            obj.start = 5
+            self.assertEqual(5, obj.start)
+            self.assertNotEqual(5, schema.prototype.start)
+        with self.assertRaises(ValueError):
+            schema.build('https://github.com/synbiodex/pysbol3/1r')
+
+    def test_read(self):
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('seq1', elements='acgt', encoding=sbol3.IUPAC_DNA_ENCODING)
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])
+        c1.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 2, 3), sbol3.Cut(seq, 4)]))
+        doc.add([seq, c1])
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.NTRIPLES)
+        self.assertEqual(data, doc2.write_string(sbol3.SORTED_NTRIPLES))
+        locations = doc2.find('c1').features[0].locations
+        range1 = doc2.find(c1.features[0].locations[0].identity)
+        self.assertEqual([2, 3], [range1.start, range1.end])
+        self.assertEqual(4, doc2.find(c1.features[0].locations[1].identity).at)
+        # The placeholder values of the builders are replaced
+        self.assertEqual([seq.identity] * 2, [loc.sequence for loc in locations])
+        self.assertEqual([str(issue) for issue in doc.validate()],
+                         [str(issue) for issue in doc2.validate()])
+        self.assertIs(doc2, locations[0].document)
+
+    def test_identity_dependent(self):
+        # Objects whose constructors use their identity are built by
+        # their builder
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        sbol3.Document.register_builder(PYSBOL3_LABELLED_TOP, LabelledTopClass)
+        try:
+            doc = sbol3.Document()
+            doc.add([LabelledTopClass('t1'), LabelledTopClass('t2')])
+            data = doc.write_string(sbol3.SORTED_NTRIPLES)
+            doc2 = sbol3.Document()
+            doc2.read_string(data, sbol3.NTRIPLES)
+            schemas = [schema for types, schema in doc2._schemas.items()
+                       if PYSBOL3_LABELLED_TOP in types]
+            self.assertEqual(1, len(schemas))
+            self.assertIsNone(schemas[0].recipe)
+            t2 = doc2.find('t2')
+            self.assertIsInstance(t2, LabelledTopClass)
+            self.assertEqual('t2', t2.label)
+            self.assertEqual(data, doc2.write_string(sbol3.SORTED_NTRIPLES))
+        finally:
+            del sbol3.Document._uri_type_map[PYSBOL3_LABELLED_TOP]
+
+    def test_non_sbol(self):
+        schema = ParseSchema(None)
+        self.assertIsNone(schema.prototype)
+        self.assertIsNone(schema.recipe)
+        doc = sbol3.Document()
+        subject = rdflib.URIRef('https://example.org/thing')
+        doc.read_string(f'<{subject}> <{rdflib.RDF.type}> <https://example.org/Thing> .\n',
+                        sbol3.NTRIPLES)
+        self.assertEqual(0, len(doc))
+        self.assertEqual(1, len(doc._other_rdf))
+
+
+if __name__ == '__main__':
+    unittest.main()
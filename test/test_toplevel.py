@@ -171,6 +171,30 @@ class TestTopLevel(unittest.TestCase):
         c1_prime = c1.clone(posixpath.join(namespace, clone_name))
         self.assertIsNotNone(c1_prime.find('LocalSubComponent2'))
 
+    def test_clone_in_document(self):
+        # Cloning an object that lives in a document copies only the
+        # object tree, not the document
+        namespace = 'https://github.com/synbiodex/pysbol3'
+        sbol3.set_namespace(namespace)
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('s1', elements='acgt')
+        c1 = sbol3.Component('c1', types=[sbol3.SBO_DNA], sequences=[seq])
+        c1.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 1, 2)]))
+        doc.add([seq, c1])
+        c2 = c1.clone(posixpath.join(namespace, 'c2'))
+        self.assertIsNone(c2.document)
+        self.assertIsNone(c2.features[0].document)
+        self.assertIsNone(c2.features[0].locations[0].document)
+        # The clone has its own property stores, sharing the rdflib terms
+        self.assertIsNot(c1._properties, c2._properties)
+        self.assertIs(c1._properties[sbol3.SBOL_TYPE][0],
+                      c2._properties[sbol3.SBOL_TYPE][0])
+        self.assertIs(c2, c2.__dict__['types'].property_owner)
+        # The original is untouched
+        self.assertEqual(2, len(doc))
+        self.assertIs(c1, doc.find(c1.identity))
+        self.assertTrue(c2.features[0].identity.startswith(c2.identity))
+
     def test_copy_is_deprecated(self):
         namespace = 'https://github.com/synbiodex/pysbol3'
         sbol3.set_namespace(namespace)
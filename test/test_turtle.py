@@ -0,0 +1,55 @@
+import io
+import unittest
+
+import rdflib
+import rdflib.compare
+
+from sbol3.turtle import write_turtle
+
+EX = 'http://example.com/ns#'
+
+
+class TestWriteTurtle(unittest.TestCase):
+
+    def write(self, chunks, namespaces) -> str:
+        stream = io.StringIO()
+        write_turtle(chunks, stream, namespaces)
+        return stream.getvalue()
+
+    def test_round_trip(self):
+        s = rdflib.URIRef(EX + 's')
+        p = rdflib.URIRef(EX + 'p')
+        objects = [rdflib.URIRef(EX + 'o'),
+                   # Not a valid local name, so written as a full IRI
+                   rdflib.URIRef(EX + 'ends.with.dot.'),
+                   rdflib.URIRef('http://example.com/other'),
+                   rdflib.BNode(),
+                   rdflib.Literal('multi\nline """quoted""" \\ "'),
+                   rdflib.Literal('chat', lang='fr'),
+                   rdflib.Literal(5)]
+        triples = [(s, rdflib.RDF.type, rdflib.URIRef(EX + 'Thing'))]
+        triples += [(s, p, o) for o in objects]
+        text = self.write([triples[:4], triples[4:]], {'ex': EX})
+        expected = rdflib.Graph()
+        for triple in triples:
+            expected.add(triple)
+        actual = rdflib.Graph()
+        actual.parse(data=text, format='ttl')
+        self.assertTrue(rdflib.compare.isomorphic(expected, actual))
+        self.assertIn('<http://example.com/ns#ends.with.dot.>', text)
+        self.assertTrue(text.startswith(f'@prefix ex: <{EX}> .\n'))
+
+    def test_prefixes_declared_on_use(self):
+        # Only prefixes that are used are declared, before first use
+        ns2 = 'http://example.com/ns2#'
+        first = [(rdflib.URIRef(EX + 's'), rdflib.URIRef(EX + 'p'), rdflib.Literal('x'))]
+        second = [(rdflib.URIRef(ns2 + 's'), rdflib.URIRef(ns2 + 'p'), rdflib.Literal('y'))]
+        text = self.write([first, second], {'ex': EX, 'ns2': ns2, 'unused': 'http://example.com/unused#'})
+        self.assertNotIn('unused', text)
+        self.assertEqual(1, text.count('@prefix ex:'))
+        self.assertLess(text.index('ex:s'), text.index('@prefix ns2:'))
+        self.assertEqual('', self.write([], {'ex': EX}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import sbol3
+
+
+class TestTypeFilter(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_defaults()
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    def test_read_types(self):
+        sbol3.set_namespace('https://github.com/synbiodex/pysbol3')
+        doc = sbol3.Document()
+        for i in range(2):
+            seq = sbol3.Sequence(f'seq{i}', elements='acgt', encoding=sbol3.IUPAC_DNA_ENCODING)
+            c = sbol3.Component(f'c{i}', sbol3.SBO_DNA, sequences=[seq])
+            c.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 1, 2)]))
+            c.features.append(sbol3.SubComponent(seq))
+            doc.add([seq, c])
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        # Only the included TopLevels, with all the objects they own
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.NTRIPLES, include_types=[sbol3.Component])
+        self.assertEqual(['c0', 'c1'], [obj.display_id for obj in doc2.objects])
+        self.assertEqual(2, len(doc2.find('c0').features))
+        self.assertIsInstance(doc2.find('c0').features[0].locations[0], sbol3.Range)
+        self.assertEqual(0, len(doc2.orphans))
+        self.assertEqual(0, len(doc2._other_rdf))
+        # Excluded objects are left out with the objects they own, and
+        # are unlinked from their owners
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.NTRIPLES, include_types=sbol3.Component,
+                         exclude_types=[sbol3.SequenceFeature])
+        self.assertEqual([sbol3.SubComponent], [type(f) for f in doc2.find('c1').features])
+        self.assertIsNone(doc2.find(doc.find('c1').features[0].locations[0].identity))
+        self.assertEqual(0, len(doc2.orphans))
+        # Types can be given by URI, and skipped triples can be kept
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.NTRIPLES, exclude_types=[sbol3.SBOL_SEQUENCE],
+                         keep_skipped=True)
+        self.assertEqual(['c0', 'c1'], [obj.display_id for obj in doc2.objects])
+        self.assertEqual(data, doc2.write_string(sbol3.SORTED_NTRIPLES))
+        # Kept triples are not objects of the document
+        self.assertIsNone(doc2.find('seq0'))
+        # Objects owned through several levels are left out and kept
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.NTRIPLES, exclude_types=[sbol3.Component], keep_skipped=True)
+        self.assertEqual(['seq0', 'seq1'], [obj.display_id for obj in doc2.objects])
+        self.assertEqual(0, len(doc2.orphans))
+        self.assertEqual(data, doc2.write_string(sbol3.SORTED_NTRIPLES))
+        # Type filters work with lazy reading
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.NTRIPLES, lazy=True, include_types=[sbol3.Sequence])
+        self.assertEqual(2, len(doc2))
+        self.assertIsInstance(doc2.find('seq1'), sbol3.Sequence)
+        self.assertIsNone(doc2.find('c1'))
+        with self.assertRaises(TypeError):
+            doc2.read_string(data, sbol3.NTRIPLES, include_types=[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
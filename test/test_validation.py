@@ -1,10 +1,26 @@
+import functools
+import io
+import json
 import unittest
 import os
+import tempfile
+from unittest import mock
+
+import rdflib
 
 import sbol3
 
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SBOL3_LOCATION = os.path.join(TEST_DIR, 'SBOLTestSuite', 'SBOL3')
+TEST_RESOURCE_DIR = os.path.join(TEST_DIR, 'resources')
+
+
+def record_validation(validated, top_level, validate, report=None):
+    # Stands in for the validate() method of a TopLevel, recording
+    # its identity in validated
+    validated.append(top_level.identity)
+    return validate(report)
 
 
 class TestValidationReport(unittest.TestCase):
@@ -47,6 +63,85 @@ class TestValidationReport(unittest.TestCase):
         report.addError(None, None, 'Fake error')
         self.assertEqual('Fake error\nFake error\nFake warning', str(report))
 
+    def test_max_errors(self):
+        # Issues are not recorded once the report holds max_errors errors
+        report = sbol3.ValidationReport(max_errors=2)
+        report.addWarning(None, None, 'Fake warning')
+        report.addError(None, None, 'Fake error 1')
+        self.assertFalse(report.limit_reached)
+        report.addError(None, None, 'Fake error 2')
+        self.assertTrue(report.limit_reached)
+        report.addError(None, None, 'Fake error 3')
+        report.addWarning(None, None, 'Fake warning')
+        self.assertEqual(3, len(report))
+        self.assertFalse(sbol3.ValidationReport().limit_reached)
+        with self.assertRaises(ValueError):
+            sbol3.ValidationReport(max_errors=0)
+        with self.assertRaises(ValueError):
+            report.max_errors = -1
+
+    def test_grouping(self):
+        report = sbol3.ValidationReport()
+        report.addError('obj1', 'rule1', 'Error 1')
+        report.addWarning('obj2', 'rule1', 'Warning 1')
+        report.addError('obj1', 'rule2', 'Error 2')
+        report.addError(None, None, 'Error 3')
+        by_object = report.by_object()
+        self.assertEqual(['obj1', 'obj2', None], list(by_object))
+        self.assertEqual(['Error 1', 'Error 2'], [i.message for i in by_object['obj1']])
+        self.assertIsInstance(by_object['obj2'][0], sbol3.ValidationWarning)
+        self.assertEqual(['Error 3'], [i.message for i in by_object[None][:]])
+        self.assertNotIn('obj3', by_object)
+        by_rule = report.by_rule()
+        self.assertEqual(['Error 1', 'Warning 1'], [i.message for i in by_rule['rule1']])
+        self.assertEqual({'rule1': 2, 'rule2': 1, None: 1}, report.counts())
+        # Groupings are views, so they see issues added later
+        report.addWarning('obj3', 'rule2', 'Warning 2')
+        self.assertEqual(2, len(by_rule['rule2']))
+        self.assertIn('obj3', by_object)
+        self.assertEqual(['Error 1', 'Error 2', 'Error 3'], [i.message for i in report.errors])
+        self.assertEqual(['Warning 1', 'Warning 2'], [i.message for i in report.warnings])
+        self.assertEqual((3, 2), (report.error_count, report.warning_count))
+
+    def test_interned_types(self):
+        # Values are reported with the type they were given, even if
+        # an equal value of another type was interned first
+        report = sbol3.ValidationReport()
+        uri = rdflib.URIRef('https://example.org/obj1')
+        report.addError(str(uri), 1, 'Error 1')
+        report.addError(uri, True, 'Error 2')
+        self.assertEqual([str, rdflib.URIRef], [type(i.object_id) for i in report.errors])
+        self.assertEqual([int, bool], [type(i.rule_id) for i in report.errors])
+        self.assertEqual(['Error 2'], [i.message for i in report.by_object()[uri]])
+
+    def test_jsonl(self):
+        report = sbol3.ValidationReport()
+        report.addWarning(rdflib.URIRef('https://example.org/obj1'), None, 'Fake warning')
+        report.addError('obj2', 'rule1', 'Fake "error"')
+        stream = io.StringIO()
+        report.write_jsonl(stream)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([{'severity': 'error', 'object_id': 'obj2', 'rule_id': 'rule1',
+                           'message': 'Fake "error"'},
+                          {'severity': 'warning', 'object_id': 'https://example.org/obj1',
+                           'rule_id': None, 'message': 'Fake warning'}], lines)
+        # A streaming report writes issues as they are added, and
+        # keeps only their counts
+        stream = io.StringIO()
+        report = sbol3.ValidationReport(max_errors=2, stream=stream)
+        report.addWarning('obj1', None, 'Fake warning')
+        report.addError('obj2', 'rule1', 'Fake error')
+        self.assertEqual(2, len(stream.getvalue().splitlines()))
+        report.addError('obj2', 'rule1', 'Fake error')
+        report.addError('obj2', 'rule1', 'Fake error')
+        self.assertEqual(3, len(stream.getvalue().splitlines()))
+        self.assertEqual(3, len(report))
+        self.assertTrue(report.limit_reached)
+        self.assertEqual({None: 1, 'rule1': 2}, report.counts())
+        self.assertEqual((), report.errors)
+        self.assertEqual((2, 1), (report.error_count, report.warning_count))
+        self.assertEqual(0, len(report.by_object()))
+
     def test_shacl_closure_with_toplevels(self):
         # SBOL closure semantics should allow properties to reference
         # a TopLevel object not contained in the Document
@@ -91,6 +186,390 @@ class TestValidationReport(unittest.TestCase):
         doc.add(c_top)
         self.assertFalse(len(doc.validate()))
 
+    def test_shacl_shapes_cache(self):
+        # The shapes are parsed once and reused until the cache is cleared
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+        doc = sbol3.Document()
+        doc.add(sbol3.Component('c1', []))
+        sbol3.clear_shacl_cache()
+        report = doc.validate_shacl()
+        self.assertEqual(1, len(report.errors))
+        self.assertIn('sbol:type', report.errors[0].message)
+        shapes = sbol3.shacl.get_shapes()
+        self.assertIs(shapes, sbol3.shacl.get_shapes(sbol3.shacl.SBOL3_SHAPES_PATH))
+        self.assertEqual(1, len(doc.validate_shacl().errors))
+        self.assertIs(shapes, sbol3.shacl.get_shapes())
+        sbol3.clear_shacl_cache()
+        self.assertIsNot(shapes, sbol3.shacl.get_shapes())
+
+    def test_shacl_custom_shapes(self):
+        # A custom shapes file can be used instead of the SBOL3 shapes
+        shapes = '''@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix sbol: <http://sbols.org/v3#> .
+
+sbol:ComponentNameShape a sh:NodeShape ;
+    sh:targetClass sbol:Component ;
+    sh:property [ sh:path sbol:name ; sh:minCount 1 ] .
+'''
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+        doc = sbol3.Document()
+        doc.add(sbol3.Component('c1', sbol3.SBO_DNA))
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            shapes_path = os.path.join(tmpdirname, 'shapes.ttl')
+            with open(shapes_path, 'w', encoding='utf-8') as outfile:
+                outfile.write(shapes)
+            report = doc.validate_shacl(shapes_path=shapes_path)
+            self.assertEqual(1, len(report.errors))
+            self.assertIn('sbol:name', report.errors[0].message)
+            # Once cleared, a changed file is read again
+            with open(shapes_path, 'w', encoding='utf-8') as outfile:
+                outfile.write(shapes.replace('sbol:name', 'sbol:description'))
+            self.assertIn('sbol:name', doc.validate_shacl(shapes_path=shapes_path).errors[0].message)
+            sbol3.clear_shacl_cache(shapes_path)
+            report = doc.validate_shacl(shapes_path=shapes_path)
+            self.assertIn('sbol:description', report.errors[0].message)
+        self.assertEqual(0, len(doc.validate_shacl()))
+
+    def test_shacl_sharded(self):
+        # Sharded validation gives the same results as validating the
+        # whole document, including for references between TopLevels
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('s1', elements='acgt')
+        template = sbol3.Component('template', sbol3.SBO_DNA)
+        sub = sbol3.SubComponent(seq)
+        template.features.append(sub)
+        cd = sbol3.CombinatorialDerivation('cd', template)
+        # The first variable is valid, the others are not Features
+        cd.variable_features = [sbol3.VariableFeature(cardinality=sbol3.SBOL_ONE, variable=v)
+                                for v in [sub, seq, 'https://github.com/SynBioDex/pySBOL3/nowhere']]
+        doc.add([seq, template, cd, sbol3.Component('no_type', [])])
+
+        def issues(report):
+            return sorted((str(i.object_id), i.message) for i in report.errors)
+
+        expected = issues(doc.validate_shacl())
+        self.assertEqual(3, len(expected))
+        # One shard per TopLevel, validated in this process
+        report = sbol3.ValidationReport()
+        shards = sbol3.validating.shacl_shards(doc, 100)
+        self.assertEqual(len(doc), len(shards))
+        for owned, context in shards:
+            results = sbol3.shacl.validate_shard(owned, context)
+            if results:
+                results_graph = rdflib.Graph()
+                results_graph.parse(data=results, format=sbol3.NTRIPLES)
+                doc.parse_shacl_graph(results_graph, report)
+        self.assertEqual(expected, issues(report))
+        # Worker processes
+        self.assertEqual(expected, issues(doc.validate_shacl(workers=2, engine='pyshacl')))
+        self.assertEqual(issues(doc.validate()), issues(doc.validate(workers=2)))
+
+
+class TestIncrementalValidation(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    @staticmethod
+    def issues(report):
+        # SHACL issues can be in a different order, see validate()
+        return (sorted((str(i.object_id), i.message) for i in report.errors),
+                sorted((str(i.object_id), i.message) for i in report.warnings))
+
+    def test_same_as_full(self):
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('s1', elements='acgt')
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA, sequences=[seq])
+        c2 = sbol3.Component('c2', [])
+        c2.features.append(sbol3.SubComponent(c1))
+        doc.add([seq, c1, c2])
+        self.assertEqual(self.issues(doc.validate()), self.issues(doc.validate(incremental=True)))
+        edits = [
+            lambda: setattr(c2, 'types', [sbol3.SBO_DNA]),
+            lambda: c1.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 5, 2)])),
+            lambda: setattr(c1.features[0].locations[0], 'end', 8),
+            lambda: doc.add(sbol3.Component('c3', [])),
+            lambda: doc.remove_object(c1),
+            lambda: doc.bind('ex', 'https://github.com/SynBioDex/pySBOL3/'),
+            lambda: c2.clear_property(sbol3.SBOL_TYPE),
+        ]
+        for edit in edits:
+            edit()
+            self.assertEqual(self.issues(doc.validate()), self.issues(doc.validate(incremental=True)))
+
+    def test_only_changed(self):
+        # Only changed TopLevels, and those that refer to objects whose
+        # types have changed, are validated again
+        doc = sbol3.Document()
+        c1 = sbol3.Component('c1', sbol3.SBO_DNA)
+        c2 = sbol3.Component('c2', sbol3.SBO_DNA)
+        sub = sbol3.SubComponent(c2)
+        c1.features.append(sub)
+        cd = sbol3.CombinatorialDerivation('cd', c1)
+        cd.variable_features.append(sbol3.VariableFeature(cardinality=sbol3.SBOL_ONE, variable=sub))
+        doc.add([c1, c2, cd])
+        validated = []
+        for top_level in doc.objects:
+            top_level.validate = functools.partial(record_validation, validated, top_level,
+                                                   top_level.validate)
+        self.assertEqual(0, len(doc.validate(incremental=True)))
+        self.assertEqual(3, len(validated))
+        validated.clear()
+        self.assertEqual(0, len(doc.validate(incremental=True)))
+        self.assertEqual([], validated)
+        c2.name = 'Component 2'
+        self.assertEqual(0, len(doc.validate(incremental=True)))
+        self.assertEqual([c2.identity], validated)
+        # The variable feature no longer refers to a Feature, so the
+        # SHACL results of cd change too
+        validated.clear()
+        c1.features.clear()
+        report = doc.validate(incremental=True)
+        self.assertEqual([c1.identity], validated)
+        self.assertEqual(self.issues(doc.validate()), self.issues(report))
+        self.assertEqual([cd.variable_features[0].identity], [str(i.object_id) for i in report.errors])
+
+
+class TestParallelValidation(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    def make_document(self) -> sbol3.Document:
+        doc = sbol3.Document()
+        for name in ['c4', 'c1', 'c3', 'c2', 'c5']:
+            seq = sbol3.Sequence(f'{name}_seq', elements='acgt', encoding='https://example.org/encoding')
+            c = sbol3.Component(name, sbol3.SBO_DNA, sequences=[seq])
+            # Several errors and a warning in each tree
+            c.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 5, 2), sbol3.Range(seq, 4, 1)]))
+            c.features.append(sbol3.SubComponent(c, orientation='https://example.org/orientation'))
+            doc.add([seq, c])
+        return doc
+
+    @staticmethod
+    def issues(report):
+        return ([(str(i.object_id), i.message) for i in report.errors],
+                [(str(i.object_id), i.message) for i in report.warnings])
+
+    def expected(self, doc):
+        # Issues are in order of TopLevel identity
+        report = sbol3.ValidationReport()
+        for top_level in sorted(doc.objects, key=lambda obj: obj.identity):
+            top_level.validate(report)
+        doc.validate_shacl(report)
+        return self.issues(report)
+
+    def test_parallel(self):
+        doc = self.make_document()
+        expected = self.expected(doc)
+        self.assertEqual(15, len(expected[0]))
+        self.assertEqual(5, len(expected[1]))
+        self.assertEqual(expected, self.issues(doc.validate(workers=2)))
+        self.assertEqual(expected, self.issues(doc.validate(workers=3, chunk_size=1)))
+        self.assertEqual(expected, self.issues(doc.validate(workers=2, chunk_size=100)))
+        with self.assertRaises(ValueError):
+            doc.validate(workers=0)
+        with self.assertRaises(ValueError):
+            doc.validate(workers=2, chunk_size=0)
+
+    def test_parallel_without_fork(self):
+        # Off Linux, chunks of objects are pickled to the workers
+        doc = self.make_document()
+        with mock.patch('sys.platform', 'darwin'):
+            report = doc.validate(workers=2)
+        self.assertEqual(self.expected(doc), self.issues(report))
+        # Pickling did not disturb the objects' document
+        self.assertTrue(all(top_level.document is doc for top_level in doc.objects))
+
+
+class TestBoundedValidation(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    def make_document(self) -> sbol3.Document:
+        # Each Component has Python and SHACL errors, and a warning
+        doc = sbol3.Document()
+        for name in ['c1', 'c2', 'c3', 'c4']:
+            seq = sbol3.Sequence(f'{name}_seq', elements='acgt', encoding='https://example.org/encoding')
+            c = sbol3.Component(name, [], sequences=[seq])
+            c.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 5, 2), sbol3.Range(seq, 4, 1)]))
+            doc.add([seq, c])
+        return doc
+
+    @staticmethod
+    def errors(report):
+        return [(str(i.object_id), i.message) for i in report.errors]
+
+    def test_max_errors(self):
+        doc = self.make_document()
+        full = self.errors(doc.validate())
+        self.assertEqual(16, len(full))
+        for max_errors in [1, 3, 9, 20]:
+            report = doc.validate(max_errors=max_errors)
+            self.assertEqual(full[:max_errors], self.errors(report))
+        self.assertEqual(full[:1], self.errors(doc.validate(fail_fast=True)))
+        self.assertEqual(full[:5], self.errors(doc.validate_shacl(doc.validate(max_errors=5))))
+        # The limit can be given in the report
+        self.assertEqual(full[:2], self.errors(doc.validate(sbol3.ValidationReport(max_errors=2))))
+        report = doc.objects[1].validate(sbol3.ValidationReport(max_errors=1))
+        self.assertEqual(1, len(report.errors))
+        with self.assertRaises(ValueError):
+            doc.validate(max_errors=0)
+        # Validating in parallel gives the first errors by identity
+        expected = sbol3.ValidationReport()
+        for top_level in sorted(doc.objects, key=lambda obj: obj.identity):
+            top_level.validate(expected)
+        doc.validate_shacl(expected)
+        for max_errors in [1, 3, 9]:
+            report = doc.validate(workers=2, chunk_size=1, max_errors=max_errors)
+            self.assertEqual(self.errors(expected)[:max_errors], self.errors(report))
+
+    def test_fail_fast_stops(self):
+        # Validation stops as soon as the report is full
+        doc = self.make_document()
+        validated = []
+        for top_level in doc.objects:
+            top_level.validate = functools.partial(record_validation, validated, top_level,
+                                                   top_level.validate)
+        with mock.patch.object(sbol3.shacl.CompiledShapes, 'validate') as shacl:
+            report = doc.validate(fail_fast=True)
+            shacl.assert_not_called()
+        # The first Sequence only has a warning, which comes before
+        # the first error
+        self.assertEqual(1, len(report.errors))
+        self.assertEqual(1, len(report.warnings))
+        self.assertEqual([doc.objects[0].identity, doc.objects[1].identity], validated)
+
+    def test_fail_fast_shacl(self):
+        doc = self.make_document()
+        for engine in ['compiled', 'pyshacl']:
+            full = self.errors(doc.validate_shacl(engine=engine))
+            self.assertEqual(4, len(full))
+            errors = self.errors(doc.validate_shacl(engine=engine, fail_fast=True))
+            self.assertEqual(1, len(errors))
+            self.assertIn(errors[0], full)
+            errors = self.errors(doc.validate_shacl(engine=engine, max_errors=3))
+            self.assertEqual(3, len(errors))
+            self.assertEqual(3, len(set(errors) & set(full)))
+        report = doc.validate_shacl(engine='pyshacl', workers=2, max_errors=2)
+        self.assertEqual(2, len(report.errors))
+
+
+class TestShaclEngines(unittest.TestCase):
+    """The compiled SHACL engine gives the same results as pyshacl."""
+
+    def setUp(self) -> None:
+        sbol3.set_defaults()
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+
+    def assertEnginesAgree(self, doc: sbol3.Document):
+        results = []
+        for engine in ['pyshacl', 'compiled']:
+            report = doc.validate_shacl(engine=engine)
+            results.append((sorted((str(i.object_id), i.message) for i in report.errors),
+                            sorted((str(i.object_id), i.message) for i in report.warnings)))
+        self.assertEqual(results[0], results[1])
+        return results[1][0]
+
+    def read_all(self, dirname: str):
+        formats = {'.nt': sbol3.NTRIPLES, '.ttl': sbol3.TURTLE, '.rdf': sbol3.RDF_XML,
+                   '.jsonld': sbol3.JSONLD}
+        for dirpath, _, filenames in os.walk(dirname):
+            for filename in sorted(filenames):
+                file_format = formats.get(os.path.splitext(filename)[1])
+                if file_format is None:
+                    continue
+                path = os.path.join(dirpath, filename)
+                doc = sbol3.Document()
+                doc.read(path, file_format)
+                yield path, doc
+
+    @unittest.skipUnless(os.path.isdir(SBOL3_LOCATION), 'SBOLTestSuite is not checked out')
+    def test_sbol_test_suite(self):
+        for path, doc in self.read_all(SBOL3_LOCATION):
+            with self.subTest(filename=path):
+                self.assertEnginesAgree(doc)
+
+    def test_resources(self):
+        for path, doc in self.read_all(TEST_RESOURCE_DIR):
+            with self.subTest(filename=path):
+                self.assertEnginesAgree(doc)
+
+    def test_invalid(self):
+        namespace = 'https://github.com/SynBioDex/pySBOL3/'
+        sbol3.set_namespace(namespace)
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('s1', elements='acgt')
+        # Missing type
+        c1 = sbol3.Component('c1', [], sequences=[seq])
+        feature = sbol3.SequenceFeature([sbol3.Range(seq, 5, 2)])
+        c1.features.append(feature)
+        # Variables that are not Features, or do not exist
+        cd = sbol3.CombinatorialDerivation('cd', c1)
+        cd.variable_features = [sbol3.VariableFeature(cardinality=sbol3.SBOL_ONE, variable=v)
+                                for v in [feature, seq, namespace + 'nowhere']]
+        # Too many values, and values of the wrong datatype
+        orientations = [sbol3.SBOL_INLINE, sbol3.SBOL_REVERSE_COMPLEMENT]
+        feature._properties[sbol3.SBOL_ORIENTATION] = [rdflib.URIRef(o) for o in orientations]
+        c1._properties[sbol3.SBOL_NAME] = [rdflib.Literal(7)]
+        doc.add([seq, c1, cd])
+        # A non-SBOL node with an SBOL type, and a subclass of an SBOL
+        # class
+        my_class = rdflib.URIRef(namespace + 'MyComponent')
+        doc._other_rdf.add((my_class, rdflib.RDFS.subClassOf, rdflib.URIRef(sbol3.SBOL_COMPONENT)))
+        doc._other_rdf.add((rdflib.URIRef(namespace + 'x'), rdflib.RDF.type, my_class))
+        errors = self.assertEnginesAgree(doc)
+        self.assertEqual(8, len(errors))
+        # Focus nodes are abbreviated with the document's prefixes
+        doc.bind('ex', namespace)
+        errors = self.assertEnginesAgree(doc)
+        messages = [message.split(': ', 1)[1] for _, message in errors]
+        self.assertIn('Less than 1 values on ex:c1->sbol:type', messages)
+
+    def test_unsupported_shapes(self):
+        # Shapes the compiled engine does not support are validated by
+        # pyshacl unless the compiled engine is requested
+        shapes = '''@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix sbol: <http://sbols.org/v3#> .
+
+sbol:ComponentNameShape a sh:NodeShape ;
+    sh:targetClass sbol:Component ;
+    sh:property [ sh:path sbol:name ; sh:pattern "^c" ] .
+'''
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+        doc = sbol3.Document()
+        doc.add(sbol3.Component('c1', sbol3.SBO_DNA, name='d1'))
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            shapes_path = os.path.join(tmpdirname, 'shapes.ttl')
+            with open(shapes_path, 'w', encoding='utf-8') as outfile:
+                outfile.write(shapes)
+            self.assertEqual(1, len(doc.validate_shacl(shapes_path=shapes_path).errors))
+            with self.assertRaises(ValueError):
+                doc.validate_shacl(shapes_path=shapes_path, engine='compiled')
+            sbol3.clear_shacl_cache(shapes_path)
+        with self.assertRaises(ValueError):
+            doc.validate_shacl(engine='fast')
+        # The compiled engine is only used when requested, in a single
+        # process
+        with mock.patch.object(sbol3.shacl.CompiledShapes, 'validate') as compiled:
+            doc.validate()
+            compiled.assert_not_called()
+        with self.assertRaises(ValueError):
+            doc.validate_shacl(engine='compiled', workers=2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,148 @@
+import functools
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import sbol3
+
+
+def record_validation(validated, top_level, validate, report=None):
+    # Stands in for the validate() method of a TopLevel, see
+    # TestValidationCache.count_validations()
+    validated.append(top_level.identity)
+    return validate(report)
+
+
+class TestValidationCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        sbol3.set_namespace('https://github.com/SynBioDex/pySBOL3')
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.db')
+
+    def tearDown(self) -> None:
+        sbol3.set_defaults()
+        shutil.rmtree(self.tmpdir)
+
+    @staticmethod
+    def make_document() -> sbol3.Document:
+        doc = sbol3.Document()
+        seq = sbol3.Sequence('s1', elements='acgt', encoding='https://example.org/encoding')
+        c1 = sbol3.Component('c1', [], sequences=[seq])
+        c1.features.append(sbol3.SequenceFeature([sbol3.Range(seq, 5, 2)]))
+        c2 = sbol3.Component('c2', sbol3.SBO_DNA)
+        cd = sbol3.CombinatorialDerivation('cd', c2)
+        cd.variable_features.append(sbol3.VariableFeature(cardinality=sbol3.SBOL_ONE,
+                                                          variable=c1.features[0]))
+        doc.add([seq, c1, c2, cd])
+        return doc
+
+    @staticmethod
+    def issues(report):
+        return ([(repr(i.object_id), i.rule_id, i.message) for i in report.errors],
+                [(repr(i.object_id), i.rule_id, i.message) for i in report.warnings])
+
+    def count_validations(self, doc):
+        # Record the TopLevels that are validated
+        validated = []
+        for top_level in doc.objects:
+            top_level.validate = functools.partial(record_validation, validated, top_level,
+                                                   top_level.validate)
+        return validated
+
+    def test_cache(self):
+        doc = self.make_document()
+        expected = self.issues(doc.validate())
+        self.assertTrue(expected[0])
+        self.assertTrue(expected[1])
+        self.assertEqual(expected, self.issues(doc.validate(cache=self.path)))
+        self.assertEqual(4, len(sbol3.ValidationCache(self.path)))
+        validated = self.count_validations(doc)
+        self.assertEqual(expected, self.issues(doc.validate(cache=self.path)))
+        self.assertEqual([], validated)
+        # Unchanged TopLevels are not validated again when the
+        # document is read again
+        data = doc.write_string(sbol3.SORTED_NTRIPLES)
+        doc = sbol3.Document()
+        doc.read_string(data, sbol3.SORTED_NTRIPLES)
+        expected = self.issues(doc.validate(cache=self.path))
+        self.assertEqual(self.issues(doc.validate()), expected)
+        doc2 = sbol3.Document()
+        doc2.read_string(data, sbol3.SORTED_NTRIPLES)
+        validated = self.count_validations(doc2)
+        self.assertEqual(expected, self.issues(doc2.validate(cache=self.path)))
+        self.assertEqual([], validated)
+        # A changed TopLevel is validated again
+        doc2.find('c2').name = 'Component 2'
+        self.assertEqual(expected, self.issues(doc2.validate(cache=self.path)))
+        self.assertEqual([doc2.find('c2').identity], validated)
+        with self.assertRaises(ValueError):
+            doc2.validate(cache=self.path, incremental=True)
+
+    def test_referenced_types(self):
+        # The results of a TopLevel depend on the types of the
+        # objects it refers to
+        doc = self.make_document()
+        cache = sbol3.ValidationCache(self.path)
+        doc.validate(cache=cache)
+        validated = self.count_validations(doc)
+        # The variable of cd no longer has type Feature
+        doc.remove_object(doc.find('c1'))
+        report = doc.validate(cache=cache)
+        self.assertEqual([doc.find('cd').identity], validated)
+        self.assertEqual(self.issues(doc.validate()), self.issues(report))
+        self.assertIn(doc.find('cd').variable_features[0].identity,
+                      [str(error.object_id) for error in report.errors])
+
+    def test_value_order(self):
+        # The order of the values of a property is part of the
+        # fingerprint, as validation can depend on it
+        doc = self.make_document()
+        c2 = doc.find('c2')
+        c2.roles = [sbol3.SO_PROMOTER, sbol3.SO_CDS]
+        doc.validate(cache=self.path)
+        validated = self.count_validations(doc)
+        c2.roles = [sbol3.SO_CDS, sbol3.SO_PROMOTER]
+        doc.validate(cache=self.path)
+        self.assertEqual([c2.identity], validated)
+
+    def test_eviction(self):
+        doc = self.make_document()
+        with mock.patch('time.time', return_value=1000.0):
+            doc.validate(cache=self.path)
+        cache = sbol3.ValidationCache(self.path, max_age=100)
+        doc.find('c2').name = 'Component 2'
+        with mock.patch('time.time', return_value=1050.0):
+            doc.validate(cache=cache)
+        self.assertEqual(5, len(cache))
+        # Unused entries expire
+        with mock.patch('time.time', return_value=1120.0):
+            cache.evict()
+        self.assertEqual(4, len(cache))
+        # The least recently used entries are evicted first: here the
+        # results of the earlier version of c2
+        doc.find('c2').name = 'Component 2, version 2'
+        with mock.patch('time.time', return_value=1060.0):
+            doc.validate(cache=cache)
+        self.assertEqual(5, len(cache))
+        with sqlite3.connect(self.path) as connection:
+            size = connection.execute('SELECT SUM(LENGTH(key) + LENGTH(issues)) FROM results').fetchone()[0]
+        cache.max_age = None
+        cache.max_size = size - 1
+        cache.evict()
+        self.assertEqual(4, len(cache))
+        validated = self.count_validations(doc)
+        doc.validate(cache=cache)
+        self.assertEqual([], validated)
+        cache.max_size = 1
+        doc.validate(cache=cache)
+        self.assertEqual(0, len(cache))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+
+if __name__ == '__main__':
+    unittest.main()